@@ -0,0 +1,120 @@
+"""正規化アイテムに付帯させる"info"の持ち方（info_mode）ごとのメモリ使用量の計測。
+
+bybitusdtの6つの正規化ストアそれぞれにN件のchangeを流し込み、正規化ストアが保持する
+メモリをtracemallocで計測する。
+
+    python -m benchmarks.bench_info_memory
+"""
+import copy
+import gc
+import tracemalloc
+
+from pybotters.store import StoreChange
+
+import pybotters_wrapper as pbw
+
+N = 5000
+
+
+def sample(name: str, i: int) -> dict:
+    symbol = "BTCUSDT"
+    side = "Buy" if i % 2 else "Sell"
+    price = 30000.0 + i * 0.5
+    if name == "ticker":
+        return {"symbol": f"SYM{i}USDT", "last_price": str(price)}
+    elif name == "trades":
+        return {
+            "trade_id": f"trade-{i}",
+            "symbol": symbol,
+            "side": side,
+            "price": price,
+            "size": 0.001,
+            "timestamp": "2023-06-11T17:36:50.635Z",
+            "trade_time_ms": 1686505010635,
+            "tick_direction": "PlusTick",
+            "is_block_trade": "false",
+        }
+    elif name == "orderbook":
+        return {
+            "symbol": symbol,
+            "id": str(i),
+            "side": side,
+            "price": str(price),
+            "size": 1.5,
+        }
+    elif name == "order":
+        return {
+            "order_id": f"order-{i}",
+            "order_link_id": "",
+            "symbol": symbol,
+            "side": side,
+            "order_type": "Limit",
+            "price": price,
+            "qty": 0.01,
+            "time_in_force": "GoodTillCancel",
+            "order_status": "New",
+            "create_time": "2023-06-11T17:36:50.635Z",
+            "update_time": "2023-06-11T17:36:50.635Z",
+        }
+    elif name == "execution":
+        return {
+            "exec_id": f"exec-{i}",
+            "order_id": f"order-{i}",
+            "order_link_id": "",
+            "symbol": symbol,
+            "side": side,
+            "price": price,
+            "order_qty": 0.01,
+            "exec_type": "Trade",
+            "exec_qty": 0.01,
+            "exec_fee": 0.0001,
+            "leaves_qty": 0,
+            "is_maker": False,
+            "trade_time": "2023-06-11T17:36:50.635Z",
+        }
+    elif name == "position":
+        return {
+            "symbol": f"SYM{i}USDT",
+            "position_idx": 0,
+            "side": side,
+            "size": 0.01,
+            "entry_price": price,
+            "liq_price": price * 0.5,
+            "position_value": price * 0.01,
+            "leverage": 10,
+            "unrealised_pnl": 0.0,
+        }
+    raise ValueError(name)
+
+
+def measure(name: str, info_mode: str) -> int:
+    store = pbw.create_factory("bybitusdt").create_normalized_store_builder().get(name)
+    store.set_info_mode(info_mode)
+    items = [sample(name, i) for i in range(N)]
+    store._base_store._insert(items)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for item in items:
+        # pybottersのStoreChangeと同様にdeep copyしたものを渡す
+        store._on_watch(
+            StoreChange(store._base_store, "insert", None, copy.deepcopy(item))
+        )
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(store) == N
+    return after - before
+
+
+def main():
+    modes = ("full", "lazy", "none")
+    print(f"{'store':<12}" + "".join(f"{m + ' [KiB]':>14}" for m in modes))
+    for name in ("ticker", "trades", "orderbook", "order", "execution", "position"):
+        sizes = [measure(name, m) for m in modes]
+        print(f"{name:<12}" + "".join(f"{s / 1024:>14.1f}" for s in sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""watch経由とinlineモードでの正規化ストアへの反映レイテンシの計測。
+
+bitFlyerの板メッセージをDataStoreWrapper.onmessageに流し、呼び出しから
+``store.orderbook``に反映されるまでの時間を計測する。
+
+    python -m benchmarks.bench_inline_normalization
+"""
+import asyncio
+import statistics
+import time
+
+import pybotters_wrapper as pbw
+
+N = 2000
+LEVELS = 20
+
+
+def board_message(i: int) -> dict:
+    mid = 3000000 + i
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": "lightning_board_FX_BTC_JPY",
+            "message": {
+                "mid_price": mid,
+                "bids": [{"price": mid - j - 1, "size": 0.01} for j in range(LEVELS)],
+                "asks": [{"price": mid + j + 1, "size": 0.01} for j in range(LEVELS)],
+            },
+        },
+    }
+
+
+async def measure(inline: bool) -> list[float]:
+    store = pbw.create_store("bitflyer").set_inline_normalization(inline)
+    store.store._snapshots.add("FX_BTC_JPY")
+    await asyncio.sleep(0)
+
+    latencies = []
+    for i in range(N):
+        msg = board_message(i)
+        target = {"symbol": "FX_BTC_JPY", "side": "BUY", "price": float(i + 2999999)}
+        start = time.perf_counter()
+        store.onmessage(msg, None)
+        while store.orderbook.get(target) is None:
+            await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - start)
+
+    await store.close()
+    return latencies
+
+
+async def main():
+    print(f"{'mode':<8}{'p50 [us]':>12}{'p99 [us]':>12}")
+    for inline in (False, True):
+        latencies = sorted(await measure(inline))
+        p50 = statistics.median(latencies)
+        p99 = latencies[int(len(latencies) * 0.99)]
+        name = "inline" if inline else "watch"
+        print(f"{name:<8}{p50 * 1e6:>12.1f}{p99 * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
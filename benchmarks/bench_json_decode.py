@@ -0,0 +1,105 @@
+"""websocket messageのJSONデコードのスループット計測。
+
+Binance（depthUpdate）・OKX（books）・bitFlyer（lightning_board）の配信と同じ形の
+messageを、インストールされているデコーダ（json / ujson / orjson）でデコードする。
+
+    python -m benchmarks.bench_json_decode
+"""
+import json
+import random
+import timeit
+
+from pybotters_wrapper.core import get_json_loads
+
+N = 20_000
+
+
+def _levels(n: int, mid: float, sign: int) -> list[list[str]]:
+    return [
+        [f"{mid + sign * 0.1 * (i + 1):.1f}", f"{random.uniform(0, 5):.3f}"]
+        for i in range(n)
+    ]
+
+
+def payloads() -> dict[str, str]:
+    random.seed(0)
+    binance_depth = {
+        "stream": "btcusdt@depth@100ms",
+        "data": {
+            "e": "depthUpdate",
+            "E": 1697500000000,
+            "T": 1697500000000,
+            "s": "BTCUSDT",
+            "U": 3428790000000,
+            "u": 3428790000123,
+            "pu": 3428789999999,
+            "b": _levels(40, 28000.0, -1),
+            "a": _levels(40, 28000.0, 1),
+        },
+    }
+    okx_books = {
+        "arg": {"channel": "books", "instId": "BTC-USDT-SWAP"},
+        "action": "update",
+        "data": [
+            {
+                "asks": [lv + ["0", "3"] for lv in _levels(30, 28000.0, 1)],
+                "bids": [lv + ["0", "2"] for lv in _levels(30, 28000.0, -1)],
+                "ts": "1697500000000",
+                "checksum": -1234567890,
+                "seqId": 123456789,
+                "prevSeqId": 123456788,
+            }
+        ],
+    }
+    bitflyer_board = {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": "lightning_board_FX_BTC_JPY",
+            "message": {
+                "mid_price": 4200000.0,
+                "asks": [
+                    {"price": float(p), "size": float(s)}
+                    for p, s in _levels(10, 4200000.0, 1)
+                ],
+                "bids": [
+                    {"price": float(p), "size": float(s)}
+                    for p, s in _levels(10, 4200000.0, -1)
+                ],
+            },
+        },
+    }
+    return {
+        "binance.depthUpdate": json.dumps(binance_depth),
+        "okx.books": json.dumps(okx_books),
+        "bitflyer.board": json.dumps(bitflyer_board),
+    }
+
+
+def decoders() -> dict:
+    loaded = {}
+    for name in ("json", "ujson", "orjson"):
+        try:
+            loaded[name] = get_json_loads(name)  # type: ignore
+        except ImportError:
+            print(f"{name} is not installed (skipped)")
+    return loaded
+
+
+def main():
+    loaded = decoders()
+    header = f"{'payload':<22}{'bytes':>8}"
+    for name in loaded:
+        header += f"{name + ' [us]':>14}{'MB/s':>9}"
+    print(header)
+    for case, payload in payloads().items():
+        line = f"{case:<22}{len(payload):>8}"
+        for loads in loaded.values():
+            assert loads(payload) == json.loads(payload)
+            elapsed = timeit.timeit(lambda: loads(payload), number=N) / N
+            line += f"{elapsed * 1e6:>14.2f}{len(payload) / elapsed / 1e6:>9.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""NormalizedDataStoreのmapper適用コストの計測。
+
+旧実装（フィールドごとのループ + ``_itemize(**values)``）とコンパイル済みmapperの
+1 change あたりのコストを比較する。
+
+    python -m benchmarks.bench_normalize
+"""
+import timeit
+
+from pybotters.store import StoreChange
+
+import pybotters_wrapper as pbw
+
+N = 100_000
+
+
+def legacy_normalize(store, change):
+    # コンパイル前のNormalizedDataStore._normalize相当
+    values = {}
+    for k, value_or_fn in store._mapper.items():
+        if isinstance(value_or_fn, str):
+            values[k] = value_or_fn
+        elif callable(value_or_fn):
+            values[k] = value_or_fn(
+                change.store, change.operation, change.source, change.data
+            )
+    return store._itemize(**values)
+
+
+def compiled_normalize(store, change):
+    return store._normalize(change.store, change.operation, change.source, change.data)
+
+
+def cases():
+    bitflyer = pbw.create_factory("bitflyer").create_normalized_store_builder()
+    binance = pbw.create_factory("binanceusdsm").create_normalized_store_builder()
+    okx = pbw.create_factory("okx").create_normalized_store_builder()
+    yield "bitflyer.orderbook", bitflyer.orderbook(), {
+        "product_code": "FX_BTC_JPY",
+        "side": "BUY",
+        "price": 3688478.0,
+        "size": 0.01,
+    }
+    yield "binanceusdsm.orderbook", binance.orderbook(), {
+        "s": "BTCUSDT",
+        "S": "SELL",
+        "p": "30000.1",
+        "q": "1.234",
+    }
+    yield "okx.orderbook", okx.orderbook(), {
+        "instId": "BTC-USDT",
+        "side": "asks",
+        "px": "30000.1",
+        "sz": "1.234",
+    }
+    yield "bitflyer.ticker", bitflyer.ticker(), {
+        "product_code": "FX_BTC_JPY",
+        "ltp": 3688478.0,
+    }
+
+
+def main():
+    print(f"{'case':<24}{'legacy [us]':>14}{'compiled [us]':>16}{'speedup':>10}")
+    for name, store, data in cases():
+        change = StoreChange(None, "insert", {}, data)
+        assert legacy_normalize(store, change) == compiled_normalize(store, change)
+        legacy = timeit.timeit(lambda: legacy_normalize(store, change), number=N)
+        compiled = timeit.timeit(lambda: compiled_normalize(store, change), number=N)
+        print(
+            f"{name:<24}{legacy / N * 1e6:>14.3f}{compiled / N * 1e6:>16.3f}"
+            f"{legacy / compiled:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""板の特徴量（最良気配・microprice・imbalance・mid±bps以内の厚み）の更新コストの計測。
+
+bitFlyerの板（片側LEVELS件）に差分メッセージを流し、メッセージごとに
+``store.orderbook.sorted()``から全て計算し直す場合と、OrderbookFeaturesが差分
+（watch_delta）から更新する場合の1メッセージあたりのコストを比較する。
+
+    python -m benchmarks.bench_orderbook_features
+"""
+import asyncio
+import random
+import statistics
+import time
+
+import pybotters_wrapper as pbw
+
+N = 2000
+LEVELS = 500
+UPDATES = 5
+BPS = 10.0
+MID = 3000000
+
+
+def board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": MID,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+def recompute(store: pbw.core.DataStoreWrapper) -> tuple:
+    asks, bids = store.orderbook.sorted({"symbol": "FX_BTC_JPY"}).values()
+    best_ask, best_bid = asks[0], bids[0]
+    mid = (best_ask["price"] + best_bid["price"]) / 2
+    upper, lower = mid * (1 + BPS / 10000), mid * (1 - BPS / 10000)
+    ask_depth = sum(i["size"] for i in asks if i["price"] <= upper)
+    bid_depth = sum(i["size"] for i in bids if i["price"] >= lower)
+    total = best_ask["size"] + best_bid["size"]
+    microprice = (
+        best_ask["price"] * best_bid["size"] + best_bid["price"] * best_ask["size"]
+    ) / total
+    imbalance = (best_bid["size"] - best_ask["size"]) / total
+    return mid, microprice, imbalance, ask_depth, bid_depth
+
+
+async def main():
+    rng = random.Random(0)
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    store.store._snapshots.add("FX_BTC_JPY")
+    await asyncio.sleep(0)
+    store.onmessage(
+        board_message(
+            "lightning_board",
+            [(MID + i, 0.01) for i in range(1, LEVELS + 1)],
+            [(MID - i, 0.01) for i in range(1, LEVELS + 1)],
+        ),
+        None,
+    )
+
+    features = pbw.plugins.orderbook_features(store, "FX_BTC_JPY", bps=BPS)
+    # タスクは止めて、同じdeltaを直接渡して計測する
+    features.stop()
+    features._on_delta_start()
+    stream = store.orderbook["FX_BTC_JPY"].watch_delta()
+
+    recompute_times, features_times = [], []
+    for _ in range(N):
+        # 最良気配付近に偏った更新（0は削除）
+        asks = [
+            (MID + int(rng.expovariate(0.1)) + 1, rng.choice([0.0, 0.01, 0.02]))
+            for _ in range(UPDATES)
+        ]
+        bids = [
+            (MID - int(rng.expovariate(0.1)) - 1, rng.choice([0.0, 0.01, 0.02]))
+            for _ in range(UPDATES)
+        ]
+        store.onmessage(board_message("lightning_board", asks, bids), None)
+        delta = stream._queue.get_nowait()
+
+        start = time.perf_counter()
+        expected = recompute(store)
+        recompute_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        features._on_delta(delta)
+        features_times.append(time.perf_counter() - start)
+
+        assert abs(features.ask_depth - expected[3]) < 1e-6
+
+    stream.close()
+    await store.close()
+
+    print(f"{'method':<12}{'p50 [us]':>12}{'p99 [us]':>12}")
+    for name, times in (("sorted", recompute_times), ("features", features_times)):
+        times = sorted(times)
+        p50 = statistics.median(times)
+        p99 = times[int(len(times) * 0.99)]
+        print(f"{name:<12}{p50 * 1e6:>12.1f}{p99 * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""記録したwebsocket messageを待たずに再生した時のスループット計測。
+
+WebSocketRecorderで記録したファイルをWebSocketReplayerでDataStoreWrapperに流し、
+1秒あたりに処理できたmessage数を計測する。引数を指定しない場合は、bitFlyerと
+Binance（USDⓈ-M）の板・約定のmessageを生成・記録したファイルを使う。
+
+    python -m benchmarks.bench_replay
+    python -m benchmarks.bench_replay <exchange> <path>
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+import pybotters_wrapper as pbw
+
+N = 5_000
+LEVELS = 20
+
+
+def bitflyer_messages(n: int):
+    random.seed(0)
+    for i in range(n):
+        if i % 4 == 0:
+            price = 3000000 + random.randint(-100, 100)
+            yield {
+                "jsonrpc": "2.0",
+                "method": "channelMessage",
+                "params": {
+                    "channel": "lightning_executions_FX_BTC_JPY",
+                    "message": [
+                        {
+                            "id": i,
+                            "side": random.choice(["BUY", "SELL"]),
+                            "price": float(price),
+                            "size": 0.01,
+                            "exec_date": "2023-10-01T00:00:00.000000Z",
+                        }
+                    ],
+                },
+            }
+        else:
+            mid = 3000000 + random.randint(-100, 100)
+            yield {
+                "jsonrpc": "2.0",
+                "method": "channelMessage",
+                "params": {
+                    "channel": "lightning_board_FX_BTC_JPY",
+                    "message": {
+                        "mid_price": mid,
+                        "bids": [
+                            {"price": float(mid - j - 1), "size": random.random()}
+                            for j in range(LEVELS)
+                        ],
+                        "asks": [
+                            {"price": float(mid + j + 1), "size": random.random()}
+                            for j in range(LEVELS)
+                        ],
+                    },
+                },
+            }
+
+
+def binanceusdsm_messages(n: int):
+    random.seed(0)
+    for i in range(n):
+        mid = 28000 + random.randint(-100, 100) / 10
+        if i % 4 == 0:
+            yield {
+                "e": "aggTrade",
+                "E": 1697500000000 + i,
+                "s": "BTCUSDT",
+                "a": i,
+                "p": f"{mid:.1f}",
+                "q": "0.010",
+                "f": i,
+                "l": i,
+                "T": 1697500000000 + i,
+                "m": random.random() < 0.5,
+            }
+        else:
+            yield {
+                "e": "depthUpdate",
+                "E": 1697500000000 + i,
+                "T": 1697500000000 + i,
+                "s": "BTCUSDT",
+                "U": i,
+                "u": i,
+                "pu": i - 1,
+                "b": [
+                    [f"{mid - (j + 1) / 10:.1f}", f"{random.random():.3f}"]
+                    for j in range(LEVELS)
+                ],
+                "a": [
+                    [f"{mid + (j + 1) / 10:.1f}", f"{random.random():.3f}"]
+                    for j in range(LEVELS)
+                ],
+            }
+
+
+async def record(exchange: str, path: str, messages) -> None:
+    store = pbw.create_store(exchange).set_inline_normalization(True)
+    recorder = pbw.plugins.recorder(store, path)
+    for msg in messages:
+        store.onmessage(msg, None)
+    recorder.close()
+    await store.close()
+
+
+async def replay(exchange: str, path: str) -> dict:
+    store = pbw.create_store(exchange)
+    if exchange == "bitflyer":
+        # 生成したmessageにはスナップショットを含めていない
+        store.store._snapshots.add("FX_BTC_JPY")
+    await asyncio.sleep(0)
+    result = await pbw.plugins.replayer(store, path).replay()
+    await store.close()
+    return result
+
+
+async def main():
+    if len(sys.argv) == 3:
+        cases = [(sys.argv[1], sys.argv[2])]
+    else:
+        tmpdir = tempfile.mkdtemp()
+        cases = []
+        for exchange, messages in [
+            ("bitflyer", bitflyer_messages(N)),
+            ("binanceusdsm", binanceusdsm_messages(N)),
+        ]:
+            path = os.path.join(tmpdir, f"{exchange}.jsonl")
+            await record(exchange, path, messages)
+            cases.append((exchange, path))
+
+    print(f"{'exchange':<16}{'frames':>10}{'elapsed [s]':>14}{'frames/s':>12}")
+    for exchange, path in cases:
+        result = await replay(exchange, path)
+        print(
+            f"{exchange:<16}{result['frames']:>10}{result['elapsed']:>14.3f}"
+            f"{result['frames_per_sec']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
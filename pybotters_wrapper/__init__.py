@@ -5,6 +5,7 @@ from .factory import (
     create_api,
     create_client,
     create_factory,
+    create_process_store,
     create_sandbox,
     create_store,
     create_store_and_api,
@@ -1,5 +1,5 @@
 import time
-from typing import Literal
+from typing import Any, Hashable, Literal
 
 from ...core import WebSocketChannels
 from ..listenkey_fetcher import DUMMY_LISTEN_KEY
@@ -25,6 +25,13 @@ class BinanceCOINMWebsocketChannels(
 ):
     _ENDPOINT = "wss://dstream.binance.com/ws"
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        # イベントの種類（"depthUpdate"、"ORDER_TRADE_UPDATE"など）
+        if isinstance(msg, dict):
+            return msg.get("e")
+        return None
+
     def ticker(self, symbol: str, **kwargs) -> str:
         return f"{symbol.lower()}@ticker"
 
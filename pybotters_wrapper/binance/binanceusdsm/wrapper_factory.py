@@ -52,6 +52,7 @@ from ...core import (
     WrapperFactory,
 )
 from ..normalized_store_builder import BinanceNormalizedStoreBuilder
+from ..orderbook_resync import BinanceFuturesOrderbookResync
 from ..price_size_precision_fetcher import BinancePriceSizePrecisionFetcher
 from ..websocket_request_customizer import BinanceWebSocketRequestCustomizer
 from . import BinanceUSDSMWebsocketChannels
@@ -126,6 +127,7 @@ class BinanceUSDSMWrapperFactory(WrapperFactory):
             .set_normalized_store_builder(cls.create_normalized_store_builder(store))
             .set_websocket_request_builder(cls.create_websocket_request_builder())
             .set_websocket_request_customizer(cls.create_websocket_request_customizer())
+            .set_orderbook_resync(BinanceFuturesOrderbookResync)
             .get()
         )
 
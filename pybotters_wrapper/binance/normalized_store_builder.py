@@ -86,7 +86,7 @@ class BinanceNormalizedStoreBuilder(
                         {},
                         item,
                     )
-                    self._insert([{**item, "info": {"data": msg, "source": None}}])
+                    self._insert([self._attach_info(item, msg, None)])
 
         return ExecutionStore(
             None,
@@ -101,6 +101,8 @@ class BinanceNormalizedStoreBuilder(
                 ),
             },
             on_msg=_on_msg,
+            # Binanceはmessageのキー（イベントの種類）で振り分けるのでmsg_filterは不要
+            msg_keys=("ORDER_TRADE_UPDATE", "executionReport"),
         )
 
     def position(self) -> PositionStore:
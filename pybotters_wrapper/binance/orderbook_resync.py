@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pybotters.models.binance import BinanceCOINMDataStore, BinanceUSDSMDataStore
+from pybotters.store import Item
+
+from ..core import OrderbookResync
+
+
+class BinanceFuturesOrderbookResync(
+    OrderbookResync[BinanceUSDSMDataStore | BinanceCOINMDataStore]
+):
+    """Binance先物の差分板（@depth）の再同期。
+
+    https://binance-docs.github.io/apidocs/futures/en/#how-to-manage-a-local-order-book-correctly
+    """
+
+    def _hook(self) -> None:
+        orderbook = self._store.orderbook
+        self._base_onmessage = orderbook._onmessage
+        orderbook._onmessage = lambda item: self._on_diff(item["s"], item)
+        orderbook._onresponse = self._onresponse
+
+    def _unhook(self) -> None:
+        # インスタンスに差し込んだハンドラを外してクラスのメソッドに戻す
+        orderbook = self._store.orderbook
+        for name in ("_onmessage", "_onresponse"):
+            orderbook.__dict__.pop(name, None)
+
+    def _apply_diff(self, msg: Item) -> None:
+        self._base_onmessage(msg)
+
+    def _get_last_id(self, msg: Item) -> int:
+        return msg["u"]
+
+    def _is_stale(self, last_id: int, msg: Item) -> bool:
+        return msg["u"] < last_id
+
+    def _is_first(self, last_id: int, msg: Item) -> bool:
+        return msg["U"] <= last_id <= msg["u"]
+
+    def _is_next(self, last_id: int, msg: Item) -> bool:
+        return msg["pu"] == last_id
+
+    def _onresponse(self, symbol: str, data: Item) -> None:
+        orderbook = self._store.orderbook
+        # 板を作り直さず、snapshotとの差分のみを適用する
+        current = {(i["S"], i["p"]): i for i in orderbook.find({"s": symbol})}
+        snapshot = {
+            (side, p): q
+            for side, key in (("BUY", "bids"), ("SELL", "asks"))
+            for p, q in data[key]
+        }
+        orderbook._delete([i for k, i in current.items() if k not in snapshot])
+        orderbook._update(
+            [
+                {"s": symbol, "S": side, "p": p, "q": q}
+                for (side, p), q in snapshot.items()
+                if (side, p) not in current or current[(side, p)]["q"] != q
+            ]
+        )
+        # snapshot前に受け取っていた差分（pybottersがバッファしている）も再生の対象にする
+        buffer = [msg for msg in orderbook._buff if msg["s"] == symbol]
+        others = [msg for msg in orderbook._buff if msg["s"] != symbol]
+        orderbook._buff.clear()
+        orderbook._buff.extend(others)
+        orderbook.initialized = True
+        self._on_snapshot(symbol, data["lastUpdateId"], buffer)
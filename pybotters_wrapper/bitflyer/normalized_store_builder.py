@@ -1,16 +1,20 @@
+import uuid
 import warnings
 
 import pandas as pd
 from pybotters import bitFlyerDataStore
-from pybotters.store import StoreChange, StoreStream
+from pybotters.store import Item, StoreChange
 
 from ..core import (
+    BackpressureStoreStream,
     ExecutionStore,
     NormalizedStoreBuilder,
     OrderbookStore,
     OrderStore,
     PositionItem,
     PositionStore,
+    TBackpressurePolicy,
+    TConflateKey,
     TickerStore,
     TradesStore,
 )
@@ -89,18 +93,76 @@ class bitFlyerNormalizedStoreBuilder(NormalizedStoreBuilder[bitFlyerDataStore]):
             _KEYS = []
             _NORMALIZED_ITEM_CLASS = PositionItem
 
+            def __init__(self, *args, **kwargs):
+                # id(元アイテム) -> (元アイテム, 同期時点の元アイテムの値, 正規化ストアのuuid)
+                self._synced: dict[int, tuple[Item, tuple, uuid.UUID]] = {}
+                super(bitFlyerPositionStore, self).__init__(*args, **kwargs)
+
+            def synchronize(self) -> None:
+                self._clear()
+                self._synced = {}
+                self._sync_positions()
+
             def _on_watch(self, change: "StoreChange") -> None:
-                # TODO: bitflyerのポジションの同期方法を考える
-                # pybottersにおけるbitflyerのポジション計算は結構複雑なので、
-                # 確実に状態を同じにするために"一括同期"する。
-                self.synchronize()
+                # pybottersにおけるbitflyerのポジション計算は結構複雑なので（建玉の部分的な
+                # 減算・削除など）、changeから差分を組み立てるのではなく元ストアと突き合わせる。
+                self._sync_positions()
+
+            def _on_watch_batch(self, changes: list[StoreChange]) -> None:
+                # 元ストアとの突き合わせなのでバッチ内のchangeの数によらず一度で良い
+                self._sync_positions()
+
+            def _sync_positions(self) -> None:
+                """元ストアとの差分同期。
+
+                元ストアの建玉（キーなし）はpybotters内で同じdictがin-placeで更新されるので、
+                dictのidをキーに前回同期時の値と比較し、追加・変更・削除された建玉だけを正規化・
+                反映する。値が変わっていない建玉は正規化しない。キーがないので、変更は正規化
+                ストアのuuidを指定して置き換える（_replace・_remove）。
+                """
+                prev = self._synced
+                synced: dict[int, tuple[Item, tuple, uuid.UUID]] = {}
+                changed: dict[uuid.UUID, Item] = {}
+                for d in self._base_store.find():
+                    values = tuple(d.items())
+                    entry = prev.pop(id(d), None)
+                    if entry is not None and entry[1] == values:
+                        synced[id(d)] = entry
+                        continue
+                    item = self._attach_info(
+                        self._normalize(self._base_store, "insert", {}, d), d, {}
+                    )
+                    _id = uuid.uuid4() if entry is None else entry[2]
+                    changed[_id] = item
+                    # 元アイテムへの参照を持っておくことで、同期までの間にidが再利用されないようにする
+                    synced[id(d)] = (d, values, _id)
+                self._synced = synced
+                if not changed and not prev:
+                    return
+
+                # 削除と置き換えをまとめて一度だけ通知する
+                store = self._normalized_store
+                events, store._events = store._events, {}
+                try:
+                    if prev:
+                        self._remove([_id for _, _, _id in prev.values()])
+                    if changed:
+                        self._replace(changed)
+                finally:
+                    store._events = events
+                store._set(list(changed.values()))
 
-            def watch(self) -> "StoreStream":
+            def watch(
+                self,
+                maxsize: int | None = None,
+                policy: TBackpressurePolicy = "unbounded",
+                key: TConflateKey | None = None,
+            ) -> BackpressureStoreStream:
                 warnings.warn(
                     "bitFlyerPositionStore.watch is not recommended to use due to its "
                     "ad-hook implementation."
                 )
-                return super().watch()
+                return super().watch(maxsize, policy, key)
 
         return bitFlyerPositionStore(
             self._store.positions,
@@ -1,5 +1,5 @@
 import time
-from typing import Literal
+from typing import Any, Hashable, Literal
 
 from ..core import WebSocketChannels
 
@@ -56,6 +56,13 @@ class bitFlyerWebsocketChannels(
     def parent_order_events(self) -> str:
         return "parent_order_events"
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        # "lightning_board_FX_BTC_JPY"など購読したチャンネル名
+        if isinstance(msg, dict) and "params" in msg:
+            return msg["params"].get("channel")
+        return None
+
     def _parameter_template(self, parameter: str) -> dict:
         return {
             "method": "subscribe",
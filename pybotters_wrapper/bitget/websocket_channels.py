@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Any, Hashable, Literal
 
 from ..core import WebSocketChannels
 
@@ -20,6 +20,12 @@ class BitgetWebSocketChannels(
 ):
     _ENDPOINT = "wss://ws.bitget.com/mix/v1/stream"
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        if isinstance(msg, dict) and "data" in msg and "arg" in msg:
+            return msg["arg"].get("channel")
+        return None
+
     def ticker(self, symbol: str, **kwargs) -> dict:
         return {"channel": "ticker", "instId": symbol}
 
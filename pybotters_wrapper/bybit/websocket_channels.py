@@ -1,4 +1,13 @@
+from typing import Any, Hashable
+
+
 class BybitWebSocketChannelsMixin:
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        if isinstance(msg, dict):
+            return msg.get("topic")
+        return None
+
     def ticker(self, symbol: str, **kwargs) -> str:
         return self.instrument_info(symbol)
 
@@ -4,6 +4,12 @@ from .api_wrapper_builder import APIWrapperBuilder
 from .exchange_property import ExchangeProperty
 from .fetcher import *
 from .formatter import *
+from .json_decoder import (
+    TJsonLoads,
+    default_json_loads,
+    get_json_loads,
+    set_default_json_loads,
+)
 from .store import *
 from .store_wrapper import DataStoreWrapper
 from .store_wrapper_builder import DataStoreWrapperBuilder
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from json import JSONDecodeError
-from typing import Callable
+from typing import Any, Callable
 
 import aiohttp
 import pybotters
@@ -11,6 +11,7 @@ from loguru import logger
 from requests import Response
 
 from ..exchange_property import ExchangeProperty
+from ..json_decoder import TJsonLoads, default_json_loads
 from ..typedefs.typing import TRequestMethod
 
 
@@ -51,11 +52,13 @@ class APIClient:
         *,
         exchange_property: ExchangeProperty,
         base_url_attacher: Callable[[str], str] | None = None,
+        json_loads: TJsonLoads | None = None,
     ):
         self._client = client
         self._verbose = verbose
         self._eprop = exchange_property
         self._base_url_attacher = base_url_attacher
+        self._json_loads = json_loads or default_json_loads()
         self._validate()
 
     async def request(
@@ -149,6 +152,14 @@ class APIClient:
     def sdelete(self, url: str, *, data: dict | None = None, **kwargs) -> Response:
         return self.srequest("DELETE", url, params_or_data=data, **kwargs)
 
+    async def decode(self, resp: ClientResponse) -> Any:
+        """responseのbodyをjson_loadsでデコードする"""
+        return await resp.json(loads=self._json_loads)
+
+    @property
+    def json_loads(self) -> TJsonLoads:
+        return self._json_loads
+
     def _attach_base_url(self, url: str) -> str:
         if self._base_url_attacher is None:
             if self._eprop is None:
@@ -7,6 +7,7 @@ if TYPE_CHECKING:
 
 import pybotters
 
+from ..json_decoder import TJsonLoads
 from .client import APIClient
 
 TAPIClientBuilder = TypeVar("TAPIClientBuilder", bound="APIClientBuilder")
@@ -18,6 +19,7 @@ class APIClientBuilder:
         self._exchange_property: ExchangeProperty | None = None
         self._base_url_attacher: Callable[[str], str] | None = None
         self._verbose: bool = False
+        self._json_loads: TJsonLoads | None = None
 
     def set_client(
         self: TAPIClientBuilder, client: pybotters.Client
@@ -41,6 +43,12 @@ class APIClientBuilder:
         self._base_url_attacher = base_url_attacher
         return self
 
+    def set_json_loads(
+        self: TAPIClientBuilder, json_loads: TJsonLoads
+    ) -> TAPIClientBuilder:
+        self._json_loads = json_loads
+        return self
+
     def get(self) -> APIClient:
         assert self._client is not None
         assert self._exchange_property is not None
@@ -49,4 +57,5 @@ class APIClientBuilder:
             self._verbose,
             exchange_property=self._exchange_property,
             base_url_attacher=self._base_url_attacher,
+            json_loads=self._json_loads,
         )
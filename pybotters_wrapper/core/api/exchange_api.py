@@ -103,7 +103,7 @@ class ExchangeAPI(
 
     async def _decode_response(self, resp: ClientResponse) -> dict:
         if self._response_decoder is None:
-            return await resp.json()
+            return await self._api_client.decode(resp)
         else:
             if asyncio.iscoroutinefunction(self._response_decoder):
                 return await self._response_decoder(resp)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Literal
+
+TJsonLoads = Callable[[str | bytes], Any]
+TJsonDecoderName = Literal["auto", "orjson", "ujson", "json"]
+
+
+def _import_loads(name: str) -> TJsonLoads | None:
+    if name == "json":
+        return json.loads
+    try:
+        module = __import__(name)
+    except ImportError:
+        return None
+    return module.loads
+
+
+def get_json_loads(name: TJsonDecoderName = "auto") -> TJsonLoads:
+    """JSONのデコード関数を返す。
+
+    "auto"の場合はインストールされている中で速いもの（orjson -> ujson -> json）を使う。
+    orjson・ujsonのデコードエラーはどちらもValueErrorのサブクラス。
+    """
+    if name == "auto":
+        for candidate in ("orjson", "ujson"):
+            loads = _import_loads(candidate)
+            if loads is not None:
+                return loads
+        return json.loads
+
+    loads = _import_loads(name)
+    if loads is None:
+        raise ImportError(f"JSON decoder '{name}' is not installed")
+    return loads
+
+
+_default_json_loads: TJsonLoads = get_json_loads()
+
+
+def default_json_loads() -> TJsonLoads:
+    """WebSocketConnection・APIClientが生成時に使うデコード関数"""
+    return _default_json_loads
+
+
+def set_default_json_loads(loads: TJsonLoads | TJsonDecoderName) -> None:
+    """以降に生成するWebSocketConnection・APIClientが使うデコード関数を設定する"""
+    global _default_json_loads
+    _default_json_loads = get_json_loads(loads) if isinstance(loads, str) else loads
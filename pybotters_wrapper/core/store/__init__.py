@@ -1,9 +1,29 @@
+from .backpressure_stream import (
+    BackpressureStoreStream,
+    TBackpressurePolicy,
+    TConflateKey,
+    default_conflate_key,
+)
+from .bounded_store import BoundedDataStore
+from .indexed_store import IndexedDataStore
 from .normalized_store import NormalizedDataStore
 from .normalized_store_builder import NormalizedStoreBuilder
 from .normalized_store_execution import ExecutionStore
 from .normalized_store_order import OrderStore
-from .normalized_store_orderbook import OrderbookStore
+from .normalized_store_orderbook import (
+    DepthSide,
+    OrderbookDelta,
+    OrderbookDeltaStream,
+    OrderbookDepth,
+    OrderbookStore,
+    SymbolOrderbook,
+)
 from .normalized_store_position import PositionStore
+from .normalized_store_stats import NormalizedStoreStats
 from .normalized_store_ticker import TickerStore
 from .normalized_store_trades import TradesStore
+from .normalized_store_trades_columnar import ColumnarTradesStore, TradesColumns
+from .orderbook_resync import OrderbookResync
+from .price_level_store import PriceLevelDataStore, PriceLevels, SymbolStoreStream
 from .store_initializer import StoreInitializer
+from .store_readiness import hook_ready_event, ready_event
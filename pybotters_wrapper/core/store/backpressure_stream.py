@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from itertools import repeat
+from typing import Callable, Hashable, Literal
+
+from loguru import logger
+from pybotters.store import DataStore, StoreChange, StoreStream
+
+# unbounded: 捨てない（待たせることもしない。上限を超えた分はoverflowsとして数えて警告する）
+# drop_oldest: 上限を超えたら一番古いchangeを捨てる
+# conflate: 同じキーのchangeは最新のもので置き換える（上限を超えたら一番古いキーを捨てる）
+TBackpressurePolicy = Literal["unbounded", "drop_oldest", "conflate"]
+TConflateKey = Callable[[StoreChange], Hashable]
+
+
+def default_conflate_key(change: StoreChange) -> Hashable:
+    """changeのストアのキー（_keys）の値。キーのないストアのchangeはまとめない"""
+    keys = change.store._keys
+    if not keys:
+        return object()
+    data = change.data
+    return tuple(data.get(k) for k in keys)
+
+
+class _BackpressureQueue(asyncio.Queue):
+    """policyに従って上限を扱うStoreChangeのキュー。
+
+    DataStore._putは同期的にput_nowaitするので、QueueFullは送出せずに_putでpolicyを適用する。
+    conflateの場合、_queueには出現順のキーを、_latestにはキーごとの最新のchangeを持つ。
+    track_times有効時は_timesに_queueと並べてキューに入った時刻を持つ（conflateでまとめた
+    changeは最初にキューに入った時刻のまま）。
+    """
+
+    def __init__(
+        self,
+        maxsize: int | None,
+        policy: TBackpressurePolicy,
+        key: TConflateKey | None,
+    ):
+        self._limit = maxsize
+        self._policy = policy
+        self._key = key or default_conflate_key
+        self.max_depth = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.overflows = 0
+        self._times: deque[float] | None = None
+        self._got_times: list[float] = []
+        super(_BackpressureQueue, self).__init__()
+
+    def _init(self, maxsize: int) -> None:
+        self._queue: deque = deque()
+        self._latest: dict[Hashable, StoreChange] = {}
+
+    def _put(self, item: StoreChange) -> None:
+        self._enqueue(item, None if self._times is None else time.perf_counter())
+
+    def _enqueue(self, item: StoreChange, enqueued: float | None) -> None:
+        queue = self._queue
+        policy = self._policy
+        if policy == "conflate":
+            k = self._key(item)
+            if k in self._latest:
+                self._latest[k] = item
+                self.conflated += 1
+                return
+            self._latest[k] = item
+            item = k
+        limit = self._limit
+        if limit is not None and len(queue) >= limit:
+            if policy == "unbounded":
+                self.overflows += 1
+                if len(queue) == limit:
+                    logger.warning(
+                        f"Watch queue exceeded its limit ({limit}): consumer is slow"
+                    )
+            else:
+                dropped = queue.popleft()
+                if policy == "conflate":
+                    del self._latest[dropped]
+                if self._times is not None:
+                    self._times.popleft()
+                self.dropped += 1
+        queue.append(item)
+        if self._times is not None:
+            self._times.append(enqueued)
+        if len(queue) > self.max_depth:
+            self.max_depth = len(queue)
+
+    def _get(self) -> StoreChange:
+        item = self._queue.popleft()
+        if self._times is not None:
+            self._got_times.append(self._times.popleft())
+        if self._policy == "conflate":
+            return self._latest.pop(item)
+        return item
+
+    def configure(
+        self,
+        maxsize: int | None,
+        policy: TBackpressurePolicy,
+        key: TConflateKey | None,
+    ) -> None:
+        # 溜まっているchangeはキューに入った時刻ごと新しいpolicyで入れ直す
+        tracking = self._times is not None
+        items = [self._get() for _ in range(self.qsize())]
+        times = self.take_times() if tracking else repeat(None)
+        self._limit = maxsize
+        self._policy = policy
+        self._key = key or default_conflate_key
+        self._init(0)
+        if tracking:
+            self._times = deque()
+        for item, enqueued in zip(items, times):
+            self._enqueue(item, enqueued)
+
+    def track_times(self, enabled: bool) -> None:
+        """changeがキューに入った時刻を記録するかを設定する。
+
+        有効化した時点で溜まっているchangeは、その時点でキューに入ったものとみなす。
+        """
+        if not enabled:
+            self._times = None
+            self._got_times = []
+        elif self._times is None:
+            self._times = deque(repeat(time.perf_counter(), len(self._queue)))
+
+    def take_times(self) -> list[float]:
+        """前回以降に取り出したchangeがキューに入った時刻（取り出した順）"""
+        times, self._got_times = self._got_times, []
+        return times
+
+
+class BackpressureStoreStream(StoreStream):
+    """上限とpolicy（unbounded・drop_oldest・conflate）を持つStoreStream。
+
+    watchしている側の処理が追いつかない時に、キューが際限なく伸びないようにする。
+    デフォルト（maxsize=None・unbounded）はpybottersのStoreStreamと同じく上限なし。
+    キューの深さなどの計測値はget_statsで取れる。
+    """
+
+    def __init__(
+        self,
+        store: DataStore,
+        maxsize: int | None = None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ):
+        self._check(maxsize, policy)
+        self._queue = _BackpressureQueue(maxsize, policy, key)
+        store._queues.append(self._queue)
+        self._store = store
+
+    def set_backpressure(
+        self,
+        maxsize: int | None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ) -> BackpressureStoreStream:
+        """上限とpolicyを変更する（溜まっているchangeにも適用する）"""
+        self._check(maxsize, policy)
+        self._queue.configure(maxsize, policy, key)
+        return self
+
+    def get_stats(self) -> dict:
+        queue = self._queue
+        return {
+            "policy": queue._policy,
+            "maxsize": queue._limit,
+            "depth": queue.qsize(),
+            "max_depth": queue.max_depth,
+            "dropped": queue.dropped,
+            "conflated": queue.conflated,
+            "overflows": queue.overflows,
+        }
+
+    @staticmethod
+    def _check(maxsize: int | None, policy: TBackpressurePolicy) -> None:
+        if policy not in ("unbounded", "drop_oldest", "conflate"):
+            raise ValueError(f"Unsupported policy: {policy}")
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError(f"maxsize must be positive: {maxsize}")
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Hashable
+
+from pybotters.store import DataStore, Item
+
+
+class BoundedDataStore(DataStore):
+    """挿入順のリングバッファで件数を制限するDataStore。
+
+    ``max_len``（全体）・``max_len_per_symbol``（symbolごと）を超えた分は古いものから一件ずつ
+    取り除く。pybottersの``_sweep_*``のように毎回辞書の先頭から走査しないため、eviction
+    はならしO(1)で済む。いずれも未設定の場合は通常のDataStoreと同じ振る舞いをする。
+    evictionはwatch/waitには通知しない（pybottersのsweepと同様）。
+    """
+
+    def __init__(
+        self,
+        name: str | None = None,
+        keys: list[str] | None = None,
+        data: list[Item] | None = None,
+        *,
+        auto_cast: bool = False,
+        max_len: int | None = None,
+        max_len_per_symbol: int | None = None,
+    ):
+        self._max_len: int | None = None
+        self._max_len_per_symbol: int | None = None
+        self._order: deque[uuid.UUID] = deque()
+        self._symbol_orders: dict[Hashable, deque[uuid.UUID]] = {}
+        self._symbol_counts: dict[Hashable, int] = {}
+        super(BoundedDataStore, self).__init__(name, keys, data, auto_cast=auto_cast)
+        self.set_max_len(max_len, max_len_per_symbol)
+
+    def set_max_len(
+        self, max_len: int | None, max_len_per_symbol: int | None = None
+    ) -> None:
+        assert max_len is None or max_len > 0
+        assert max_len_per_symbol is None or max_len_per_symbol > 0
+        self._max_len = max_len
+        self._max_len_per_symbol = max_len_per_symbol
+        self._order.clear()
+        self._symbol_orders.clear()
+        self._symbol_counts.clear()
+        if self.bounded:
+            self._track(list(self._data))
+
+    @property
+    def bounded(self) -> bool:
+        return self._max_len is not None or self._max_len_per_symbol is not None
+
+    def _insert(self, data: list[Item]) -> None:
+        if not self.bounded:
+            return super()._insert(data)
+        n = len(self._data)
+        super()._insert(data)
+        self._track_new(len(self._data) - n)
+
+    def _update(self, data: list[Item]) -> None:
+        if not self.bounded:
+            return super()._update(data)
+        n = len(self._data)
+        super()._update(data)
+        self._track_new(len(self._data) - n)
+
+    def _replace(self, items: dict[uuid.UUID, Item]) -> None:
+        """uuidを指定してアイテムを置き換える（キーのないストアで特定のアイテムを更新する）。
+
+        格納済みのuuidは同じ位置で置き換えて"update"、未知のuuidは末尾に追加して"insert"として
+        通知する。
+        """
+        new = []
+        for _id, item in items.items():
+            if _id in self._data:
+                self._data[_id] = item
+                self._put("update", None, item)
+            else:
+                self._data[_id] = item
+                self._put("insert", None, item)
+                new.append(_id)
+        if new and self.bounded:
+            self._track(new)
+        self._set(list(items.values()))
+
+    def _clear(self) -> None:
+        super()._clear()
+        self._order.clear()
+        self._symbol_orders.clear()
+        self._symbol_counts.clear()
+
+    def _put(self, operation: str, source: Item | None, item: Item) -> None:
+        super()._put(operation, source, item)
+        if operation == "delete" and self._max_len_per_symbol is not None:
+            self._symbol_counts[item.get("symbol")] -= 1
+
+    def _sweep_with_key(self) -> None:
+        if not self.bounded:
+            super()._sweep_with_key()
+
+    def _sweep_without_key(self) -> None:
+        if not self.bounded:
+            super()._sweep_without_key()
+
+    def _track_new(self, n: int) -> None:
+        # sweepを止めているので、増えた分は_dataの末尾n件がそのまま新規アイテム
+        if n > 0:
+            self._track(list(islice(reversed(self._data), n))[::-1])
+
+    def _track(self, uuids: list[uuid.UUID]) -> None:
+        for _id in uuids:
+            self._order.append(_id)
+            if self._max_len_per_symbol is not None:
+                symbol = self._data[_id].get("symbol")
+                self._symbol_orders.setdefault(symbol, deque()).append(_id)
+                self._symbol_counts[symbol] = self._symbol_counts.get(symbol, 0) + 1
+                self._evict_symbol(symbol)
+
+        if self._max_len is not None:
+            while len(self._data) > self._max_len:
+                _id = self._order.popleft()
+                if _id in self._data:
+                    self._evict(_id)
+
+        # 削除済みのuuidが溜まり続けないよう適宜詰める
+        if len(self._order) > 2 * len(self._data) + 64:
+            self._order = deque(_id for _id in self._order if _id in self._data)
+
+    def _evict_symbol(self, symbol: Hashable) -> None:
+        assert self._max_len_per_symbol is not None
+        order = self._symbol_orders[symbol]
+        while self._symbol_counts[symbol] > self._max_len_per_symbol:
+            _id = order.popleft()
+            if _id in self._data:
+                self._evict(_id)
+        if len(order) > 2 * self._symbol_counts[symbol] + 64:
+            self._symbol_orders[symbol] = deque(
+                _id for _id in order if _id in self._data
+            )
+
+    def _evict(self, _id: uuid.UUID) -> None:
+        item = self._data.pop(_id)
+        if self._keys:
+            keyhash = self._hash({k: item[k] for k in self._keys})
+            del self._index[keyhash]
+        if self._max_len_per_symbol is not None:
+            self._symbol_counts[item.get("symbol")] -= 1
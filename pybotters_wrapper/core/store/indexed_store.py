@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import uuid
+from itertools import islice
+from typing import Hashable
+
+from pybotters.store import Item
+
+from .bounded_store import BoundedDataStore
+
+_MISSING = object()
+
+
+class IndexedDataStore(BoundedDataStore):
+    """``indexes``で宣言したフィールドのセカンダリインデックスを持つDataStore。
+
+    インデックスはinsert/update/delete（とsweep・eviction）に合わせて更新され、
+    インデックス対象のフィールドを含むqueryでの``find``は全件走査ではなく該当アイテムのみを
+    走査する。キーのないストアではインデックスを持たない（全件走査になる）。
+    """
+
+    def __init__(
+        self,
+        name: str | None = None,
+        keys: list[str] | None = None,
+        data: list[Item] | None = None,
+        *,
+        auto_cast: bool = False,
+        indexes: list[str] | None = None,
+        max_len: int | None = None,
+        max_len_per_symbol: int | None = None,
+    ):
+        # field -> value -> keyhashの（順序付き）集合
+        self._indexes: dict[str, dict[Hashable, dict[int, None]]] = (
+            {f: {} for f in indexes} if indexes and keys else {}
+        )
+        # keyhash -> インデックス済みの値
+        self._indexed_values: dict[int, tuple] = {}
+        super(IndexedDataStore, self).__init__(
+            name,
+            keys,
+            data,
+            auto_cast=auto_cast,
+            max_len=max_len,
+            max_len_per_symbol=max_len_per_symbol,
+        )
+
+    def find(self, query: Item | None = None) -> list[Item]:
+        if query and self._indexes:
+            bucket = None
+            try:
+                for f, index in self._indexes.items():
+                    if f in query:
+                        b = index.get(query[f])
+                        if b is None:
+                            return []
+                        if bucket is None or len(b) < len(bucket):
+                            bucket = b
+            except TypeError:
+                # unhashableな値でのqueryは全件走査する
+                bucket = None
+            if bucket is not None:
+                data, keyindex = self._data, self._index
+                return [
+                    item
+                    for item in (data[keyindex[h]] for h in bucket)
+                    if all(k in item and query[k] == item[k] for k in query)
+                ]
+        return super().find(query)
+
+    def _put(self, operation: str, source: Item | None, item: Item) -> None:
+        super()._put(operation, source, item)
+        if self._indexes:
+            try:
+                keyhash = self._hash({k: item[k] for k in self._keys})
+            except KeyError:
+                return
+            if operation == "delete":
+                self._unindex(keyhash)
+            else:
+                self._reindex(keyhash, item)
+
+    def _clear(self) -> None:
+        super()._clear()
+        for index in self._indexes.values():
+            index.clear()
+        self._indexed_values.clear()
+
+    def _pop(self, item: Item) -> Item | None:
+        ret = super()._pop(item)
+        if ret is not None and self._indexes:
+            self._unindex(self._hash({k: ret[k] for k in self._keys}))
+        return ret
+
+    def _sweep_with_key(self) -> None:
+        if self._indexes and not self.bounded and len(self._data) > self._MAXLEN:
+            # pybottersのsweepと同じく_indexの先頭から消えるものをインデックスからも除く
+            for keyhash in islice(self._index, len(self._data) - self._MAXLEN):
+                self._unindex(keyhash)
+        super()._sweep_with_key()
+
+    def _evict(self, _id: uuid.UUID) -> None:
+        item = self._data[_id]
+        super()._evict(_id)
+        if self._indexes:
+            self._unindex(self._hash({k: item[k] for k in self._keys}))
+
+    def _reindex(self, keyhash: int, item: Item) -> None:
+        values = tuple(item.get(f, _MISSING) for f in self._indexes)
+        old = self._indexed_values.get(keyhash)
+        if old == values:
+            return
+        for i, (f, index) in enumerate(self._indexes.items()):
+            v = values[i]
+            ov = _MISSING if old is None else old[i]
+            if v == ov:
+                continue
+            if ov is not _MISSING:
+                self._discard(index, ov, keyhash)
+            if v is not _MISSING:
+                index.setdefault(v, {})[keyhash] = None
+        self._indexed_values[keyhash] = values
+
+    def _unindex(self, keyhash: int) -> None:
+        old = self._indexed_values.pop(keyhash, None)
+        if old is not None:
+            for (f, index), v in zip(self._indexes.items(), old):
+                if v is not _MISSING:
+                    self._discard(index, v, keyhash)
+
+    @staticmethod
+    def _discard(
+        index: dict[Hashable, dict[int, None]], value: Hashable, keyhash: int
+    ) -> None:
+        bucket = index.get(value)
+        if bucket is not None:
+            bucket.pop(keyhash, None)
+            if not bucket:
+                del index[value]
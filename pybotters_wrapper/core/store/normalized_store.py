@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import time
 import uuid
 from typing import (
     Any,
@@ -9,6 +10,7 @@ from typing import (
     Hashable,
     Iterator,
     Literal,
+    Mapping,
     Type,
     TypedDict,
     TypeVar,
@@ -24,53 +26,174 @@ from pybotters.store import (
     StoreStream,
 )
 
+from .backpressure_stream import (
+    BackpressureStoreStream,
+    TBackpressurePolicy,
+    TConflateKey,
+)
+from .indexed_store import IndexedDataStore
+from .normalized_store_stats import NormalizedStoreStats
+
 TNormalizedItem = TypeVar("TNormalizedItem", bound=TypedDict)  # type: ignore
+TMapperFn = Callable[[DataStore, str, dict, dict], Any]
+TMapper = Union[dict[str, str | TMapperFn], TMapperFn]
+TInfoMode = Literal["full", "none", "lazy"]
+
+
+def compile_mapper(mapper: TMapper) -> TMapperFn:
+    """mapperを(store, operation, source, data)を受け取る一つの関数にコンパイルする。
+
+    dict mapperの場合、フィールドごとのループ・型判定・``**values``による再構築を毎回
+    行わないよう、全フィールドを一つのdictリテラルで返す関数を生成する。
+    """
+    if callable(mapper):
+        return mapper
+    elif not isinstance(mapper, dict):
+        raise TypeError(f"Unsupported mapper: {mapper}")
+
+    namespace: dict[str, Any] = {}
+    fields = []
+    for i, (k, value_or_fn) in enumerate(mapper.items()):
+        if isinstance(value_or_fn, str):
+            namespace[f"_c{i}"] = value_or_fn
+            fields.append(f"{k!r}: _c{i}")
+        elif callable(value_or_fn):
+            namespace[f"_f{i}"] = value_or_fn
+            fields.append(f"{k!r}: _f{i}(store, operation, source, data)")
+        else:
+            raise TypeError(f"Unsupported dict mapper: {mapper}")
+
+    # TypedDictの呼び出しはdictを返すだけなのでdictリテラルで等価
+    code = (
+        "def _normalize(store, operation, source, data):\n"
+        f"    return {{{', '.join(fields)}}}\n"
+    )
+    exec(code, namespace)
+    return namespace["_normalize"]
+
+
+class LazyInfo(Mapping):
+    """``info_mode="lazy"``時に正規化アイテムへ付帯させる"info"。
+
+    元ストアのキーだけを保持し、``info["data"]``が参照された時点で元ストアから元アイテムを
+    引く。元アイテムが削除済みの場合はNoneを返す。キーのない元ストア（約定など）では元アイテムを
+    引けないので、``info["data"]``は常にNoneになる。
+
+    保持するのは元ストアへの参照とキーのみで変更されないので、copy・deepcopy（watchのchange
+    など）は同じインスタンスを返す（元ストアごとコピーしない）。
+    """
+
+    __slots__ = ("_store", "_key")
+
+    def __init__(self, store: DataStore | None, data: Item):
+        self._store = store
+        self._key: tuple | None = None
+        if store is not None and store._keys:
+            try:
+                self._key = tuple(data[k] for k in store._keys)
+            except KeyError:
+                pass
+
+    def __getitem__(self, key: str) -> Item | None:
+        if key == "data":
+            if self._store is None or self._key is None:
+                return None
+            return self._store.get(dict(zip(self._store._keys, self._key)))
+        elif key == "source":
+            return None
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("data", "source"))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._key})"
+
+    def __copy__(self) -> LazyInfo:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> LazyInfo:
+        return self
 
 
 class NormalizedDataStore(Generic[TNormalizedItem]):
     _BASE_STORE_NAME: str | None = None
     _NAME: str | None = None
     _KEYS: list[str] | None = []
+    # findを高速化するセカンダリインデックス
+    _INDEXES: list[str] = ["symbol"]
     _NORMALIZED_ITEM_CLASS: Type[TNormalizedItem] | None = None
+    # 正規化したアイテムを格納するDataStore
+    _NORMALIZED_STORE_CLASS: Type[IndexedDataStore] = IndexedDataStore
 
     def __init__(
         self,
         store: DataStore | None,
         *,
-        mapper: Union[
-            dict[str, str | Callable[[DataStore, str, dict, dict], Any]],
-            Callable[[DataStore, str, dict, dict], Any],
-            None,
-        ] = None,
+        mapper: TMapper | None = None,
         name: str | None = None,
         keys: list[str] | None = None,
+        indexes: list[str] | None = None,
         data: list[Item] | None = None,
         auto_cast: bool = False,
         target_operations: tuple[Literal["insert", "update", "delete"], ...]
         | None = None,
         on_wait: Callable[[NormalizedDataStore], None] | None = None,
         on_msg: Callable[[NormalizedDataStore, Item], None] | None = None,
+        msg_filter: Callable[[Item], bool] | None = None,
+        msg_keys: tuple[Hashable, ...] | None = None,
         on_watch_get_operation: Callable[[StoreChange], str | None] | None = None,
         on_watch_make_item: Callable[[TNormalizedItem, StoreChange], dict]
         | None = None,
-        max_len: int = 99999,
+        max_len: int | None = None,
+        max_len_per_symbol: int | None = None,
+        info_mode: TInfoMode = "full",
+        batch: bool = False,
+        stats: bool = False,
     ):
         # 参照元のデータストア
         self._base_store: DataStore = store
         # 正規化したデータストア
-        self._normalized_store: DataStore = DataStore(
+        self._normalized_store: IndexedDataStore = self._NORMALIZED_STORE_CLASS(
             name or self._NAME or self._base_store.name,
             keys or self._KEYS,
             data or [],
             auto_cast=auto_cast,
+            indexes=self._INDEXES if indexes is None else indexes,
+            max_len=max_len,
+            max_len_per_symbol=max_len_per_symbol,
         )
 
-        # self._base_store._MAXLEN = max_len
-        # self._normalized_store._MAXLEN = max_len
-
         self._mapper = mapper
+        # mapperは構築時に一度だけコンパイルしておく
+        self._normalize_fn: TMapperFn | None = (
+            None if mapper is None else compile_mapper(mapper)
+        )
         self._target_operations = target_operations or ("insert", "update", "delete")
-
+        self._info_mode: TInfoMode = "full"
+        self.set_info_mode(info_mode)
+        self._batch = batch
+
+        # inlineモード時に元ストアの_putから受け取ったchange
+        self._inline = False
+        self._inline_hooked = False
+        self._pending: list[StoreChange] = []
+        # 計測有効時、_pendingのchangeが元ストアで変更された時刻
+        self._pending_times: list[float] = []
+
+        # 計測（無効時はNone）
+        self._stats: NormalizedStoreStats | None = None
+        self._stream: BackpressureStoreStream | None = None
+        self.set_stats(stats)
+        # watchのキューの上限とpolicy（set_watch_backpressure）
+        self._watch_backpressure: tuple[
+            int | None, TBackpressurePolicy, TConflateKey | None
+        ] = (None, "unbounded", None)
+
+        self._started = False
         self._wait_task: asyncio.Task | None = None
         self._watch_task: asyncio.Task | None = None
         self._queue_task: asyncio.Task | None = None
@@ -78,19 +201,26 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
 
         self._on_wait_fn = on_wait
         self._on_msg_fn = on_msg
+        self._msg_filter = msg_filter
+        # on_msgが受け取るmessageのキー（WebSocketChannels.get_message_key）。Noneは全て
+        self._msg_keys = msg_keys
         self._on_watch_get_operation = on_watch_get_operation
         self._on_watch_make_item = on_watch_make_item
 
     def start(self) -> NormalizedDataStore:
-        """元ストアとの同期を開始する"""
+        """元ストアとの同期を開始する
+
+        waitやwebsocket messageを受け取るタスク・キューはハンドラが登録されている場合のみ作る。
+        """
         if self._base_store is not None:
-            self._wait_task = asyncio.create_task(self._wait_store())
-            self._watch_task = asyncio.create_task(self._watch_store())
-        else:
-            self._wait_task = None
-            self._watch_task = None
-        self._queue = pybotters.WebSocketQueue()
-        self._queue_task = asyncio.create_task(self._wait_msg())
+            if self.handles_wait:
+                self._wait_task = asyncio.create_task(self._wait_store())
+            if not self._inline:
+                self._watch_task = asyncio.create_task(self._watch_store())
+        if self.handles_msg:
+            self._queue = pybotters.WebSocketQueue()
+            self._queue_task = asyncio.create_task(self._wait_msg())
+        self._started = True
         return self
 
     async def close(self) -> None:
@@ -115,20 +245,200 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
             except asyncio.CancelledError:
                 ...
 
+    def stop(self) -> None:
+        """元ストアとの同期を止める（タスクのキャンセルを待たない版のclose）"""
+        self._inline = False
+        self._pending = []
+        self._pending_times = []
+        for task in (self._wait_task, self._watch_task, self._queue_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+    def set_info_mode(self, info_mode: TInfoMode) -> None:
+        """正規化アイテムに付帯させる"info"の持ち方を設定する。
+
+        - full: 元アイテム（deep copy）とsourceをそのまま保持する（デフォルト）
+        - none: "info"を付帯させない
+        - lazy: 元ストアのキーのみ保持し、参照時に元ストアから元アイテムを引く（キーのない
+          元ストアでは"data"は常にNone）
+        """
+        if info_mode not in ("full", "none", "lazy"):
+            raise ValueError(f"Unsupported info_mode: {info_mode}")
+        self._info_mode = info_mode
+
+    def set_max_len(
+        self, max_len: int | None, max_len_per_symbol: int | None = None
+    ) -> None:
+        """保持する件数の上限（全体・symbolごと）を設定する。
+
+        上限を超えた分は挿入順に古いものからリングバッファ式に取り除く。どちらもNoneの場合は
+        pybottersのDataStoreのデフォルト（_MAXLENでのsweep）に従う。
+        """
+        self._normalized_store.set_max_len(max_len, max_len_per_symbol)
+
+    def set_batch(self, batch: bool) -> None:
+        """watch経由の更新をまとめて適用するかを設定する。
+
+        有効時は、StoreStreamに溜まっているchangeを全て取り出し、連続する同一オペレーション
+        ごとに一度の_insert/_update/_deleteで適用する。waitしている側へは一バッチにつき一度だけ
+        通知する。
+        """
+        self._batch = batch
+
+    def set_stats(self, enabled: bool, max_samples: int = 10000) -> None:
+        """計測（changeの件数・watchのキューの深さ・正規化のlag）の有効・無効を設定する。
+
+        無効時の計測コストはchangeの適用ごとのNoneチェックのみ。有効化し直すと計測値は
+        リセットされる。lagはchangeがキューに入った時刻から測る。
+        """
+        self._stats = NormalizedStoreStats(max_samples) if enabled else None
+        if enabled:
+            now = time.perf_counter()
+            self._pending_times = [now] * len(self._pending)
+        else:
+            self._pending_times = []
+        if self._stream is not None:
+            self._stream._queue.track_times(enabled)
+
+    def get_stats(self) -> dict | None:
+        """計測値。計測が無効の場合はNone
+
+        queue_depthは取得時点で未処理のchange数（watchのStoreStream、inlineモードでは
+        flush待ちのchange）。
+        """
+        if self._stats is None:
+            return None
+        if self._inline:
+            queue_depth = len(self._pending)
+        elif self._stream is not None:
+            queue_depth = self._stream._queue.qsize()
+        else:
+            queue_depth = 0
+        return self._stats.to_dict(queue_depth)
+
+    def set_watch_backpressure(
+        self,
+        maxsize: int | None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ) -> None:
+        """元ストアのwatchのキューの上限とpolicyを設定する（BackpressureStoreStream）。
+
+        drop_oldestは正規化ストアの内容が元ストアとずれることがあるので、板などでは元ストアの
+        キー単位で最新のchangeのみ残すconflateを使う。inlineモードではキューを使わない。
+        """
+        BackpressureStoreStream._check(maxsize, policy)
+        self._watch_backpressure = (maxsize, policy, key)
+        if self._stream is not None:
+            self._stream.set_backpressure(maxsize, policy, key)
+
+    def get_watch_stats(self) -> dict | None:
+        """元ストアのwatchのキューの計測値（BackpressureStoreStream.get_stats）。
+
+        watchしていない場合（inlineモードなど）はNone
+        """
+        return None if self._stream is None else self._stream.get_stats()
+
+    def set_inline(self, inline: bool) -> None:
+        """元ストアの変更をwatch経由ではなく同期的に反映するかを設定する。
+
+        有効時は元ストアの_putをフックしてchangeを（deep copyせずに）溜めておき、flush()で
+        まとめて正規化する。DataStoreWrapper.onmessageは元ストアの更新直後にflush()を呼ぶので、
+        同じイベントループのターン内で正規化ストアまで反映される。なお、"info"の"data"は
+        元ストアのアイテムそのものを参照する。
+        """
+        if self._base_store is None or inline == self._inline:
+            return
+
+        self._inline = inline
+        if inline:
+            if self._watch_task is not None:
+                self._watch_task.cancel()
+                self._watch_task = None
+            if not self._inline_hooked:
+                self._hook_base_store()
+        else:
+            self._pending = []
+            self._pending_times = []
+            if self._started:
+                # start済みであればwatch経由の同期に戻す
+                self._watch_task = asyncio.create_task(self._watch_store())
+
+    def flush(self) -> None:
+        """inlineモードで溜めている元ストアのchangeを反映する"""
+        if not self._pending:
+            return
+        changes, self._pending = self._pending, []
+        enqueued, self._pending_times = self._pending_times, []
+        stats = self._stats
+        if stats is not None:
+            stats.on_receive(len(changes))
+        if self._batch:
+            self._on_watch_batch(changes)
+        else:
+            for change in changes:
+                self._on_watch(change)
+        if stats is not None:
+            stats.on_applied(changes, enqueued)
+        self._on_changes_applied()
+
+    def _hook_base_store(self) -> None:
+        store = self._base_store
+        base_put = store._put
+
+        def _put(operation: str, source: Item | None, item: Item) -> None:
+            base_put(operation, source, item)
+            if self._inline:
+                if not self._pending:
+                    # onmessage以外（REST経由の初期化など）で更新された場合に備える
+                    try:
+                        asyncio.get_running_loop().call_soon(self.flush)
+                    except RuntimeError:
+                        pass
+                self._pending.append(StoreChange(store, operation, source, item))
+                if self._stats is not None:
+                    self._pending_times.append(time.perf_counter())
+
+        # 同じ元ストアを参照する正規化ストアが複数ある場合はフックが連なる
+        store._put = _put  # type: ignore
+        self._inline_hooked = True
+
     def synchronize(self) -> None:
         """元ストアと強制同期する"""
         self._clear()
         items = []
         for i in self._base_store.find():
-            item = {
-                **self._normalize(self._base_store, "insert", {}, i),
-                "info": {"data": i, "source": {}},
-            }
+            item = self._attach_info(
+                self._normalize(self._base_store, "insert", {}, i), i, {}
+            )
             items.append(item)
         self._insert(items)
+        self._on_changes_applied()
+
+    def invalidate(self) -> None:
+        """元ストアと正規化ストアを空にする。
+
+        websocketの切断などで内容が古くなった（以降の差分を受け取れない）ストアを、再接続後の
+        snapshotなどで埋め直されるまで参照されないようにする。RESTのsnapshotで初期化する
+        元ストア（pybottersの板のinitialized）は未初期化に戻す。
+        """
+        if self._base_store is not None:
+            self._base_store._clear()
+            if getattr(self._base_store, "initialized", False):
+                self._base_store.initialized = False
+        # まだ反映していないchangeは空にする前の内容なので捨てる
+        self._pending = []
+        self._pending_times = []
+        if self._stream is not None:
+            self._drain(self._stream)
+            self._stream._queue.take_times()
+        self._clear()
+        self._on_changes_applied()
 
     def _onmessage(self, msg: "Item", ws: "ClientWebSocketResponse") -> None:
-        if self._queue is not None:
+        if self._queue is not None and (
+            self._msg_filter is None or self._msg_filter(msg)
+        ):
             self._queue.onmessage(msg, ws)
 
     async def _wait_store(self) -> None:
@@ -144,15 +454,49 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
         if self._queue is not None:
             async for msg in self._queue.iter_msg():
                 self._on_msg(msg)
+                self._on_changes_applied()
 
     def _on_msg(self, msg: "Item") -> None:
         if self._on_msg_fn is not None:
             self._on_msg_fn(self, msg)
 
     async def _watch_store(self) -> None:
-        with self._base_store.watch() as stream:
-            async for change in stream:
-                self._on_watch(change)
+        with BackpressureStoreStream(
+            self._base_store, *self._watch_backpressure
+        ) as stream:
+            self._stream = stream
+            queue = stream._queue
+            queue.track_times(self._stats is not None)
+            try:
+                async for change in stream:
+                    stats = self._stats
+                    if stats is not None:
+                        stats.on_receive(queue.qsize() + 1)
+                    if self._batch:
+                        changes = [change, *self._drain(stream)]
+                        self._on_watch_batch(changes)
+                    else:
+                        changes = None
+                        self._on_watch(change)
+                    if stats is not None:
+                        stats.on_applied(changes or (change,), queue.take_times())
+                    if queue.empty():
+                        self._on_changes_applied()
+            finally:
+                self._stream = None
+
+    @staticmethod
+    def _drain(stream: StoreStream) -> list[StoreChange]:
+        # 待たずに取り出せるchangeを全て取り出す
+        queue = stream._queue
+        changes = []
+        while not queue.empty():
+            changes.append(queue.get_nowait())
+        return changes
+
+    def _on_changes_applied(self) -> None:
+        """溜まっていたchange（またはwebsocket message）を適用し終えた時に呼ばれるフック"""
+        ...
 
     def _on_watch(self, change: "StoreChange") -> None:
         op = self._get_operation(change)
@@ -166,24 +510,41 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
             op_fn = getattr(self, "_" + op)
             op_fn([item])
 
+    def _on_watch_batch(self, changes: list[StoreChange]) -> None:
+        # 適用順を保つため、連続する同一オペレーションをひとまとめにする
+        groups: list[tuple[str, list[Item]]] = []
+        for change in changes:
+            op = self._get_operation(change)
+            if op is None:
+                continue
+            normalized_data = self._normalize(
+                change.store, change.operation, change.source, change.data
+            )
+            item = self._make_item(normalized_data, change)
+            self._check_operation(op)
+            if groups and groups[-1][0] == op:
+                groups[-1][1].append(item)
+            else:
+                groups.append((op, [item]))
+
+        if len(groups) == 0:
+            return
+
+        # グループごとの_setによる通知を抑止し、バッチ全体で一度だけ通知する
+        store = self._normalized_store
+        events, store._events = store._events, {}
+        try:
+            for op, items in groups:
+                getattr(self, "_" + op)(items)
+        finally:
+            store._events = events
+        store._set([item for _, items in groups for item in items])
+
     def _normalize(
         self, store: DataStore, operation: str, source: dict, data: dict
     ) -> TNormalizedItem:
-        assert self._mapper is not None
-        if callable(self._mapper):
-            return self._mapper(store, operation, source, data)
-        elif isinstance(self._mapper, dict):
-            values = {}
-            for k, value_or_fn in self._mapper.items():
-                if isinstance(value_or_fn, str):
-                    values[k] = value_or_fn
-                elif callable(value_or_fn):
-                    values[k] = value_or_fn(store, operation, source, data)
-                else:
-                    raise TypeError(f"Unsupported dict mapper: {self._mapper}")
-            return self._itemize(**values)
-        else:
-            raise TypeError(f"Unsupported mapper: {self._mapper}")
+        assert self._normalize_fn is not None
+        return self._normalize_fn(store, operation, source, data)
 
     def _itemize(self, *args, **kwargs) -> "TNormalizedItem":
         assert self._NORMALIZED_ITEM_CLASS is not None
@@ -201,10 +562,23 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
         if self._on_watch_make_item is not None:
             return self._on_watch_make_item(normalized_item, change)
         else:
+            return self._attach_info(normalized_item, change.data, change.source)
+
+    def _attach_info(
+        self, normalized_item: TNormalizedItem, data: Item, source: Item | None
+    ) -> Item:
+        if self._info_mode == "full":
             return {
                 **normalized_item,  # type: ignore
-                "info": {"data": change.data, "source": change.source},
+                "info": {"data": data, "source": source},
             }
+        elif self._info_mode == "lazy":
+            return {
+                **normalized_item,  # type: ignore
+                "info": LazyInfo(self._base_store, data),
+            }
+        else:
+            return normalized_item  # type: ignore
 
     def _check_operation(self, operation: str):
         if operation not in self._target_operations:
@@ -213,6 +587,50 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
             )
 
     # ラップメソッド
+    @property
+    def handles_msg(self) -> bool:
+        """websocket messageを受け取るハンドラ（on_msg）があるか"""
+        return (
+            self._on_msg_fn is not None
+            or type(self)._on_msg is not NormalizedDataStore._on_msg
+        )
+
+    @property
+    def handles_wait(self) -> bool:
+        """元ストアのwaitを受け取るハンドラ（on_wait）があるか"""
+        return (
+            self._on_wait_fn is not None
+            or type(self)._on_wait is not NormalizedDataStore._on_wait
+        )
+
+    @property
+    def msg_keys(self) -> tuple[Hashable, ...] | None:
+        return self._msg_keys
+
+    @property
+    def info_mode(self) -> TInfoMode:
+        return self._info_mode
+
+    @property
+    def max_len(self) -> int | None:
+        return self._normalized_store._max_len
+
+    @property
+    def max_len_per_symbol(self) -> int | None:
+        return self._normalized_store._max_len_per_symbol
+
+    @property
+    def batch(self) -> bool:
+        return self._batch
+
+    @property
+    def inline(self) -> bool:
+        return self._inline
+
+    @property
+    def stats(self) -> NormalizedStoreStats | None:
+        return self._stats
+
     def __repr__(self):
         return (
             f"{self.__class__.__name__}"
@@ -249,6 +667,9 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
     def _remove(self, uuids: list[uuid.UUID]) -> None:
         return self._normalized_store._remove(uuids)
 
+    def _replace(self, items: dict[uuid.UUID, Item]) -> None:
+        return self._normalized_store._replace(items)
+
     def _clear(self) -> None:
         return self._normalized_store._clear()
 
@@ -282,5 +703,11 @@ class NormalizedDataStore(Generic[TNormalizedItem]):
     def _put(self, operation: str, source: Item | None, item: Item) -> None:
         return self._normalized_store._put(operation, source, item)
 
-    def watch(self) -> "StoreStream":
-        return self._normalized_store.watch()
+    def watch(
+        self,
+        maxsize: int | None = None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ) -> BackpressureStoreStream:
+        """正規化ストアのwatch。上限とpolicyを指定できる（デフォルトは上限なし）"""
+        return BackpressureStoreStream(self._normalized_store, maxsize, policy, key)
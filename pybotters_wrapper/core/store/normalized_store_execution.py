@@ -5,4 +5,5 @@ from .normalized_store import NormalizedDataStore
 class ExecutionStore(NormalizedDataStore[ExecutionItem]):
     _NAME = "execution"
     _KEYS = ["id"]
+    _INDEXES = ["symbol", "id"]
     _NORMALIZED_ITEM_CLASS = ExecutionItem
@@ -5,4 +5,5 @@ from .normalized_store import NormalizedDataStore
 class OrderStore(NormalizedDataStore[OrderItem]):
     _NAME = "order"
     _KEYS = ["id", "symbol"]
+    _INDEXES = ["symbol", "id"]
     _NORMALIZED_ITEM_CLASS = OrderItem
@@ -1,21 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+from itertools import islice
+from typing import Any, Iterator, NamedTuple
+
+import numpy as np
 from pybotters.typedefs import Item
 
 from ..typedefs import OrderbookItem, TSide
+from .backpressure_stream import TBackpressurePolicy, TConflateKey
 from .normalized_store import NormalizedDataStore
+from .price_level_store import PriceLevelDataStore, PriceLevels, SymbolStoreStream
+
+
+def _price(item: Item) -> float:
+    return item["price"]
+
+
+class DepthSide(NamedTuple):
+    price: np.ndarray  # float64
+    size: np.ndarray  # float64
+    cumsize: np.ndarray | None  # float64（cumulative=Trueの場合のみ）
+
+
+class OrderbookDepth(NamedTuple):
+    asks: DepthSide
+    bids: DepthSide
+
+
+_SIDE_CODES = {"BUY": 1, "SELL": -1}
+
+
+class OrderbookDelta(NamedTuple):
+    """一度の更新（websocket message）による一つのsymbolの板の差分"""
+
+    symbol: str
+    local_seq: int  # このストアがsymbolごとに振る連番（取引所のシーケンス番号ではない）
+    side: np.ndarray  # int8（BUY=1, SELL=-1）
+    price: np.ndarray  # float64
+    size: np.ndarray  # float64（更新後のサイズ。0は削除）
+
+
+class OrderbookDeltaStream:
+    """OrderbookStore.watch_deltaが返すストリーム（StoreStreamと同じ使い方）"""
+
+    def __init__(self, queues: list[asyncio.Queue[OrderbookDelta]]):
+        self._queue: asyncio.Queue[OrderbookDelta] = asyncio.Queue()
+        self._queues = queues
+        self._queues.append(self._queue)
+
+    async def get(self) -> OrderbookDelta:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._queues.remove(self._queue)
+
+    def __enter__(self) -> OrderbookDeltaStream:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __aiter__(self) -> OrderbookDeltaStream:
+        return self
+
+    async def __anext__(self) -> OrderbookDelta:
+        return await self.get()
 
 
 class OrderbookStore(NormalizedDataStore[OrderbookItem]):
     _NAME = "orderbook"
     _KEYS = ["symbol", "side", "price"]
     _NORMALIZED_ITEM_CLASS = OrderbookItem
+    # symbol・sideごとに価格順の板を差分更新で保持する
+    _NORMALIZED_STORE_CLASS = PriceLevelDataStore
 
-    def sorted(self, query: Item = None) -> dict[TSide, list[OrderbookItem]]:
+    def __init__(self, *args, **kwargs):
+        super(OrderbookStore, self).__init__(*args, **kwargs)
+        # (symbol, n, cumulative) -> depthの書き込み先（確保したバッファのn件分のビュー）
+        self._depth_buffers: dict[tuple[str, int, bool], OrderbookDepth] = {}
+        # 差分フィード（watch_delta）の購読者と配信前の差分（symbol -> (side, price) -> size）
+        self._delta_queues: list[asyncio.Queue[OrderbookDelta]] = []
+        self._symbol_delta_queues: dict[str, list[asyncio.Queue[OrderbookDelta]]] = {}
+        self._delta_pending: dict[str, dict[tuple[str, float], float]] = {}
+        self._delta_local_seqs: dict[str, int] = {}
+        # symbol -> SymbolOrderbook
+        self._books: dict[str, SymbolOrderbook] = {}
+
+    def __getitem__(self, symbol: str) -> SymbolOrderbook:
+        """symbolごとの板（そのsymbolのみを参照・watch・waitするビュー）"""
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = SymbolOrderbook(self, symbol)
+        return book
+
+    @property
+    def symbols(self) -> list[str]:
+        """板が存在するsymbol"""
+        return list(self._normalized_store._levels)  # type: ignore
+
+    def watch_delta(self) -> OrderbookDeltaStream:
+        """板の差分フィード。
+
+        watchのようにレベルごとのStoreChange（deep copy・"info"付き）ではなく、一度の更新
+        （websocket message。watch経由の場合はその時点で溜まっていたchange）ごと・symbolごとに、
+        更新された(side, price, 更新後のsize)を配列にまとめたOrderbookDeltaを一つ配信する。
+        同じ価格が一度の更新で複数回変わった場合は最後のサイズのみを含む。
+        """
+        return OrderbookDeltaStream(self._delta_queues)
+
+    def sorted(
+        self, query: Item = None, limit: int | None = None
+    ) -> dict[TSide, list[OrderbookItem]]:
+        """価格順に並べた板（SELLは昇順、BUYは降順）。
+
+        板は常にソート済みで保持しているので、全体を並べ直すことはない。limitを指定した場合は
+        各sideの上位limit件のみを返す。symbolを指定しない場合はsymbolごとの板をマージするので、
+        異なるsymbolの同じ価格のアイテムはsymbolの登録順に並ぶ。
+        """
         if query is None:
             query = {}
+        store: PriceLevelDataStore = self._normalized_store  # type: ignore
+        if "symbol" in query:
+            books = [store._levels.get(query["symbol"], {})]
+        else:
+            books = list(store._levels.values())
+        rest = {k: v for k, v in query.items() if k not in ("symbol", "side")}
+
         result: dict[TSide, list[Item]] = {"SELL": [], "BUY": []}
-        for item in self:
-            if all(k in item and query[k] == item[k] for k in query):
-                result[item["side"]].append(item)
-        result["SELL"].sort(key=lambda x: x["price"])
-        result["BUY"].sort(key=lambda x: x["price"], reverse=True)
-        return result
+        for side in result:
+            if "side" in query and query["side"] != side:
+                continue
+            reverse = side == "BUY"
+            its = [book[side].iter(reverse) for book in books if side in book]
+            it: Iterator[Item]
+            if len(its) == 0:
+                continue
+            elif len(its) == 1:
+                it = its[0]
+            else:
+                it = heapq.merge(*its, key=_price, reverse=reverse)
+            if rest:
+                it = (i for i in it if all(k in i and rest[k] == i[k] for k in rest))
+            result[side] = list(it if limit is None else islice(it, limit))
+        return result  # type: ignore
+
+    def _insert(self, data: list[Item]) -> None:
+        super()._insert(data)
+        if self._delta_queues or self._symbol_delta_queues:
+            self._record_delta(data)
+
+    def _update(self, data: list[Item]) -> None:
+        super()._update(data)
+        if self._delta_queues or self._symbol_delta_queues:
+            self._record_delta(data)
+
+    def _delete(self, data: list[Item]) -> None:
+        super()._delete(data)
+        if self._delta_queues or self._symbol_delta_queues:
+            self._record_delta(data, deleted=True)
+
+    def _clear(self) -> None:
+        if self._delta_queues or self._symbol_delta_queues:
+            self._record_delta(list(self), deleted=True)
+        super()._clear()
+
+    def _record_delta(self, data: list[Item], deleted: bool = False) -> None:
+        pending = self._delta_pending
+        for item in data:
+            try:
+                symbol, key = item["symbol"], (item["side"], item["price"])
+            except KeyError:
+                continue
+            levels = pending.get(symbol)
+            if levels is None:
+                levels = pending[symbol] = {}
+            levels[key] = 0.0 if deleted else item.get("size", 0.0)
+
+    def _on_changes_applied(self) -> None:
+        super()._on_changes_applied()
+        if not self._delta_pending:
+            return
+        pending, self._delta_pending = self._delta_pending, {}
+        for symbol, levels in pending.items():
+            local_seq = self._delta_local_seqs.get(symbol, 0) + 1
+            self._delta_local_seqs[symbol] = local_seq
+            n = len(levels)
+            delta = OrderbookDelta(
+                symbol,
+                local_seq,
+                np.fromiter(
+                    (_SIDE_CODES.get(side, 0) for side, _ in levels),
+                    dtype=np.int8,
+                    count=n,
+                ),
+                np.fromiter((price for _, price in levels), dtype=np.float64, count=n),
+                np.fromiter(levels.values(), dtype=np.float64, count=n),
+            )
+            for queue in self._delta_queues:
+                queue.put_nowait(delta)
+            for queue in self._symbol_delta_queues.get(symbol, ()):
+                queue.put_nowait(delta)
+
+    def best_ask(self, symbol: str) -> OrderbookItem | None:
+        levels = self._normalized_store.levels(symbol, "SELL")  # type: ignore
+        return None if levels is None else levels.first()
+
+    def best_bid(self, symbol: str) -> OrderbookItem | None:
+        levels = self._normalized_store.levels(symbol, "BUY")  # type: ignore
+        return None if levels is None else levels.first(reverse=True)
+
+    def depth(self, symbol: str, n: int, cumulative: bool = False) -> OrderbookDepth:
+        """上位n件の板をnumpy配列で返す（asksは価格の昇順、bidsは降順）。
+
+        配列は(symbol, n, cumulative)ごとに確保したバッファのビューで、次に同じ引数で呼んだ
+        時に上書きされる（保持する場合はコピーすること）。板がn件に満たない場合は存在する分の
+        長さになる。cumulative=Trueの場合は累積サイズも返す。
+        """
+        assert n > 0
+        key = (symbol, n, cumulative)
+        full = self._depth_buffers.get(key)
+        if full is None:
+            buf = np.empty((2, 3 if cumulative else 2, n), dtype=np.float64)
+            full = self._depth_buffers[key] = OrderbookDepth(
+                *(DepthSide(b[0], b[1], b[2] if cumulative else None) for b in buf)
+            )
+        store: PriceLevelDataStore = self._normalized_store  # type: ignore
+        return OrderbookDepth(
+            self._fill_depth(full.asks, store.levels(symbol, "SELL"), n, False),
+            self._fill_depth(full.bids, store.levels(symbol, "BUY"), n, True),
+        )
+
+    @staticmethod
+    def _fill_depth(
+        full: DepthSide, levels: PriceLevels | None, n: int, reverse: bool
+    ) -> DepthSide:
+        # 板がn件以上あれば（通常はこちら）確保済みのビューをそのまま返す
+        # 価格のリストはスライスせずに先頭から（bidsは末尾から）辿り、バッファへ直接書き込む
+        k = 0
+        if levels is not None:
+            price, size, items = full.price, full.size, levels.items
+            prices = reversed(levels.prices) if reverse else levels.prices
+            for k, p in enumerate(islice(prices, n), 1):
+                price[k - 1] = p
+                size[k - 1] = items[p]["size"]
+        if full.cumsize is not None:
+            np.cumsum(full.size[:k], out=full.cumsize[:k])
+        if k == n:
+            return full
+        return DepthSide(
+            full.price[:k],
+            full.size[:k],
+            None if full.cumsize is None else full.cumsize[:k],
+        )
+
+
+class SymbolOrderbook:
+    """OrderbookStoreの一つのsymbolの板。
+
+    ``OrderbookStore[symbol]``で取得する。データは持たず、symbolごとに分けて保持している
+    OrderbookStoreの板を参照する。watch/wait/watch_deltaはこのsymbolの更新のみを受け取る。
+    """
+
+    def __init__(self, store: OrderbookStore, symbol: str):
+        self._store = store
+        self._symbol = symbol
+
+    def sorted(
+        self, query: Item = None, limit: int | None = None
+    ) -> dict[TSide, list[OrderbookItem]]:
+        return self._store.sorted({**(query or {}), "symbol": self._symbol}, limit)
+
+    def best_ask(self) -> OrderbookItem | None:
+        return self._store.best_ask(self._symbol)
+
+    def best_bid(self) -> OrderbookItem | None:
+        return self._store.best_bid(self._symbol)
+
+    def depth(self, n: int, cumulative: bool = False) -> OrderbookDepth:
+        return self._store.depth(self._symbol, n, cumulative)
+
+    def find(self, query: Item | None = None) -> list[OrderbookItem]:
+        return self._store.find({**(query or {}), "symbol": self._symbol})
+
+    def get(self, item: Item) -> OrderbookItem | None:
+        return self._store.get({**item, "symbol": self._symbol})
+
+    def watch(
+        self,
+        maxsize: int | None = None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ) -> SymbolStoreStream:
+        return self._store._normalized_store.watch_symbol(  # type: ignore
+            self._symbol, maxsize, policy, key
+        )
+
+    async def wait(self) -> list[OrderbookItem]:
+        return await self._store._normalized_store.wait_symbol(  # type: ignore
+            self._symbol
+        )
+
+    def watch_delta(self) -> OrderbookDeltaStream:
+        return OrderbookDeltaStream(
+            self._store._symbol_delta_queues.setdefault(self._symbol, [])
+        )
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    def __len__(self) -> int:
+        sides = self._store._normalized_store._levels.get(  # type: ignore
+            self._symbol, {}
+        )
+        return sum(len(levels) for levels in sides.values())
+
+    def __iter__(self) -> Iterator[OrderbookItem]:
+        asks, bids = self.sorted().values()
+        return iter(asks + bids)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._symbol})"
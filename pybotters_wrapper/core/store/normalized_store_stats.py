@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Iterable
+
+from pybotters.store import StoreChange
+
+
+class NormalizedStoreStats:
+    """NormalizedDataStoreの計測値。
+
+    元ストアのchangeがキューに入って（watchのStoreStream／inlineモードのflush待ち）から、
+    正規化ストアへの_insert/_update/_deleteが完了するまでの時間（秒）をchangeごとに
+    直近``max_samples``件保持する。キューで待っていた時間も含む。
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        assert max_samples > 0
+        self.changes = 0
+        self.operations: dict[str, int] = {}
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.max_lag = 0.0
+        self._lags: deque[float] = deque(maxlen=max_samples)
+
+    def on_receive(self, queue_depth: int) -> None:
+        """changeを受け取った時点の未処理のchange数（受け取ったものを含む）を記録する"""
+        if queue_depth > self.max_queue_depth:
+            self.max_queue_depth = queue_depth
+
+    def on_applied(
+        self, changes: Iterable[StoreChange], enqueued: Iterable[float]
+    ) -> None:
+        """まとめて適用したchangeと、それぞれがキューに入った時刻（perf_counter）を記録する
+
+        計測を有効にする前にキューに入っていたchangeなど、時刻のないものはlagに含めない。
+        """
+        n = 0
+        operations = self.operations
+        for change in changes:
+            operations[change.operation] = operations.get(change.operation, 0) + 1
+            n += 1
+        self.changes += n
+        self.batches += 1
+        applied = time.perf_counter()
+        lags = [applied - t for t in enqueued]
+        if lags:
+            self._lags.extend(lags)
+            lag = max(lags)
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def lag(self, q: float) -> float | None:
+        """保持しているlagのq分位点（0 <= q <= 1）。計測値がない場合はNone"""
+        assert 0 <= q <= 1
+        if not self._lags:
+            return None
+        lags = sorted(self._lags)
+        return lags[round(q * (len(lags) - 1))]
+
+    def reset(self) -> None:
+        self.changes = 0
+        self.operations = {}
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.max_lag = 0.0
+        self._lags.clear()
+
+    def to_dict(self, queue_depth: int = 0) -> dict:
+        return {
+            "changes": self.changes,
+            "operations": dict(self.operations),
+            "batches": self.batches,
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "lag_p50": self.lag(0.5),
+            "lag_p99": self.lag(0.99),
+            "lag_max": self.max_lag if self._lags else None,
+        }
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from typing import Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+from pybotters.store import DataStore, Item, StoreChange
+
+from ..typedefs import TradesItem
+from .normalized_store_trades import TradesStore
+
+_SIDE_CODES = {"BUY": 1, "SELL": -1}
+_SIDES = {1: "BUY", -1: "SELL", 0: ""}
+
+
+class TradesColumns(NamedTuple):
+    timestamp: np.ndarray  # int64 (ns, UTC)
+    price: np.ndarray  # float64
+    size: np.ndarray  # float64
+    side: np.ndarray  # int8 (BUY=1, SELL=-1)
+    symbol: np.ndarray  # int32 (symbol_codeを参照)
+
+
+class ColumnarTradesStore(TradesStore):
+    """固定長のカラム（numpy配列）に約定を保持するTradesStore。
+
+    約定をdictで持たず、timestamp（int64 ns）・price/size（float64）・side（int8）・
+    symbol（int32のコード）のカラムにリングバッファ式に書き込む。各カラムは容量の2倍の
+    長さを持ち、同じ値を二箇所に書くことで直近N件を常にコピーなしの連続したビューとして
+    返せるようにしている。
+
+    ``find``/``watch``/``wait``は従来通り使えるが、``find``や``__iter__``はカラムから
+    dictを組み立て直す（"info"は保持しない）ので、ホットパスでは``last``やカラムの
+    ビューを使うこと。
+    """
+
+    def __init__(self, store: DataStore | None, *, capacity: int = 100000, **kwargs):
+        assert capacity > 0
+        # deleteはリングバッファから消せないので対象外（sweep同様に溢れた分から消える）
+        kwargs.setdefault("target_operations", ("insert", "update"))
+        super(ColumnarTradesStore, self).__init__(store, indexes=[], **kwargs)
+        self._capacity = capacity
+        self._count = 0
+        self._timestamp = np.zeros(capacity * 2, dtype=np.int64)
+        self._price = np.zeros(capacity * 2, dtype=np.float64)
+        self._size = np.zeros(capacity * 2, dtype=np.float64)
+        self._side = np.zeros(capacity * 2, dtype=np.int8)
+        self._symbol = np.zeros(capacity * 2, dtype=np.int32)
+        self._id = np.empty(capacity * 2, dtype=object)
+        self._symbols: list[str] = []
+        self._symbol_codes: dict[str, int] = {}
+
+    @classmethod
+    def from_trades_store(
+        cls, store: TradesStore, capacity: int = 100000
+    ) -> ColumnarTradesStore:
+        """既存のTradesStoreと同じ元ストア・mapper・設定で作り直す"""
+        return cls(
+            store._base_store,
+            capacity=capacity,
+            mapper=store._mapper,
+            name=store._normalized_store.name,
+            keys=list(store._normalized_store._keys),
+            on_wait=store._on_wait_fn,
+            on_msg=store._on_msg_fn,
+            msg_filter=store._msg_filter,
+            msg_keys=store._msg_keys,
+            on_watch_get_operation=store._on_watch_get_operation,
+            on_watch_make_item=store._on_watch_make_item,
+            info_mode=store.info_mode,
+            batch=store.batch,
+            stats=store.stats is not None,
+        )
+
+    def symbol_code(self, symbol: str) -> int:
+        """symbolカラムに格納しているコード。未知のsymbolは-1"""
+        return self._symbol_codes.get(symbol, -1)
+
+    def last(self, n: int | None = None, symbol: str | None = None) -> TradesColumns:
+        """直近n件（Noneの場合は保持している全件）のカラムを返す。
+
+        symbolを指定しない場合はコピーなしのビュー、指定した場合は該当行を抜き出したコピー。
+        """
+        length = len(self)
+        n = length if n is None else min(n, length)
+        end = self._count % self._capacity + self._capacity
+        start = end - n
+        columns = TradesColumns(
+            self._timestamp[start:end],
+            self._price[start:end],
+            self._size[start:end],
+            self._side[start:end],
+            self._symbol[start:end],
+        )
+        if symbol is None:
+            return columns
+        mask = columns.symbol == self.symbol_code(symbol)
+        return TradesColumns(*(c[mask] for c in columns))
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def symbols(self) -> list[str]:
+        return self._symbols
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.last().timestamp
+
+    @property
+    def price(self) -> np.ndarray:
+        return self.last().price
+
+    @property
+    def size(self) -> np.ndarray:
+        return self.last().size
+
+    @property
+    def side(self) -> np.ndarray:
+        return self.last().side
+
+    def _get_operation(self, change: StoreChange) -> str | None:
+        op = super()._get_operation(change)
+        return None if op == "delete" else op
+
+    def _insert(self, data: list[Item]) -> None:
+        cap = self._capacity
+        for item in data:
+            i = self._count % cap
+            j = i + cap
+            symbol = item["symbol"]
+            code = self._symbol_codes.get(symbol)
+            if code is None:
+                code = self._symbol_codes[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+            ts = item["timestamp"]
+            ns = ts.value if isinstance(ts, pd.Timestamp) else pd.Timestamp(ts).value
+            side = _SIDE_CODES.get(item["side"], 0)
+            self._timestamp[i] = self._timestamp[j] = ns
+            self._price[i] = self._price[j] = item["price"]
+            self._size[i] = self._size[j] = item["size"]
+            self._side[i] = self._side[j] = side
+            self._symbol[i] = self._symbol[j] = code
+            self._id[i] = self._id[j] = item["id"]
+            self._count += 1
+            # watchしている側には従来通りアイテムを流す
+            self._normalized_store._put("insert", None, item)
+        self._normalized_store._set(data)
+
+    def _update(self, data: list[Item]) -> None:
+        # 約定は追記のみ（キーのないDataStoreの_updateと同様）
+        self._insert(data)
+
+    def _delete(self, data: list[Item]) -> None:
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support delete operation"
+        )
+
+    def _clear(self) -> None:
+        for item in self:
+            self._normalized_store._put("delete", None, item)
+        self._count = 0
+        self._normalized_store._set([])
+
+    def _row(self, k: int) -> TradesItem:
+        return TradesItem(
+            id=self._id[k],
+            symbol=self._symbols[self._symbol[k]],
+            side=_SIDES[int(self._side[k])],
+            price=float(self._price[k]),
+            size=float(self._size[k]),
+            timestamp=pd.Timestamp(int(self._timestamp[k]), tz="UTC"),
+        )
+
+    def _rows(self, reverse: bool = False) -> Iterator[int]:
+        end = self._count % self._capacity + self._capacity
+        start = end - len(self)
+        return reversed(range(start, end)) if reverse else iter(range(start, end))
+
+    def __len__(self) -> int:
+        return min(self._count, self._capacity)
+
+    def __iter__(self) -> Iterator[Item]:
+        return (self._row(k) for k in self._rows())  # type: ignore
+
+    def __reversed__(self) -> Iterator[Item]:
+        return (self._row(k) for k in self._rows(reverse=True))  # type: ignore
+
+    def get(self, item: Item) -> Item | None:
+        for k in self._rows(reverse=True):
+            if self._id[k] == item["id"] and (
+                "symbol" not in item or self._symbols[self._symbol[k]] == item["symbol"]
+            ):
+                return self._row(k)  # type: ignore
+        return None
+
+    def find(self, query: Item | None = None) -> list[Item]:
+        if not query:
+            return list(self)
+        rows = self._rows()
+        if "symbol" in query:
+            code = self.symbol_code(query["symbol"])
+            rows = (k for k in rows if self._symbol[k] == code)
+        return [
+            item
+            for item in (self._row(k) for k in rows)
+            if all(k in item and query[k] == item[k] for k in query)
+        ]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+from abc import ABCMeta, abstractmethod
+from typing import Any, Generic
+
+import pybotters
+from loguru import logger
+from pybotters.store import Item
+
+from ..typedefs import TDataStoreManager
+from .store_initializer import StoreInitializer
+
+
+class OrderbookResync(Generic[TDataStoreManager], metaclass=ABCMeta):
+    """差分配信の板の更新IDを追跡し、欠損を検知したらRESTのsnapshotで再同期する。
+
+    元ストア（pybottersの板のDataStore）の差分・snapshotのハンドラをフックして使う。
+    欠損を検知したsymbolは、再同期が終わるまで差分を適用せずにバッファする。再同期では
+    StoreInitializer（initialize_orderbook）でsnapshotを取得し、現在の板との差分として元ストアに
+    適用した上で（板を作り直さないので購読者はそのまま）、バッファした差分を再生する。
+
+    snapshotを一度も受け取っていないsymbolの差分は何もせずpybottersの処理に任せる。
+    """
+
+    # 再同期のリクエストに失敗した場合に再試行するまでの秒数
+    _RETRY_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        store: TDataStoreManager,
+        initializer: StoreInitializer,
+        client: pybotters.Client,
+        **params: Any,
+    ):
+        self._store = store
+        self._initializer = initializer
+        self._client = client
+        self._params = params
+        # symbol -> 最後に適用した差分（またはsnapshot）の更新ID
+        self._last_ids: dict[str, int] = {}
+        # snapshot直後で最初の差分を待っているsymbol
+        self._first: set[str] = set()
+        # 再同期中のsymbol -> 適用を保留している差分
+        self._buffers: dict[str, list[Item]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._gaps = 0
+        self._resyncs = 0
+        self._hook()
+
+    def close(self) -> None:
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+        self._tasks.clear()
+        self._unhook()
+
+    def is_synced(self, symbol: str) -> bool:
+        """snapshotを受け取っていて、再同期中でないか"""
+        return symbol in self._last_ids and symbol not in self._buffers
+
+    def resync(self, symbols: list[str] | None = None) -> None:
+        """snapshotを受け取っているsymbol（symbolsを省略した場合は全て）を再同期する。
+
+        板を空にした場合（invalidate）など、差分の連続性に関わらずsnapshotを取り直す必要が
+        ある時に使う。再同期中のsymbolはそのまま。
+        """
+        for symbol in symbols or list(self._last_ids):
+            if symbol in self._last_ids and symbol not in self._buffers:
+                self._start_resync(symbol, [])
+
+    @property
+    def gaps(self) -> int:
+        """検知した欠損の数"""
+        return self._gaps
+
+    @property
+    def resyncs(self) -> int:
+        """完了した再同期の数"""
+        return self._resyncs
+
+    @abstractmethod
+    def _hook(self) -> None:
+        """元ストアの差分は_on_diff、snapshotは_on_snapshotを通るようにする"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _unhook(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _apply_diff(self, msg: Item) -> None:
+        """差分を元ストアに適用する（フック前のハンドラを呼ぶ）"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _get_last_id(self, msg: Item) -> int:
+        """差分の最後の更新ID"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _is_stale(self, last_id: int, msg: Item) -> bool:
+        """snapshot（last_id）より前の差分か"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _is_first(self, last_id: int, msg: Item) -> bool:
+        """snapshot（last_id）直後の最初の差分として連続しているか"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _is_next(self, last_id: int, msg: Item) -> bool:
+        """直前に適用した差分（last_id）に連続しているか"""
+        raise NotImplementedError
+
+    def _on_diff(self, symbol: str, msg: Item) -> None:
+        if symbol in self._buffers:
+            self._buffers[symbol].append(msg)
+            return
+
+        last_id = self._last_ids.get(symbol)
+        if last_id is None:
+            self._apply_diff(msg)
+            return
+
+        if symbol in self._first:
+            if self._is_stale(last_id, msg):
+                return
+            is_continuous = self._is_first(last_id, msg)
+        else:
+            is_continuous = self._is_next(last_id, msg)
+
+        if not is_continuous:
+            self._gaps += 1
+            logger.warning(
+                f"Orderbook sequence gap detected ({symbol}): "
+                f"last_id={last_id}, resynchronizing ..."
+            )
+            self._start_resync(symbol, [msg])
+            return
+
+        self._first.discard(symbol)
+        self._apply_diff(msg)
+        self._last_ids[symbol] = self._get_last_id(msg)
+
+    def _start_resync(self, symbol: str, buffer: list[Item]) -> None:
+        self._buffers[symbol] = buffer
+        self._tasks[symbol] = asyncio.create_task(self._resync(symbol))
+
+    def _on_snapshot(self, symbol: str, snapshot_id: int, buffer: list[Item]) -> None:
+        """snapshotを元ストアに適用した後に呼ぶ。保留していた差分を再生する"""
+        self._last_ids[symbol] = snapshot_id
+        self._first.add(symbol)
+        buffer = [*buffer, *self._buffers.pop(symbol, [])]
+        for msg in buffer:
+            self._on_diff(symbol, msg)
+
+    async def _resync(self, symbol: str) -> None:
+        while True:
+            try:
+                await self._initializer.initialize_orderbook(
+                    self._client, symbol=symbol, **self._params
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to resynchronize orderbook ({symbol}): {e}")
+                await asyncio.sleep(self._RETRY_INTERVAL)
+            else:
+                break
+        self._resyncs += 1
+        # snapshot適用後の再生で再び欠損を検知した場合は新しいタスクに置き換わっている
+        if self._tasks.get(symbol) is asyncio.current_task():
+            del self._tasks[symbol]
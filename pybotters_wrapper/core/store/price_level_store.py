@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import uuid
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Hashable, Iterator
+
+from pybotters.store import Item, StoreChange
+
+from .backpressure_stream import (
+    BackpressureStoreStream,
+    TBackpressurePolicy,
+    TConflateKey,
+    _BackpressureQueue,
+)
+from .indexed_store import IndexedDataStore
+
+
+class PriceLevels:
+    """一つのsymbol・sideの板（価格の昇順リストと価格 -> アイテム）"""
+
+    __slots__ = ("prices", "items")
+
+    def __init__(self):
+        self.prices: list[float] = []
+        self.items: dict[float, Item] = {}
+
+    def put(self, item: Item) -> None:
+        price = item["price"]
+        if price not in self.items:
+            insort(self.prices, price)
+        self.items[price] = item
+
+    def remove(self, price: float) -> None:
+        if self.items.pop(price, None) is not None:
+            del self.prices[bisect_left(self.prices, price)]
+
+    def first(self, reverse: bool = False) -> Item | None:
+        if not self.prices:
+            return None
+        return self.items[self.prices[-1 if reverse else 0]]
+
+    def iter(self, reverse: bool = False) -> Iterator[Item]:
+        items = self.items
+        return (items[p] for p in (reversed(self.prices) if reverse else self.prices))
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class SymbolItems(list):
+    """symbolを指定したwaitの戻り値（そのsymbolのアイテムのみが入る）"""
+
+    def __init__(self, symbol: Hashable):
+        super(SymbolItems, self).__init__()
+        self.symbol = symbol
+
+
+class SymbolStoreStream(BackpressureStoreStream):
+    """一つのsymbolのchangeのみを受け取るBackpressureStoreStream"""
+
+    def __init__(
+        self,
+        store: PriceLevelDataStore,
+        symbol: Hashable,
+        maxsize: int | None = None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ) -> None:
+        self._check(maxsize, policy)
+        self._queue = _BackpressureQueue(maxsize, policy, key)
+        self._queues = store._symbol_queues.setdefault(symbol, [])
+        self._queues.append(self._queue)
+        self._store = store
+
+    def close(self) -> None:
+        self._queues.remove(self._queue)
+
+
+class PriceLevelDataStore(IndexedDataStore):
+    """symbol・sideごとに価格でソートされた板を持つDataStore。
+
+    insert/update/delete（とsweep・eviction）に合わせて``PriceLevels``を差分更新するので、
+    最良気配はO(1)、上位N件はO(N)で取り出せる。"symbol"・"side"・"price"を持つアイテムが
+    対象（OrderbookStoreの正規化ストア）。
+    """
+
+    def __init__(self, *args, **kwargs):
+        # symbol -> side -> PriceLevels
+        self._levels: dict[Hashable, dict[str, PriceLevels]] = {}
+        # symbol -> そのsymbolのみをwatchしているキュー
+        self._symbol_queues: dict[Hashable, list[asyncio.Queue]] = {}
+        super(PriceLevelDataStore, self).__init__(*args, **kwargs)
+
+    def levels(self, symbol: Hashable, side: str) -> PriceLevels | None:
+        return self._levels.get(symbol, {}).get(side)
+
+    def watch_symbol(
+        self,
+        symbol: Hashable,
+        maxsize: int | None = None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ) -> SymbolStoreStream:
+        return SymbolStoreStream(self, symbol, maxsize, policy, key)
+
+    async def wait_symbol(self, symbol: Hashable) -> list[Item]:
+        event = asyncio.Event()
+        ret = SymbolItems(symbol)
+        self._events[event] = ret
+        await event.wait()
+        del self._events[event]
+        return ret
+
+    def _set(self, data: list[Item] | None = None) -> None:
+        if data is None:
+            data = []
+        for event, ret in self._events.items():
+            if isinstance(ret, SymbolItems):
+                items = [d for d in data if d.get("symbol") == ret.symbol]
+                # 削除（_remove・_clear）などアイテムのない通知は全てのsymbolに流す
+                if items or not data:
+                    event.set()
+                    ret.extend(items)
+            else:
+                event.set()
+                ret.extend(data)
+
+    def _put(self, operation: str, source: Item | None, item: Item) -> None:
+        super()._put(operation, source, item)
+        queues = self._symbol_queues.get(item.get("symbol"))
+        if queues:
+            for queue in queues:
+                queue.put_nowait(
+                    StoreChange(
+                        self, operation, copy.deepcopy(source), copy.deepcopy(item)
+                    )
+                )
+        if operation == "delete":
+            self._remove_level(item)
+        else:
+            self._put_level(item)
+
+    def _clear(self) -> None:
+        super()._clear()
+        self._levels.clear()
+
+    def _pop(self, item: Item) -> Item | None:
+        ret = super()._pop(item)
+        if ret is not None:
+            self._remove_level(ret)
+        return ret
+
+    def _sweep_with_key(self) -> None:
+        if not self.bounded and len(self._data) > self._MAXLEN:
+            # pybottersのsweepと同じく_indexの先頭から消えるものを板からも除く
+            for keyhash in islice(self._index, len(self._data) - self._MAXLEN):
+                self._remove_level(self._data[self._index[keyhash]])
+        super()._sweep_with_key()
+
+    def _evict(self, _id: uuid.UUID) -> None:
+        item = self._data[_id]
+        super()._evict(_id)
+        self._remove_level(item)
+
+    def _put_level(self, item: Item) -> None:
+        if "price" not in item:
+            return
+        try:
+            symbol, side = item["symbol"], item["side"]
+        except KeyError:
+            return
+        sides = self._levels.get(symbol)
+        if sides is None:
+            sides = self._levels[symbol] = {}
+        levels = sides.get(side)
+        if levels is None:
+            levels = sides[side] = PriceLevels()
+        levels.put(item)
+
+    def _remove_level(self, item: Item) -> None:
+        sides = self._levels.get(item.get("symbol"))
+        if sides is None:
+            return
+        levels = sides.get(item.get("side"))
+        if levels is None:
+            return
+        levels.remove(item.get("price"))
+        if not levels:
+            del sides[item["side"]]
+            if not sides:
+                del self._levels[item["symbol"]]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+from pybotters.store import DataStore, Item
+
+from .normalized_store import NormalizedDataStore
+
+
+def ready_event(store: DataStore | NormalizedDataStore) -> asyncio.Event:
+    """storeが初めて空でなくなった時に一度だけsetされるイベントを返す。
+
+    既に空でなければset済みのイベントを返す。storeの_set（変更の通知）をインスタンスごとに
+    フックし、変更のたびではなく空でなくなった時にだけイベントをsetする。setした後はフックを
+    外す。setされる前に待つのをやめる場合はhook_ready_eventでフックを外せるようにする。
+    """
+    event, _ = hook_ready_event(store)
+    return event
+
+
+def hook_ready_event(
+    store: DataStore | NormalizedDataStore,
+) -> tuple[asyncio.Event, Callable[[], None]]:
+    """ready_eventと、そのフックを外す関数を返す。
+
+    フックを外す関数はイベントがsetされる前でも呼べる（何度呼んでもよい）。後から別のフックが
+    重ねられていて_setを戻せない場合は、素通りするだけのフックになる。
+    """
+    event = asyncio.Event()
+    if len(store) > 0:
+        event.set()
+        return event, _noop
+
+    # 正規化ストアは変更を通知する内部のDataStoreをフックする（長さは正規化ストアで見る）
+    notifier = (
+        store._normalized_store if isinstance(store, NormalizedDataStore) else store
+    )
+    base_set = notifier._set
+    # 既にインスタンスごとのフックがあればそれに戻す（なければクラスの_setに戻す）
+    hooked = "_set" in notifier.__dict__
+    active = True
+
+    def _unhook() -> None:
+        nonlocal active
+        active = False
+        if notifier.__dict__.get("_set") is _set:
+            if hooked:
+                notifier._set = base_set  # type: ignore
+            else:
+                del notifier._set
+
+    def _set(data: list[Item] | None = None) -> None:
+        base_set(data)
+        if active and len(store) > 0:
+            event.set()
+            _unhook()
+
+    notifier._set = _set  # type: ignore
+    return event, _unhook
+
+
+def _noop() -> None:
+    pass
@@ -1,6 +1,18 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Awaitable, Generic, Literal, Self, cast
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Literal,
+    Self,
+    Type,
+    cast,
+)
 
 import aiohttp
 import pybotters
@@ -8,22 +20,31 @@ from loguru import logger
 from pybotters.store import DataStore
 from pybotters.ws import ClientWebSocketResponse
 
-from ..exceptions import UnsupportedStoreError
+from ..exceptions import StoreNotReadyError, UnsupportedStoreError
 from .exchange_property import ExchangeProperty
+from .json_decoder import TJsonLoads
 from .store import (
+    ColumnarTradesStore,
     ExecutionStore,
     NormalizedStoreBuilder,
+    OrderbookResync,
     OrderbookStore,
     OrderStore,
     PositionStore,
     StoreInitializer,
+    TBackpressurePolicy,
+    TConflateKey,
     TickerStore,
     TradesStore,
+    hook_ready_event,
 )
 from .typedefs import TDataStoreManager
 from .websocket import (
+    MessageRouter,
+    TMessageHandler,
     TWebsocketOnReconnectionCallback,
     WebSocketConnection,
+    WebSocketConnectionStats,
     WebSocketRequestBuilder,
     WebSocketRequestCustomizer,
 )
@@ -34,6 +55,9 @@ if TYPE_CHECKING:
 
 
 class DataStoreWrapper(Generic[TDataStoreManager]):
+    # websocketが切断された時に空にする正規化ストア（切断中の差分を取りこぼすと内容が壊れるもの）
+    _INVALIDATE_ON_DISCONNECTION = ("orderbook",)
+
     def __init__(
         self,
         store: TDataStoreManager,
@@ -43,15 +67,28 @@ class DataStoreWrapper(Generic[TDataStoreManager]):
         normalized_store_builder: NormalizedStoreBuilder,
         websocket_request_builder: WebSocketRequestBuilder,
         websocket_request_customizer: WebSocketRequestCustomizer,
+        orderbook_resync: Type[OrderbookResync] | None = None,
     ):
         self._store = store
         self._ws_connections: list[WebSocketConnection] = []
+        self._inline_normalization = False
         self._eprop = exchange_property
         self._initializer = store_initializer
         self._normalized_store_builder = normalized_store_builder
         self._normalized_stores = self._build_normalized_stores()
+        # websocket messageを直接受け取る正規化ストアのみに配信する
+        self._msg_stores = self._get_msg_stores()
         self._ws_request_builder = websocket_request_builder
         self._websocket_request_customizer = websocket_request_customizer
+        # add_message_handlerで登録したハンドラとそのキー、before_store
+        self._msg_handlers: list[tuple[TMessageHandler, tuple | None, bool]] = []
+        self._msg_router = self._build_msg_router()
+        # before_storeのハンドラ（ない場合はNone）
+        self._pre_msg_router: MessageRouter | None = None
+        self._orderbook_resync_class = orderbook_resync
+        self._orderbook_resync: OrderbookResync | None = None
+        self._connection_stats = False
+        self._json_loads: TJsonLoads | None = None
 
     async def __aenter__(self):
         return self
@@ -113,16 +150,47 @@ class DataStoreWrapper(Generic[TDataStoreManager]):
         send: Any | None = None,
         hdlr: WsStrHandler | WsBytesHandler = None,
         waits: list[DataStore | str] | None = None,
+        wait_timeout: float | None = None,
         send_type: Literal["json", "str", "byte"] | None = None,
         hdlr_type: Literal["json", "str", "byte"] | None = None,
         auto_reconnect: bool = False,
         on_reconnection: TWebsocketOnReconnectionCallback | None = None,
+        on_disconnection: TWebsocketOnReconnectionCallback | None = None,
+        reconnect_backoff: tuple[float, float] = (0.5, 30.0),
+        invalidate_on_disconnection: bool = False,
+        max_streams_per_connection: int | None = None,
+        shards: int | None = None,
         **kwargs,
     ) -> DataStoreWrapper:
+        """websocketに接続する。
+
+        auto_reconnect=Trueの場合は切断を検知した時点でexponential backoffで再接続する。
+        invalidate_on_disconnection=Trueであれば、auto_reconnectに関わらず切断を検知する
+        たびに、切断した接続で購読していた板などの正規化ストアを空にする（invalidate。
+        auto_reconnect=Trueの場合は再接続前）。切断中の差分は受け取れないので、pybottersの
+        元ストアの板も意図的に空にし、再接続後のsnapshotで埋め直されるまで参照されないように
+        する。RESTのsnapshotで初期化する板（Binanceなど）は、再接続後に差分だけで板が
+        作られてしまうので、enable_orderbook_resyncで再同期を有効にしている場合のみ空にする。
+        max_streams_per_connectionかshardsを指定した場合は、endpointごとの購読を複数の
+        接続に分ける（WebSocketRequestBuilder.get_shards）。どの接続のmessageもこの
+        ラッパーに流れる。
+        waitsを指定した場合は、指定したストアが全て空でなくなるまで待つ。wait_timeout秒
+        経っても空のストアがあればStoreNotReadyError（TimeoutError）を送出する。
+        """
         self._websocket_request_customizer.set_client(client)
-        ws_requests = self._ws_request_builder.get(
-            request_customizer=self._websocket_request_customizer
-        )
+        if max_streams_per_connection is None and shards is None:
+            ws_requests = [
+                (request, self._ws_request_builder.store_names(request.endpoint))
+                for request in self._ws_request_builder.get(
+                    request_customizer=self._websocket_request_customizer
+                )
+            ]
+        else:
+            ws_requests = self._ws_request_builder.get_shards(
+                max_streams_per_connection=max_streams_per_connection,
+                shards=shards,
+                request_customizer=self._websocket_request_customizer,
+            )
 
         if hdlr is None:
             hdlr = self.onmessage
@@ -132,21 +200,109 @@ class DataStoreWrapper(Generic[TDataStoreManager]):
             else:
                 hdlr = [hdlr, self.onmessage]
 
-        for _endpoint, _send in ws_requests:
-            conn = WebSocketConnection(_endpoint, _send, hdlr, send_type, hdlr_type)
-            await conn.connect(client, auto_reconnect, on_reconnection, **kwargs)
+        for (_endpoint, _send), store_names in ws_requests:
+            if invalidate_on_disconnection:
+                names = [
+                    name
+                    for name in self._INVALIDATE_ON_DISCONNECTION
+                    if name in store_names
+                ]
+                _on_disconnection = self._make_on_disconnection(names, on_disconnection)
+            else:
+                _on_disconnection = on_disconnection
+            conn = WebSocketConnection(
+                _endpoint,
+                _send,
+                hdlr,
+                send_type,
+                hdlr_type,
+                json_loads=self._json_loads,
+            )
+            conn.set_stats(self._connection_stats)
+            await conn.connect(
+                client,
+                auto_reconnect,
+                on_reconnection,
+                _on_disconnection,
+                reconnect_backoff,
+                **kwargs,
+            )
             self._ws_connections.append(conn)
 
         if endpoint is not None and send is not None:
-            conn = WebSocketConnection(endpoint, send, hdlr, send_type, hdlr_type)
-            await conn.connect(client, auto_reconnect, on_reconnection, **kwargs)
+            conn = WebSocketConnection(
+                endpoint, send, hdlr, send_type, hdlr_type, json_loads=self._json_loads
+            )
+            conn.set_stats(self._connection_stats)
+            await conn.connect(
+                client,
+                auto_reconnect,
+                on_reconnection,
+                on_disconnection,
+                reconnect_backoff,
+                **kwargs,
+            )
             self._ws_connections.append(conn)
 
         if waits is not None:
-            await self._wait_socket_responses(waits)
+            await self._wait_socket_responses(waits, wait_timeout)
 
         return self
 
+    def _make_on_disconnection(
+        self,
+        names: list[str],
+        on_disconnection: TWebsocketOnReconnectionCallback | None,
+    ) -> TWebsocketOnReconnectionCallback | None:
+        if not names:
+            return on_disconnection
+
+        async def _on_disconnection(
+            conn: WebSocketConnection, client: pybotters.Client
+        ) -> None:
+            invalidated = [name for name in names if self._can_invalidate(name)]
+            if invalidated:
+                self.invalidate(invalidated)
+            if on_disconnection is not None:
+                if asyncio.iscoroutinefunction(on_disconnection):
+                    await on_disconnection(conn, client)
+                else:
+                    on_disconnection(conn, client)
+
+        return _on_disconnection
+
+    def _can_invalidate(self, name: str) -> bool:
+        # RESTのsnapshotで初期化する板（pybottersの板がinitializedを持つ）は、空にしても
+        # 再接続後のsnapshotは届かず差分だけで埋まってしまうので、再同期が有効な場合のみ空にする
+        store = self._normalized_stores.get(name)
+        if store is None or not hasattr(store._base_store, "initialized"):
+            return True
+        if self._orderbook_resync is None:
+            logger.warning(
+                f"Skip invalidating {name} on disconnection: it is initialized from "
+                "a REST snapshot and orderbook resync is not enabled"
+            )
+            return False
+        return True
+
+    def invalidate(self, names: list[str] | None = None) -> DataStoreWrapper:
+        """正規化ストア（とその元ストア）を空にする（NormalizedDataStore.invalidate）。
+
+        namesを省略した場合は切断時に空にする対象のストア（板）を空にする。板を空にした場合、
+        enable_orderbook_resyncで再同期を有効にしていればsnapshotを取り直す。
+        """
+        for name in names or self._INVALIDATE_ON_DISCONNECTION:
+            store = self._normalized_stores.get(name)
+            if store is not None:
+                logger.debug(f"invalidate store: {name}")
+                store.invalidate()
+        # 空にした板は差分の連続性に関わらずsnapshotを取り直す
+        if self._orderbook_resync is not None and "orderbook" in (
+            names or self._INVALIDATE_ON_DISCONNECTION
+        ):
+            self._orderbook_resync.resync()
+        return self
+
     async def wait(self):
         await self._store.wait()
 
@@ -158,26 +314,201 @@ class DataStoreWrapper(Generic[TDataStoreManager]):
             if store is not None:
                 await store.close()
 
-    def onmessage(self, msg: Item, ws: ClientWebSocketResponse) -> None:
-        self._store.onmessage(msg, ws)
-        # NormalizedStoreの要素は通常watch経由で更新するが、１：１で対応するストアがない場合に、
-        # 全てのwebsocket messageを入力とする経路を用意している
-        for k, store in self._normalized_stores.items():
+        if self._orderbook_resync is not None:
+            self._orderbook_resync.close()
+
+    def set_inline_normalization(self, inline: bool) -> DataStoreWrapper:
+        """正規化ストアを元ストアの更新と同じターンで同期的に更新するかを設定する。
+
+        有効時はwatch（deep copy・キュー・タスク切り替え）を経由せず、onmessageで元ストアを
+        更新した直後に正規化ストアへ反映する。
+        """
+        self._inline_normalization = inline
+        for store in self._normalized_stores.values():
             if store is not None:
-                store._onmessage(msg, ws)
+                store.set_inline(inline)
+        return self
 
-    async def _wait_socket_responses(self, waits: list[str]) -> None:
-        waits = [getattr(self, w) if isinstance(w, str) else w for w in waits]
+    def enable_orderbook_resync(
+        self, client: pybotters.Client, **params
+    ) -> DataStoreWrapper:
+        """差分配信の板の欠損検知と自動再同期を有効にする。
 
-        while True:
-            await self._store.wait()
-            is_done = [len(w) > 0 for w in waits]
-            logger.debug(
-                f"Waiting responses ... "
-                f"{dict(zip(map(lambda x: x.__class__.__name__, waits), is_done))}"
+        更新IDの欠損を検知したsymbolは、initialize_orderbook（paramsはsymbol以外の
+        クエリパラメーター）で取得したsnapshotで板を差分更新し、保留していた差分を再生する。
+        """
+        if self._orderbook_resync_class is None:
+            raise UnsupportedStoreError(
+                f"Orderbook resync is not supported for {self._eprop.exchange}"
+            )
+        if self._orderbook_resync is None:
+            self._orderbook_resync = self._orderbook_resync_class(
+                self._store, self._initializer, client, **params
             )
-            if all(is_done):
-                break
+        return self
+
+    def set_stats(self, enabled: bool) -> DataStoreWrapper:
+        """全ての正規化ストアの計測（NormalizedDataStore.set_stats）を有効・無効にする"""
+        for store in self._normalized_stores.values():
+            if store is not None:
+                store.set_stats(enabled)
+        return self
+
+    def get_stats(self) -> dict[str, dict]:
+        """計測が有効な正規化ストアの計測値（ストア名 -> NormalizedDataStore.get_stats）"""
+        return {
+            name: stats
+            for name, store in self._normalized_stores.items()
+            if store is not None and (stats := store.get_stats()) is not None
+        }
+
+    def set_watch_backpressure(
+        self,
+        maxsize: int | None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+        names: list[str] | None = None,
+    ) -> DataStoreWrapper:
+        """正規化ストアの元ストアのwatchのキューの上限とpolicyを設定する
+        （NormalizedDataStore.set_watch_backpressure）。namesを省略した場合は全ての正規化ストア
+        """
+        for name, store in self._normalized_stores.items():
+            if store is not None and (names is None or name in names):
+                store.set_watch_backpressure(maxsize, policy, key)
+        return self
+
+    def get_watch_stats(self) -> dict[str, dict]:
+        """watchしている正規化ストアのキューの計測値（ストア名 -> get_watch_stats）"""
+        return {
+            name: stats
+            for name, store in self._normalized_stores.items()
+            if store is not None and (stats := store.get_watch_stats()) is not None
+        }
+
+    def set_connection_stats(self, enabled: bool) -> DataStoreWrapper:
+        """websocket接続（WebSocketConnection.set_stats）の計測を有効・無効にする。
+
+        以降にconnectで作る接続にも適用する。
+        """
+        self._connection_stats = enabled
+        for conn in self._ws_connections:
+            conn.set_stats(enabled)
+        return self
+
+    def get_connection_stats(self) -> dict[str, dict]:
+        """計測が有効な接続の計測値をendpointごとにまとめたもの（endpoint -> 計測値）"""
+        by_endpoint: dict[str, list[WebSocketConnectionStats]] = {}
+        for conn in self._ws_connections:
+            if conn.stats is not None:
+                by_endpoint.setdefault(conn.endpoint, []).append(conn.stats)
+        return {
+            endpoint: WebSocketConnectionStats.merge(stats).to_dict()
+            for endpoint, stats in by_endpoint.items()
+        }
+
+    def set_json_loads(self, json_loads: TJsonLoads) -> DataStoreWrapper:
+        """websocket接続（WebSocketConnection.set_json_loads）のJSONのデコード関数を設定する。
+
+        以降にconnectで作る接続にも適用する。
+        """
+        self._json_loads = json_loads
+        for conn in self._ws_connections:
+            conn.set_json_loads(json_loads)
+        return self
+
+    def use_columnar_trades(self, capacity: int = 100000) -> DataStoreWrapper:
+        """tradesストアをカラム（numpy配列）で保持するColumnarTradesStoreに差し替える。
+
+        差し替え前のtradesストアを参照しているプラグインには反映されないので、プラグインの
+        生成前に呼ぶこと。
+        """
+        trades = self.trades
+        if isinstance(trades, ColumnarTradesStore):
+            return self
+        trades.stop()
+        columnar = ColumnarTradesStore.from_trades_store(trades, capacity)
+        columnar.set_inline(self._inline_normalization)
+        self._normalized_stores["trades"] = columnar.start()
+        self._msg_stores = self._get_msg_stores()
+        self._msg_router = self._build_msg_router()
+        return self
+
+    def add_message_handler(
+        self,
+        handler: TMessageHandler,
+        keys: list[Hashable] | None = None,
+        *,
+        before_store: bool = False,
+    ) -> DataStoreWrapper:
+        """onmessageで受け取ったwebsocket messageを渡すハンドラを登録する。
+
+        keysを指定した場合はそのキー（WebSocketChannels.get_message_key、bitFlyerであれば
+        "lightning_board_FX_BTC_JPY"などのチャンネル名）のmessageのみを受け取る。
+        before_store=Trueの場合はストアが処理する前（messageが書き換えられる前）に渡す。
+        その場合、ハンドラの例外はログに出すだけで、ストアの更新は止めない。
+        get_message_keyを実装していない取引所でkeysを指定するとNotImplementedError。
+        """
+        if keys is not None:
+            channels = self._ws_request_builder.channels
+            if not channels.supports_message_key():
+                raise NotImplementedError(
+                    f"{type(channels).__name__} does not support message keys "
+                    f"(register the handler without keys)"
+                )
+            keys = tuple(keys)
+        self._msg_handlers.append((handler, keys, before_store))
+        if before_store:
+            self._pre_msg_router = self._build_pre_msg_router()
+        else:
+            self._msg_router.add(handler, keys)
+        return self
+
+    def remove_message_handler(self, handler: TMessageHandler) -> DataStoreWrapper:
+        self._msg_handlers = [h for h in self._msg_handlers if h[0] != handler]
+        self._msg_router.remove(handler)
+        self._pre_msg_router = self._build_pre_msg_router()
+        return self
+
+    def onmessage(self, msg: Item, ws: ClientWebSocketResponse) -> None:
+        if self._pre_msg_router is not None:
+            self._pre_msg_router(msg, ws)
+        self._store.onmessage(msg, ws)
+        if self._inline_normalization:
+            for store in self._normalized_stores.values():
+                if store is not None:
+                    store.flush()
+        # NormalizedStoreの要素は通常watch経由で更新するが、１：１で対応するストアがない場合に、
+        # websocket messageを入力とする経路を用意している（チャンネルごとに必要なストアにだけ渡す）
+        self._msg_router(msg, ws)
+
+    async def _wait_socket_responses(
+        self, waits: list[DataStore | str], timeout: float | None = None
+    ) -> None:
+        # ストアごとの最初のデータで一度だけsetされるイベントを待つ（messageごとに起きない）
+        # タイムアウト・キャンセル時もフックを外して、connectのたびに_setのフックが重ならないようにする
+        tasks: list[tuple[str, asyncio.Task]] = []
+        unhooks: list[Callable[[], None]] = []
+        try:
+            for w in waits:
+                store = getattr(self, w) if isinstance(w, str) else w
+                name = w if isinstance(w, str) else w.__class__.__name__
+                event, unhook = hook_ready_event(store)
+                unhooks.append(unhook)
+                tasks.append((name, asyncio.create_task(event.wait())))
+
+            if not tasks:
+                return
+
+            _, pending = await asyncio.wait([t for _, t in tasks], timeout=timeout)
+        finally:
+            for _, task in tasks:
+                task.cancel()
+            for unhook in unhooks:
+                unhook()
+        if pending:
+            not_ready = [name for name, task in tasks if task in pending]
+            logger.warning(f"Stores not ready in {timeout} seconds: {not_ready}")
+            raise StoreNotReadyError(not_ready)
 
     def _build_normalized_stores(
         self,
@@ -206,6 +537,57 @@ class DataStoreWrapper(Generic[TDataStoreManager]):
             store.start()
         return stores
 
+    def _get_msg_stores(
+        self,
+    ) -> list[
+        TickerStore
+        | TradesStore
+        | OrderbookStore
+        | OrderStore
+        | ExecutionStore
+        | PositionStore
+    ]:
+        return [
+            s
+            for s in self._normalized_stores.values()
+            if s is not None and s.handles_msg
+        ]
+
+    def _build_msg_router_base(self) -> MessageRouter:
+        if self._ws_request_builder is None:
+            return MessageRouter(lambda msg: None)
+        else:
+            return MessageRouter(self._ws_request_builder.channels.get_message_key)
+
+    def _build_msg_router(self) -> MessageRouter:
+        router = self._build_msg_router_base()
+        for store in self._msg_stores:
+            router.add(store._onmessage, store.msg_keys)
+        for handler, keys, before_store in self._msg_handlers:
+            if not before_store:
+                router.add(handler, keys)
+        return router
+
+    def _build_pre_msg_router(self) -> MessageRouter | None:
+        if not any(before_store for _, _, before_store in self._msg_handlers):
+            return None
+        router = self._build_msg_router_base()
+        for handler, keys, before_store in self._msg_handlers:
+            if before_store:
+                router.add(self._guard_message_handler(handler), keys)
+        return router
+
+    @staticmethod
+    def _guard_message_handler(handler: TMessageHandler) -> TMessageHandler:
+        # ストアの前に呼ぶハンドラ（recorderなど）の失敗でストアの更新が止まらないようにする
+        def _handler(msg: Item, ws: ClientWebSocketResponse) -> None:
+            try:
+                handler(msg, ws)
+            except Exception:
+                logger.exception(f"before_store message handler failed: {handler}")
+
+        return _handler
+
     def _get_normalized_store(
         self, name: str
     ) -> (
@@ -252,6 +634,10 @@ class DataStoreWrapper(Generic[TDataStoreManager]):
     def position(self) -> PositionStore:
         return cast(PositionStore, self._get_normalized_store("position"))
 
+    @property
+    def orderbook_resync(self) -> OrderbookResync | None:
+        return self._orderbook_resync
+
     @property
     def ws_connections(self) -> list[WebSocketConnection]:
         return self._ws_connections
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from typing import TypeVar
+from typing import Type, TypeVar
 
 from .exchange_property import ExchangeProperty
-from .store import NormalizedStoreBuilder, StoreInitializer
+from .store import NormalizedStoreBuilder, OrderbookResync, StoreInitializer
 from .store_wrapper import DataStoreWrapper
 from .typedefs import TDataStoreManager
 from .websocket import (
@@ -27,6 +27,7 @@ class DataStoreWrapperBuilder:
         self._websocket_request_customizer: WebSocketRequestCustomizer = (
             WebSocketDefaultRequestCustomizer()
         )
+        self._orderbook_resync: Type[OrderbookResync] | None = None
 
     def set_store(
         self: TDataStoreWrapperBuilder, store: TDataStoreManager
@@ -66,6 +67,13 @@ class DataStoreWrapperBuilder:
         self._websocket_request_customizer = websocket_request_customizer
         return self
 
+    def set_orderbook_resync(
+        self: TDataStoreWrapperBuilder,
+        orderbook_resync: Type[OrderbookResync],
+    ) -> TDataStoreWrapperBuilder:
+        self._orderbook_resync = orderbook_resync
+        return self
+
     def get(self) -> DataStoreWrapper:
         assert self._store is not None, "store is not set"
         assert self._exchange_property is not None, "exchange_property is not set"
@@ -83,4 +91,5 @@ class DataStoreWrapperBuilder:
             store_initializer=self._store_initializer,
             websocket_request_builder=self._websocket_request_builder,
             websocket_request_customizer=self._websocket_request_customizer,
+            orderbook_resync=self._orderbook_resync,
         )
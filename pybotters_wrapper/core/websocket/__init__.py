@@ -1,9 +1,11 @@
+from .message_router import MessageRouter, TMessageHandler, TMessageKeyFn
 from .websocket_channels import WebSocketChannels
 from .websocket_connection import (
     TWebsocketOnReconnectionCallback,
     TWsHandler,
     WebSocketConnection,
 )
+from .websocket_connection_stats import WebSocketConnectionStats
 from .websocket_request_builder import WebsocketRequest, WebSocketRequestBuilder
 from .websocket_resquest_customizer import (
     WebSocketDefaultRequestCustomizer,
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable, Iterable
+
+from pybotters.ws import ClientWebSocketResponse
+
+TMessageHandler = Callable[[Any, ClientWebSocketResponse], Any]
+TMessageKeyFn = Callable[[Any], Hashable | None]
+
+
+class MessageRouter:
+    """websocket messageを、そのチャンネルに関心のあるハンドラにだけ渡す。
+
+    messageのキーは``WebSocketChannels.get_message_key``で求める。keysを指定して登録した
+    ハンドラはそのキーのmessageのみ、keysを指定しなかったハンドラは全てのmessageを受け取る。
+    キーごとに渡す先のハンドラのタプルを登録時に作っておくので、messageごとの処理は
+    キーの計算と辞書の参照のみ。
+    """
+
+    def __init__(self, key_fn: TMessageKeyFn):
+        self._key_fn = key_fn
+        self._handlers: list[tuple[TMessageHandler, frozenset | None]] = []
+        # キー -> 渡す先のハンドラ（登録順）、キーが登録されていないmessageの渡す先
+        self._routes: dict[Hashable, tuple[TMessageHandler, ...]] = {}
+        self._default: tuple[TMessageHandler, ...] = ()
+
+    def add(
+        self, handler: TMessageHandler, keys: Iterable[Hashable] | None = None
+    ) -> MessageRouter:
+        self._handlers.append((handler, None if keys is None else frozenset(keys)))
+        self._compile()
+        return self
+
+    def remove(self, handler: TMessageHandler) -> MessageRouter:
+        self._handlers = [(h, keys) for h, keys in self._handlers if h != handler]
+        self._compile()
+        return self
+
+    def route(self, msg: Any) -> tuple[TMessageHandler, ...]:
+        """messageを渡す先のハンドラ"""
+        return self._routes.get(self._key_fn(msg), self._default)
+
+    def _compile(self) -> None:
+        self._default = tuple(h for h, keys in self._handlers if keys is None)
+        all_keys = set()
+        for _, keys in self._handlers:
+            if keys is not None:
+                all_keys |= keys
+        self._routes = {
+            key: tuple(h for h, keys in self._handlers if keys is None or key in keys)
+            for key in all_keys
+        }
+
+    def __call__(self, msg: Any, ws: ClientWebSocketResponse) -> None:
+        for handler in self._routes.get(self._key_fn(msg), self._default):
+            handler(msg, ws)
+
+    def __len__(self) -> int:
+        return len(self._handlers)
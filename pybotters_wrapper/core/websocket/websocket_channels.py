@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Generic, Literal, NamedTuple, TypeVar, Union, cast
+from typing import Any, Generic, Hashable, Literal, NamedTuple, TypeVar, Union, cast
 
 TChannelName = TypeVar("TChannelName")
 TParameterTemplateInput = TypeVar("TParameterTemplateInput")
@@ -74,6 +74,23 @@ class WebSocketChannels(
         """PositionStore用のチャンネルをsubscribeする"""
         raise NotImplementedError("position channel")
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        """受信したmessageのチャンネル（トピック）を表すキー。
+
+        MessageRouterがmessageを関心のあるハンドラにだけ渡すのに使う。キーを持たない
+        message（と未対応の取引所）はNoneで、全てのmessageを受け取るハンドラにのみ渡る。
+        """
+        return None
+
+    @classmethod
+    def supports_message_key(cls) -> bool:
+        """get_message_keyを実装しているか（keysを指定したハンドラを登録できるか）"""
+        return (
+            cls.get_message_key.__func__
+            is not WebSocketChannels.get_message_key.__func__
+        )
+
     def _get_endpoint(self, parameter: TParameterTemplateInput) -> str:
         assert self._ENDPOINT is not None
         return self._ENDPOINT
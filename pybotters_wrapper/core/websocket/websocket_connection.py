@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import random
+import time
 from typing import Awaitable, Callable, Literal, Optional, TypeAlias, TypeVar, Union
 
 import pybotters
 from loguru import logger
 from pybotters.typedefs import WsBytesHandler, WsJsonHandler, WsStrHandler
-from pybotters.ws import WebSocketRunner
+from pybotters.ws import ClientWebSocketResponse, WebSocketRunner
 
+from ..json_decoder import TJsonLoads, default_json_loads
 from .websocket_channels import WebSocketChannels
+from .websocket_connection_stats import WebSocketConnectionStats
 
 TWsHandler: TypeAlias = WsStrHandler | WsBytesHandler | WsJsonHandler
 TWebsocketChannels = TypeVar("TWebsocketChannels", bound=WebSocketChannels)
@@ -17,7 +21,37 @@ TWebsocketOnReconnectionCallback = Callable[
 ]
 
 
+class _WebSocketRunner(WebSocketRunner):
+    """接続が切れた時（connectedがTrueからFalseになった時）にコールバックを呼ぶWebSocketRunner"""
+
+    def __init__(self, *args, on_disconnected: Callable[[], None], **kwargs):
+        self._connected = False
+        self._on_disconnected = on_disconnected
+        super(_WebSocketRunner, self).__init__(*args, **kwargs)
+        # 接続ループ自体が終了した場合（セッションのcloseなど）も切断とみなす
+        self._task.add_done_callback(lambda _: self._on_disconnected())
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @connected.setter
+    def connected(self, connected: bool) -> None:
+        disconnected = self._connected and not connected
+        self._connected = connected
+        if disconnected:
+            self._on_disconnected()
+
+
+def _frame_size(data: str | bytes) -> int:
+    # テキストフレームはUTF-8のバイト数（文字数ではない）
+    return len(data.encode()) if isinstance(data, str) else len(data)
+
+
 class WebSocketConnection:
+    # 再接続を試みてから接続できるまで待つ秒数（超えたら次の試行に移る）
+    _RECONNECT_TIMEOUT = 10.0
+
     def __init__(
         self,
         endpoint: str,
@@ -25,22 +59,33 @@ class WebSocketConnection:
         hdlr: TWsHandler | list[TWsHandler],
         send_type: Literal["json", "str", "byte"] | None,
         hdlr_type: Literal["json", "str", "byte"] | None,
+        *,
+        json_loads: TJsonLoads | None = None,
     ):
         self._ws: WebSocketRunner | None = None
         self._endpoint = endpoint
         self._send = send
         if isinstance(hdlr, list):
-            self._hdlr = lambda msg, ws: [c(msg, ws) for c in hdlr]  # noqa
+            self._hdlr = self._chain_handlers(hdlr)
         else:
             self._hdlr = hdlr
         self._send_type = send_type or self._guess_type(send)
         self._hdlr_type = hdlr_type or self._guess_type(send)
+        self._disconnected = asyncio.Event()
+        # 切断を検知してon_disconnectionの呼び出し・再接続をするタスク
+        self._disconnection_task: asyncio.Task | None = None
+        # 計測（無効時はNone）
+        self._stats: WebSocketConnectionStats | None = None
+        # hdlr_typeが"json"の時のデコード関数（デフォルトはorjsonなどがあればそれを使う）
+        self._json_loads = json_loads or default_json_loads()
 
     async def connect(
         self,
         client: "pybotters.APIClient",
         auto_reconnect: bool = False,
         on_reconnection: Optional[TWebsocketOnReconnectionCallback] = None,
+        on_disconnection: Optional[TWebsocketOnReconnectionCallback] = None,
+        reconnect_backoff: tuple[float, float] = (0.5, 30.0),
         **kwargs,
     ) -> WebSocketConnection:
         """
@@ -51,6 +96,12 @@ class WebSocketConnection:
             auto_reconnect (bool, optional): 自動再接続を有効にするか。デフォルトは False。
             on_reconnection (WebsocketOnReconnectionCallback, optional): 再接続時に実行する
                 コールバック。デフォルトは None。
+            on_disconnection (WebsocketOnReconnectionCallback, optional): 切断を検知する
+                たびに（auto_reconnectに関わらず。有効時は再接続の前に）実行するコールバック。
+                デフォルトは None。
+            reconnect_backoff (tuple[float, float], optional): 再接続の待ち時間の初期値と
+                上限（秒）。試行ごとに倍にし、0からその値までの一様乱数だけ待つ。
+                デフォルトは (0.5, 30.0)。
             **kwargs: `pybotters.WebSocketRunner`の引数。
 
         Returns:
@@ -58,58 +109,207 @@ class WebSocketConnection:
         """
         await self._ws_connect(client, **kwargs)
 
-        # pybotters自動で再接続するのでそれで事足りる？
-        if auto_reconnect:
-            asyncio.create_task(self._auto_reconnect(client, on_reconnection, **kwargs))
+        if auto_reconnect or on_disconnection is not None:
+            self._disconnection_task = asyncio.create_task(
+                self._watch_disconnection(
+                    client,
+                    auto_reconnect,
+                    on_reconnection,
+                    on_disconnection,
+                    reconnect_backoff,
+                    **kwargs,
+                )
+            )
 
         return self
 
     async def close(self):
-        if self._ws is not None:
-            self._ws._task.cancel()  # noqa
+        if self._disconnection_task is not None:
+            self._disconnection_task.cancel()
             try:
-                await self._ws._task
+                await self._disconnection_task
             except asyncio.CancelledError:
                 ...
-        self._ws = None
+            self._disconnection_task = None
+        await self._close_ws()
 
-    async def _auto_reconnect(
+    async def _close_ws(self):
+        # 自分で閉じた場合は切断として扱わないように先に外しておく
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            ws._task.cancel()  # noqa
+            try:
+                await ws._task
+            except asyncio.CancelledError:
+                ...
+
+    async def _watch_disconnection(
         self,
         client: "pybotters.APIClient",
+        auto_reconnect: bool,
         on_reconnection: Optional[TWebsocketOnReconnectionCallback] = None,
+        on_disconnection: Optional[TWebsocketOnReconnectionCallback] = None,
+        reconnect_backoff: tuple[float, float] = (0.5, 30.0),
         **kwargs,
     ):
+        initial, maximum = reconnect_backoff
         while True:
-            if not self.connected:
-                logger.debug(f"websocket disconnected: {self._endpoint} {self._send}")
+            # WebSocketRunnerの切断・終了で起きる
+            await self._disconnected.wait()
+            self._disconnected.clear()
+            logger.debug(f"websocket disconnected: {self._endpoint} {self._send}")
+
+            if on_disconnection is not None:
+                await self._call(on_disconnection, client)
+
+            if not auto_reconnect:
+                # pybottersのWebSocketRunnerが自身で（クールダウン後に）再接続する
+                continue
+
+            attempt = 0
+            while True:
+                # exponential backoff（full jitter）
+                delay = min(maximum, initial * 2**attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+                attempt += 1
 
                 # 一部の取引所はトークンの更新などをしないといけないので、そういう時に使うはず。
                 if on_reconnection is not None:
-                    if asyncio.iscoroutinefunction(on_reconnection):
-                        await on_reconnection(self, client)
-                    else:
-                        on_reconnection(self, client)
+                    await self._call(on_reconnection, client)
 
                 # pybottersのWebSocketRunnerのタスクを終了する
-                await self.close()
+                await self._close_ws()
+
+                if client._session.closed:
+                    return
+
+                try:
+                    await asyncio.wait_for(
+                        self._ws_connect(client, **kwargs), self._RECONNECT_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"websocket reconnection timed out (attempt={attempt}): "
+                        f"{self._endpoint}"
+                    )
+                else:
+                    break
 
-                await self._ws_connect(client, **kwargs)
+            logger.debug(f"websocket recovered: {self._endpoint} {self._send}")
 
-                logger.debug(f"websocket recovered: {self._endpoint} {self._send}")
+    async def _call(self, callback: TWebsocketOnReconnectionCallback, client):
+        if asyncio.iscoroutinefunction(callback):
+            await callback(self, client)
+        else:
+            callback(self, client)
 
-            await asyncio.sleep(15)
+    def _on_disconnected(self, ws: WebSocketRunner):
+        # 閉じた・置き換えたrunnerからの通知は無視する
+        if ws is self._ws:
+            self._disconnected.set()
 
     async def _ws_connect(self, client: pybotters.Client, **kwargs):
-        params = {
-            f"send_{self._send_type}": self._send,
-            f"hdlr_{self._hdlr_type}": self._hdlr,
-        }
-        self._ws = await client.ws_connect(self._endpoint, **params, **kwargs)
+        params = {f"send_{self._send_type}": self._send}
+        # 受信サイズを計測できるようにJSONも文字列で受け取って自分でデコードする
+        hdlr_type = "str" if self._hdlr_type == "json" else self._hdlr_type
+        if asyncio.iscoroutinefunction(self._hdlr):
+            params[f"hdlr_{hdlr_type}"] = self._on_frame_async
+        else:
+            params[f"hdlr_{hdlr_type}"] = self._on_frame
+        # pybotters.Client.ws_connect相当（切断を検知するためにrunnerを差し替えている）
+        kwargs.setdefault("heartbeat", 10.0)
+        ws: WebSocketRunner = _WebSocketRunner(
+            self._endpoint,
+            client._session,
+            on_disconnected=lambda: self._on_disconnected(ws),
+            **params,
+            **kwargs,
+        )
+        self._ws = ws
+        await ws.wait()
+
+    def _on_frame(self, data: str | bytes, ws: ClientWebSocketResponse) -> None:
+        stats = self._stats
+        if stats is None:
+            if self._hdlr_type == "json":
+                try:
+                    data = self._json_loads(data)
+                except ValueError:
+                    return
+            self._hdlr(data, ws)
+            return
+
+        size = _frame_size(data)
+        if self._hdlr_type == "json":
+            try:
+                data = self._json_loads(data)
+            except ValueError:
+                return
+        start = time.perf_counter()
+        try:
+            self._hdlr(data, ws)
+        finally:
+            stats.on_frame(size, time.perf_counter() - start)
+
+    async def _on_frame_async(
+        self, data: str | bytes, ws: ClientWebSocketResponse
+    ) -> None:
+        stats = self._stats
+        size = 0 if stats is None else _frame_size(data)
+        if self._hdlr_type == "json":
+            try:
+                data = self._json_loads(data)
+            except ValueError:
+                return
+        if stats is None:
+            await self._hdlr(data, ws)
+            return
+        start = time.perf_counter()
+        try:
+            await self._hdlr(data, ws)
+        finally:
+            stats.on_frame(size, time.perf_counter() - start)
+
+    def set_stats(self, enabled: bool, max_samples: int = 10000) -> WebSocketConnection:
+        """受信フレーム数・サイズとハンドラの処理時間の計測を有効・無効にする"""
+        if not enabled:
+            self._stats = None
+        elif self._stats is None:
+            self._stats = WebSocketConnectionStats(max_samples)
+        return self
+
+    def set_json_loads(self, json_loads: TJsonLoads) -> WebSocketConnection:
+        """受信したJSONのデコード関数を設定する（次に受信するフレームから適用）"""
+        self._json_loads = json_loads
+        return self
+
+    def get_stats(self) -> dict | None:
+        """計測値（無効時はNone）"""
+        return None if self._stats is None else self._stats.to_dict()
+
+    @property
+    def stats(self) -> WebSocketConnectionStats | None:
+        return self._stats
+
+    @property
+    def endpoint(self) -> str:
+        return self._endpoint
 
     @property
     def connected(self) -> bool:
         return False if self._ws is None else self._ws.connected
 
+    @staticmethod
+    def _chain_handlers(hdlr: list[TWsHandler]) -> TWsHandler:
+        # messageごとにリストを作らないように、タプルを順に呼ぶだけの関数にまとめる
+        handlers = tuple(hdlr)
+
+        def _hdlr(msg, ws):
+            for handler in handlers:
+                handler(msg, ws)
+
+        return _hdlr
+
     @classmethod
     def _guess_type(
         cls, send: str | dict | list[dict]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Iterable
+
+
+class WebSocketConnectionStats:
+    """WebSocketConnectionの計測値。
+
+    受信したフレーム数・サイズ（バイト数。テキストフレームはUTF-8でのバイト数）と、フレームごとのハンドラの処理時間（秒。
+    JSONのデコードは含まない）を記録する。処理時間は直近``max_samples``件と、
+    ``HISTOGRAM_BOUNDS``を上限とするヒストグラムで保持する。
+    """
+
+    # ヒストグラムの各binの上限（秒）
+    HISTOGRAM_BOUNDS = (
+        1e-6,
+        2e-6,
+        5e-6,
+        1e-5,
+        2e-5,
+        5e-5,
+        1e-4,
+        2e-4,
+        5e-4,
+        1e-3,
+        2e-3,
+        5e-3,
+        1e-2,
+        float("inf"),
+    )
+
+    def __init__(self, max_samples: int = 10000):
+        assert max_samples > 0
+        self._max_samples = max_samples
+        self.frames = 0
+        self.bytes = 0
+        self.max_handler_time = 0.0
+        self.histogram = [0] * len(self.HISTOGRAM_BOUNDS)
+        self.started_at = time.monotonic()
+        self._handler_times: deque[float] = deque(maxlen=max_samples)
+
+    def on_frame(self, size: int, handler_time: float) -> None:
+        self.frames += 1
+        self.bytes += size
+        self._handler_times.append(handler_time)
+        self.histogram[bisect_left(self.HISTOGRAM_BOUNDS, handler_time)] += 1
+        if handler_time > self.max_handler_time:
+            self.max_handler_time = handler_time
+
+    def handler_time(self, q: float) -> float | None:
+        """保持している処理時間のq分位点（0 <= q <= 1）。計測値がない場合はNone"""
+        assert 0 <= q <= 1
+        if not self._handler_times:
+            return None
+        times = sorted(self._handler_times)
+        return times[round(q * (len(times) - 1))]
+
+    def reset(self) -> None:
+        self.frames = 0
+        self.bytes = 0
+        self.max_handler_time = 0.0
+        self.histogram = [0] * len(self.HISTOGRAM_BOUNDS)
+        self.started_at = time.monotonic()
+        self._handler_times.clear()
+
+    @classmethod
+    def merge(
+        cls, stats: Iterable[WebSocketConnectionStats]
+    ) -> WebSocketConnectionStats:
+        """複数の接続（同じendpointへの接続など）の計測値をまとめる"""
+        stats = list(stats)
+        merged = cls(max(s._max_samples for s in stats))
+        for s in stats:
+            merged.frames += s.frames
+            merged.bytes += s.bytes
+            merged.max_handler_time = max(merged.max_handler_time, s.max_handler_time)
+            merged.histogram = [a + b for a, b in zip(merged.histogram, s.histogram)]
+            merged.started_at = min(merged.started_at, s.started_at)
+            merged._handler_times.extend(s._handler_times)
+        return merged
+
+    def to_dict(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "elapsed": elapsed,
+            "frames_per_sec": self.frames / elapsed if elapsed > 0 else 0.0,
+            "bytes_per_sec": self.bytes / elapsed if elapsed > 0 else 0.0,
+            "handler_p50": self.handler_time(0.5),
+            "handler_p99": self.handler_time(0.99),
+            "handler_max": self.max_handler_time if self.frames else None,
+            "handler_histogram": dict(zip(self.HISTOGRAM_BOUNDS, self.histogram)),
+        }
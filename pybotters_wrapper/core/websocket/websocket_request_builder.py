@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import heapq
 from collections import defaultdict
 from typing import Any, Literal, NamedTuple, Self
 
@@ -12,10 +13,22 @@ class WebsocketRequest(NamedTuple):
     send: str | dict | list[dict]
 
 
+class _Subscription(NamedTuple):
+    # 1回の購読で登録したパラメーター（同じ接続で購読する）と正規化ストアの名前
+    parameters: list
+    store_names: set[str]
+
+
 class WebSocketRequestBuilder:
+    _STORE_NAMES = ("ticker", "trades", "orderbook", "order", "execution", "position")
+
     def __init__(self, channels: WebSocketChannels):
         self._channels = channels
         self._request_lists: dict = defaultdict(list)
+        # endpoint -> そのendpointで購読している正規化ストアの名前
+        self._store_names: dict[str, set[str]] = defaultdict(set)
+        # endpoint -> 購読（シャーディングの単位）
+        self._subscriptions: dict[str, list[_Subscription]] = defaultdict(list)
 
     def get(
         self,
@@ -24,6 +37,7 @@ class WebSocketRequestBuilder:
     ) -> list[WebsocketRequest]:
         if request_customizer is not None:
             new_lists = {}
+            new_store_names: dict[str, set[str]] = defaultdict(set)
             # 動的にリクエスト内容を書き換える必要がある場合にcustomizerを使う
             # （例：kucoinのwebsocket endopoint、binanceのlisten key）
             for endpoint, request_list in self._request_lists.items():
@@ -31,9 +45,82 @@ class WebSocketRequestBuilder:
                     endpoint, request_list
                 )
                 new_lists[new_endpoint] = new_request_list
+                new_store_names[new_endpoint] |= self._store_names.get(endpoint, set())
             self._request_lists = new_lists
+            self._store_names = new_store_names
         return [WebsocketRequest(k, v) for (k, v) in self._request_lists.items()]
 
+    def get_shards(
+        self,
+        *,
+        max_streams_per_connection: int | None = None,
+        shards: int | None = None,
+        request_customizer: WebSocketRequestCustomizer | None = None,
+    ) -> list[tuple[WebsocketRequest, set[str]]]:
+        """endpointごとの購読を複数の接続に分けたリクエストと、その接続で購読している
+        正規化ストアの名前のリスト。
+
+        1接続あたりのパラメーター数をmax_streams_per_connection以下にするか、endpointごとに
+        最大shards個の接続に分ける（パラメーターの多い購読から順に、その時点でパラメーターの
+        最も少ない接続に割り当てる）。1回の購読で登録したパラメーター（bitFlyerの板と
+        スナップショットなど）は分けずに同じ接続にまとめる（1つでmax_streams_per_connection
+        を超える場合はそれだけで1接続）。customizerは接続ごとに適用する。
+        """
+        if (max_streams_per_connection is None) == (shards is None):
+            raise ValueError(
+                "Either max_streams_per_connection or shards must be specified"
+            )
+
+        results = []
+        for endpoint, subscriptions in self._subscriptions.items():
+            # 同じパラメーターの購読は1つにまとめる
+            unique: dict[str, _Subscription] = {}
+            for s in subscriptions:
+                key = str(s.parameters)
+                if key in unique:
+                    unique[key].store_names.update(s.store_names)
+                else:
+                    unique[key] = _Subscription(s.parameters, set(s.store_names))
+
+            items = list(unique.values())
+            packed: list[list[_Subscription]] = []
+            if shards is not None:
+                # (パラメーター数, 接続の番号)のヒープから最も少ない接続を選ぶ
+                bins: list[list[int]] = [[] for _ in range(min(shards, len(items)))]
+                heap = [(0, i) for i in range(len(bins))]
+                order = sorted(
+                    range(len(items)), key=lambda j: -len(items[j].parameters)
+                )
+                for j in order:
+                    n_streams, i = heapq.heappop(heap)
+                    bins[i].append(j)
+                    heapq.heappush(heap, (n_streams + len(items[j].parameters), i))
+                # 接続もその中のパラメーターも購読した順に並べる
+                for b in sorted(sorted(b) for b in bins if b):
+                    packed.append([items[j] for j in b])
+            else:
+                max_streams = max_streams_per_connection  # type: ignore
+                n_streams = 0
+                for s in items:
+                    if not packed or n_streams + len(s.parameters) > max_streams:
+                        packed.append([])
+                        n_streams = 0
+                    packed[-1].append(s)
+                    n_streams += len(s.parameters)
+
+            for shard in packed:
+                request_list = [p for s in shard for p in s.parameters]
+                store_names = set().union(*(s.store_names for s in shard))
+                shard_endpoint = endpoint
+                if request_customizer is not None:
+                    shard_endpoint, request_list = request_customizer(
+                        endpoint, request_list
+                    )
+                results.append(
+                    (WebsocketRequest(shard_endpoint, request_list), store_names)
+                )
+        return results
+
     def subscribe(
         self,
         channel: str
@@ -72,16 +159,30 @@ class WebSocketRequestBuilder:
                     raise TypeError(f"Unsupported: {_channel}")
             return self
 
+    @property
+    def channels(self) -> WebSocketChannels:
+        return self._channels
+
+    def store_names(self, endpoint: str) -> set[str]:
+        """endpointで購読している正規化ストアの名前（チャンネル名で購読したもののみ）"""
+        return set(self._store_names.get(endpoint, ()))
+
     def subscribe_specific(self, endpoint: str, parameter: Any) -> Self:
+        self._subscriptions[endpoint].append(_Subscription([parameter], set()))
         return self._register(endpoint, parameter)
 
     def _subscribe_by_channel_name(self, channel_name: str, **kwargs) -> Self:
         subscribe_item = self._channels.channel(channel_name, **kwargs)
-        if isinstance(subscribe_item, list):
-            for item in subscribe_item:
-                self._register(item.endpoint, item.parameter)
-        else:
-            self._register(subscribe_item.endpoint, subscribe_item.parameter)
+        items = subscribe_item if isinstance(subscribe_item, list) else [subscribe_item]
+        store_names = {channel_name} if channel_name in self._STORE_NAMES else set()
+        subscriptions: dict[str, _Subscription] = {}
+        for item in items:
+            self._register(item.endpoint, item.parameter)
+            self._store_names[item.endpoint] |= store_names
+            if item.endpoint not in subscriptions:
+                subscriptions[item.endpoint] = _Subscription([], store_names)
+                self._subscriptions[item.endpoint].append(subscriptions[item.endpoint])
+            subscriptions[item.endpoint].parameters.append(item.parameter)
         return self
 
     def _register(self, endpoint: str, parameter: Any) -> Self:
@@ -12,3 +12,11 @@ class RequestError(PybottersWrapperError):
 
 class UnsupportedStoreError(PybottersWrapperError):
     """Raised when an unsupported operation is attempted."""
+
+
+class StoreNotReadyError(PybottersWrapperError, TimeoutError):
+    """Raised when stores did not receive any data before the timeout."""
+
+    def __init__(self, stores: list[str]):
+        super(StoreNotReadyError, self).__init__(f"Stores not ready: {stores}")
+        self.stores = stores
@@ -25,6 +25,7 @@ from .gmocoin import GMOCoinWrapperFactory
 from .kucoin import KuCoinFuturesWrapperFactory, KuCoinSpotWrapperFactory
 from .okx import OKXWrapperFactory
 from .phemex import PhemexWrapperFactory
+from .process import ProcessDataStoreWrapper
 from .sandbox import SandboxAPIWrapper, SandboxDataStoreWrapper, SandboxEngine
 
 _EXCHANGE2FACTORY: dict[str, Type[WrapperFactory]] = {
@@ -68,6 +69,12 @@ def create_store(
     return _EXCHANGE2FACTORY[exchange].create_store(store)
 
 
+def create_process_store(
+    exchange: str, *, apis: dict[str, list[str]] | str | None = None
+) -> ProcessDataStoreWrapper:
+    return ProcessDataStoreWrapper(exchange, _EXCHANGE2FACTORY[exchange], apis=apis)
+
+
 def create_store_and_api(
     exchange: str,
     client: pybotters.Client,
@@ -127,7 +134,16 @@ async def create_and_connect_websocket_connection(
     hdlr_type: Literal["json", "str", "byte"] | None = None,
     auto_reconnect: bool = False,
     on_reconnection: TWebsocketOnReconnectionCallback | None = None,
+    on_disconnection: TWebsocketOnReconnectionCallback | None = None,
+    reconnect_backoff: tuple[float, float] = (0.5, 30.0),
     **kwargs,
 ) -> WebSocketConnection:
     conn = create_websocket_connection(endpoint, send, hdlr, send_type, hdlr_type)
-    return await conn.connect(client, auto_reconnect, on_reconnection, **kwargs)
+    return await conn.connect(
+        client,
+        auto_reconnect,
+        on_reconnection,
+        on_disconnection,
+        reconnect_backoff,
+        **kwargs,
+    )
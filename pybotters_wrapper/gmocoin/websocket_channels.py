@@ -1,3 +1,5 @@
+from typing import Any, Hashable
+
 from ..core import WebSocketChannels
 
 
@@ -6,6 +8,12 @@ class GMOCoinWebsocketChannels(WebSocketChannels):
     _PRIVATE_ENDPOINT = "wss://api.coin.z.com/ws/private/v1"
     _ENDPOINT = _PUBLIC_ENDPOINT
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        if isinstance(msg, dict):
+            return msg.get("channel")
+        return None
+
     def ticker(self, symbol: str, **kwargs) -> dict:
         return {
             "channel": "ticker",
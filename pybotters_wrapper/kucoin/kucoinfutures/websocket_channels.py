@@ -1,5 +1,5 @@
 import uuid
-from typing import Literal
+from typing import Any, Hashable, Literal
 
 from ...core import WebSocketChannels
 
@@ -19,6 +19,13 @@ class KuCoinFuturesWebSocketChannels(
 ):
     _ENDPOINT = "DYNAMIC_ENDPOINT"
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        # "/market/match:BTC-USDT"など購読したトピック
+        if isinstance(msg, dict) and msg.get("type") == "message":
+            return msg.get("topic")
+        return None
+
     def ticker(self, symbol: str, **kwargs) -> str:
         return self.contract_market_ticker_v2(symbol)
 
@@ -1,5 +1,5 @@
 import uuid
-from typing import Literal
+from typing import Any, Hashable, Literal
 
 from ...core import WebSocketChannels
 
@@ -22,6 +22,13 @@ class KuCoinSpotWebSocketChannels(
 ):
     _ENDPOINT = "DYNAMIC_ENDPOINT"
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        # "/market/match:BTC-USDT"など購読したトピック
+        if isinstance(msg, dict) and msg.get("type") == "message":
+            return msg.get("topic")
+        return None
+
     def ticker(self, symbol: str, **kwargs) -> str:
         return self.market_ticker(symbol)
 
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Any, Hashable, Literal
 
 from ..core import WebSocketChannels
 
@@ -23,5 +23,11 @@ class OKXWebSocketChannels(WebSocketChannels[Literal["ticker"], dict, dict]):
     def books(self, symbol: str) -> dict:
         return {"channel": "books", "instId": symbol}
 
+    @classmethod
+    def get_message_key(cls, msg: Any) -> Hashable | None:
+        if isinstance(msg, dict) and "data" in msg and "arg" in msg:
+            return msg["arg"].get("channel")
+        return None
+
     def _parameter_template(self, parameter: dict) -> dict:
         return {"op": "subscribe", "args": [parameter]}
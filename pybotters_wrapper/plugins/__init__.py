@@ -1 +1,11 @@
-from .factory import binningbook, bookticker, pnl, poller, timebar, volumebar
+from .factory import (
+    binningbook,
+    bookticker,
+    orderbook_features,
+    pnl,
+    poller,
+    recorder,
+    replayer,
+    timebar,
+    volumebar,
+)
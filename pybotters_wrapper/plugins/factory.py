@@ -12,10 +12,12 @@ from ..core import APIWrapper, DataStoreWrapper
 from .market import (
     BinningBook,
     BookTicker,
+    OrderbookFeatures,
     TimeBarStreamDataFrame,
     VolumeBarStreamDataFrame,
 )
 from .periodic import Poller
+from .recorder import WebSocketRecorder, WebSocketReplayer
 from .status import PnL
 from .watcher import ExecutionWatcher
 from .writer import DataStoreWaitCSVWriter, DataStoreWatchCSVWriter
@@ -84,6 +86,18 @@ def bookticker(store: DataStoreWrapper, symbol: str) -> BookTicker:
     return BookTicker(store, symbol)
 
 
+def orderbook_features(
+    store: DataStoreWrapper,
+    symbol: str,
+    *,
+    bps: float = 10.0,
+    recompute_interval: int = 1000,
+) -> OrderbookFeatures:
+    return OrderbookFeatures(
+        store, symbol, bps=bps, recompute_interval=recompute_interval
+    )
+
+
 def poller(
     client_or_api: pybotters.Client | APIWrapper,
     *,
@@ -148,3 +162,19 @@ def wait_csvwriter(
         columns=columns,
         flush=flush,
     )
+
+
+def recorder(
+    store: DataStoreWrapper,
+    path: str,
+    *,
+    flush: bool = False,
+    flush_interval: float = 1.0,
+) -> WebSocketRecorder:
+    return WebSocketRecorder(store, path, flush=flush, flush_interval=flush_interval)
+
+
+def replayer(
+    store: DataStoreWrapper, path: str, *, speed: float | None = None
+) -> WebSocketReplayer:
+    return WebSocketReplayer(store, path, speed=speed)
@@ -1,3 +1,4 @@
 from .bar import TimeBarStreamDataFrame, VolumeBarStreamDataFrame
 from .binning_book import BinningBook
 from .book_ticker import BookTicker
+from .orderbook_features import OrderbookFeatures
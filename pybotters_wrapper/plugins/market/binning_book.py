@@ -2,17 +2,14 @@ from __future__ import annotations
 
 import numpy as np
 import pybotters
-from pybotters.store import DataStore
 
-from ...core import DataStoreWrapper, OrderbookStore
+from ...core import DataStoreWrapper, OrderbookDelta
 from ...utils import BinBucket
 from ..base_plugin import Plugin
-from ..mixins import WatchStoreMixin
+from ..mixins import WatchOrderbookDeltaMixin
 
 
-class BinningBook(WatchStoreMixin, Plugin):
-    watch_store: OrderbookStore
-
+class BinningBook(WatchOrderbookDeltaMixin, Plugin):
     def __init__(
         self,
         store: DataStoreWrapper,
@@ -29,20 +26,14 @@ class BinningBook(WatchStoreMixin, Plugin):
             "BUY": BinBucket(min_bin, max_bin, pips, precision),
         }
         self._mid = None
-        self.init_watch_store(store.orderbook)
-
-    def _on_watch(self, store: DataStore, operation: str, source: dict, data: dict):
-        if data["symbol"] == self._symbol:
-            if operation in ("insert", "update"):
-                self._insert(data["side"], data["price"], data["size"])
-            elif operation == "delete":
-                self._delete(data["side"], data["price"], data["size"])
-
-    def _insert(self, side: str, price: float, size: float):
-        self._buckets[side].insert(price, size)  # type: ignore
-
-    def _delete(self, side: str, price: float, size: float):
-        self._buckets[side].delete(price, size)  # type: ignore
+        self.init_watch_orderbook_delta(store.orderbook[symbol])
+
+    def _on_delta(self, delta: OrderbookDelta):
+        # 一度の更新分の差分をsideごとにまとめて反映する
+        for side, code in (("SELL", -1), ("BUY", 1)):
+            mask = delta.side == code
+            if mask.any():
+                self._buckets[side].update_many(delta.price[mask], delta.size[mask])
 
     def asks(
         self,
@@ -43,10 +43,11 @@ class BookTicker(WatchStoreMixin, WaitStoreMixin, Plugin):
         self._store = store
         self._symbol = symbol
         self.init_watch_store(store.trades)
-        self.init_wait_store(store.orderbook)
+        # 対象symbolの板の更新のみで起きる
+        self.init_wait_store(store.orderbook[symbol])
 
     def _on_wait(self):
-        asks, bids = self.wait_store.sorted({"symbol": self._symbol}).values()
+        asks, bids = self.wait_store.sorted().values()
         if len(asks) and len(bids):
             self._update(asks=asks, bids=bids)
 
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+
+from ...core import DataStoreWrapper, OrderbookDelta, PriceLevels
+from ..base_plugin import Plugin
+from ..mixins import PublishQueueMixin, WatchOrderbookDeltaMixin
+
+
+class OrderbookFeatures(WatchOrderbookDeltaMixin, PublishQueueMixin, Plugin):
+    """板の特徴量（最良気配・microprice・imbalance・mid±bps以内の厚み）。
+
+    板の差分フィード（watch_delta）から自前の板と各特徴量を差分更新するので、更新のたびに
+    ``sorted()``で板全体を並べ直す必要がない。mid±bpsの範囲は最良気配が変わった時に
+    前後の境界の間にある価格だけを足し引きする。足し引きを続けると浮動小数点の誤差が
+    溜まるので、``recompute_interval``回の差分ごと（と板のどちらかのsideが空になった後。
+    切断時のinvalidateで空になり、再接続後のsnapshotで埋め直される場合など）に範囲内の
+    サイズの合計を計算し直す。特徴量はプロパティ（O(1)）で参照するか、更新ごとに``Item``を
+    配信するキュー（subscribe）で受け取る。
+    """
+
+    class Item(NamedTuple):
+        best_ask: float | None
+        best_ask_size: float | None
+        best_bid: float | None
+        best_bid_size: float | None
+        ask_depth: float | None  # mid +bps以内のSELLのサイズの合計
+        bid_depth: float | None  # mid -bps以内のBUYのサイズの合計
+
+        @property
+        def mid(self) -> float | None:
+            if self.best_ask is None or self.best_bid is None:
+                return None
+            return (self.best_ask + self.best_bid) / 2
+
+        @property
+        def spread(self) -> float | None:
+            if self.best_ask is None or self.best_bid is None:
+                return None
+            return self.best_ask - self.best_bid
+
+        @property
+        def microprice(self) -> float | None:
+            """最良気配を反対側のサイズで加重平均した価格"""
+            if self.best_ask is None or self.best_bid is None:
+                return None
+            total = self.best_ask_size + self.best_bid_size
+            return (
+                self.best_ask * self.best_bid_size + self.best_bid * self.best_ask_size
+            ) / total
+
+        @property
+        def imbalance(self) -> float | None:
+            """最良気配のサイズの偏り（-1〜1、買いが厚いほど大きい）"""
+            if self.best_ask is None or self.best_bid is None:
+                return None
+            return (self.best_bid_size - self.best_ask_size) / (
+                self.best_bid_size + self.best_ask_size
+            )
+
+        @property
+        def depth_imbalance(self) -> float | None:
+            """mid±bps以内の厚みの偏り（-1〜1、買いが厚いほど大きい）"""
+            if self.ask_depth is None or self.bid_depth is None:
+                return None
+            total = self.ask_depth + self.bid_depth
+            return (self.bid_depth - self.ask_depth) / total if total > 0 else 0.0
+
+    def __init__(
+        self,
+        store: DataStoreWrapper,
+        symbol: str,
+        *,
+        bps: float = 10.0,
+        recompute_interval: int = 1000,
+    ):
+        assert bps > 0
+        assert recompute_interval > 0
+        self._symbol = symbol
+        self._bps = bps
+        self._recompute_interval = recompute_interval
+        self._deltas = 0
+        self._store = store
+        self._levels: dict[str, PriceLevels] = {
+            "SELL": PriceLevels(),
+            "BUY": PriceLevels(),
+        }
+        # mid±bpsの境界（SELLは上限、BUYは下限）と範囲内のサイズの合計
+        self._bounds: dict[str, float | None] = {"SELL": None, "BUY": None}
+        self._depths: dict[str, float] = {"SELL": 0.0, "BUY": 0.0}
+        self._item = self.Item(None, None, None, None, None, None)
+        self.init_publish_queue()
+        self.init_watch_orderbook_delta(store.orderbook[symbol])
+
+    def _on_delta_start(self):
+        asks, bids = self.watch_delta_store.sorted().values()
+        for side, items in (("SELL", asks), ("BUY", bids)):
+            levels = self._levels[side] = PriceLevels()
+            for i in items:
+                levels.put({"price": i["price"], "size": i["size"]})
+        self._bounds = {"SELL": None, "BUY": None}
+        self._depths = {"SELL": 0.0, "BUY": 0.0}
+        self._deltas = 0
+        self._update()
+
+    def _on_delta(self, delta: OrderbookDelta):
+        for code, price, size in zip(
+            delta.side.tolist(), delta.price.tolist(), delta.size.tolist()
+        ):
+            side = "BUY" if code == 1 else "SELL"
+            self._apply(side, price, size)
+        self._deltas += 1
+        if self._deltas >= self._recompute_interval:
+            # 境界を未定にすると_move_boundが範囲内の合計を全体から求め直す
+            self._deltas = 0
+            self._bounds = {"SELL": None, "BUY": None}
+        self._update()
+        self.put(self._item)
+
+    def _apply(self, side: str, price: float, size: float):
+        levels = self._levels[side]
+        old = levels.items.get(price)
+        old_size = 0.0 if old is None else old["size"]
+        if size == 0:
+            levels.remove(price)
+        else:
+            levels.put({"price": price, "size": size})
+
+        # 現在の範囲内の価格であれば厚みに反映する
+        bound = self._bounds[side]
+        if bound is not None and (price <= bound if side == "SELL" else price >= bound):
+            self._depths[side] += size - old_size
+
+    def _update(self):
+        asks, bids = self._levels["SELL"], self._levels["BUY"]
+        best_ask, best_bid = asks.first(), bids.first(reverse=True)
+        if best_ask is None or best_bid is None:
+            self._bounds = {"SELL": None, "BUY": None}
+            self._depths = {"SELL": 0.0, "BUY": 0.0}
+            self._item = self.Item(
+                None if best_ask is None else best_ask["price"],
+                None if best_ask is None else best_ask["size"],
+                None if best_bid is None else best_bid["price"],
+                None if best_bid is None else best_bid["size"],
+                None,
+                None,
+            )
+            return
+
+        mid = (best_ask["price"] + best_bid["price"]) / 2
+        self._move_bound("SELL", mid * (1 + self._bps / 10000))
+        self._move_bound("BUY", mid * (1 - self._bps / 10000))
+        self._item = self.Item(
+            best_ask["price"],
+            best_ask["size"],
+            best_bid["price"],
+            best_bid["size"],
+            self._depths["SELL"],
+            self._depths["BUY"],
+        )
+
+    def _move_bound(self, side: str, bound: float):
+        old = self._bounds[side]
+        if old == bound:
+            return
+        levels = self._levels[side]
+        prices, items = levels.prices, levels.items
+        # SELLの範囲は境界以下（prices[:i]）、BUYの範囲は境界以上（prices[i:]）
+        index = bisect_right if side == "SELL" else bisect_left
+        if old is None:
+            # 範囲が決まっていなかった場合は全体から求める
+            i = index(prices, bound)
+            band = prices[:i] if side == "SELL" else prices[i:]
+            self._depths[side] = sum(items[p]["size"] for p in band)
+        else:
+            # 古い境界と新しい境界の間の価格だけを足し引きする
+            lhs = index(prices, min(old, bound))
+            rhs = index(prices, max(old, bound))
+            diff = sum(items[p]["size"] for p in prices[lhs:rhs])
+            widen = bound > old if side == "SELL" else bound < old
+            self._depths[side] += diff if widen else -diff
+        self._bounds[side] = bound
+
+    @property
+    def item(self) -> OrderbookFeatures.Item:
+        return self._item
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @property
+    def bps(self) -> float:
+        return self._bps
+
+    @property
+    def best_ask(self) -> float | None:
+        return self._item.best_ask
+
+    @property
+    def best_ask_size(self) -> float | None:
+        return self._item.best_ask_size
+
+    @property
+    def best_bid(self) -> float | None:
+        return self._item.best_bid
+
+    @property
+    def best_bid_size(self) -> float | None:
+        return self._item.best_bid_size
+
+    @property
+    def mid(self) -> float | None:
+        return self._item.mid
+
+    @property
+    def spread(self) -> float | None:
+        return self._item.spread
+
+    @property
+    def microprice(self) -> float | None:
+        return self._item.microprice
+
+    @property
+    def imbalance(self) -> float | None:
+        return self._item.imbalance
+
+    @property
+    def ask_depth(self) -> float | None:
+        return self._item.ask_depth
+
+    @property
+    def bid_depth(self) -> float | None:
+        return self._item.bid_depth
+
+    @property
+    def depth_imbalance(self) -> float | None:
+        return self._item.depth_imbalance
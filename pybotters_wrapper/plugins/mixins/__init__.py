@@ -1,4 +1,5 @@
 from .publish_queue import PublishQueueMixin
 from .wait_store import WaitMultipleStoreMixin, WaitStoreMixin
+from .watch_delta import WatchOrderbookDeltaMixin
 from .watch_store import WatchMultipleStoreMixin, WatchStoreMixin
 from .writer import CSVWriterMixin, WriterMixin
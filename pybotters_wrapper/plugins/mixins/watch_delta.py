@@ -0,0 +1,55 @@
+import asyncio
+
+from ...core import OrderbookDelta, OrderbookStore, SymbolOrderbook
+from .helper import execute_fn, generate_attribute_checker
+
+
+class WatchOrderbookDeltaMixin:
+    __store: OrderbookStore | SymbolOrderbook
+    __break: bool
+    __watch_delta_task: asyncio.Task
+
+    _checker = generate_attribute_checker(
+        "init_watch_orderbook_delta", "_WatchOrderbookDeltaMixin__store"
+    )
+
+    def init_watch_orderbook_delta(self, store: OrderbookStore | SymbolOrderbook):
+        self.__store = store
+        self.__break = False
+        self.__watch_delta_task = asyncio.create_task(self.__run_watch_delta_task())
+
+    async def __run_watch_delta_task(self):
+        """OrderbookStoreの差分フィード（watch_delta）監視"""
+        is_aw_on_delta = asyncio.iscoroutinefunction(self._on_delta)
+
+        with self.__store.watch_delta() as stream:
+            # 購読を開始した時点の板を取り込む（以降の変化は全てdeltaで届く）
+            self._on_delta_start()
+            async for delta in stream:
+                await execute_fn(self._on_delta, is_aw_on_delta, delta)
+
+                if self.__break:
+                    break
+
+    def _on_delta_start(self):
+        ...
+
+    def _on_delta(self, delta: OrderbookDelta):
+        ...
+
+    @_checker
+    def set_break(self):
+        self.__break = True
+
+    @_checker
+    def stop(self):
+        if self.__watch_delta_task is not None and not self.__watch_delta_task.done():
+            self.__watch_delta_task.cancel()
+
+    @property
+    def watch_delta_store(self):
+        return self.__store
+
+    @property
+    def watch_delta_task(self):
+        return self.__watch_delta_task
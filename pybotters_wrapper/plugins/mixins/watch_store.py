@@ -1,7 +1,10 @@
+from __future__ import annotations
+
 import asyncio
 
-from pybotters.store import DataStore, StoreChange
+from pybotters.store import DataStore, StoreChange, StoreStream
 
+from ...core import BackpressureStoreStream, TBackpressurePolicy, TConflateKey
 from .helper import execute_fn, generate_attribute_checker
 
 
@@ -16,16 +19,34 @@ def _unwrap(
     )
 
 
+def _watch(
+    store: DataStore,
+    maxsize: int | None,
+    policy: TBackpressurePolicy,
+    key: TConflateKey | None,
+) -> StoreStream:
+    # pybottersのDataStore.watchは上限・policyを受け取らないので同じキューを持つストリームを
+    # 作る。watchを持つそれ以外のストア（NormalizedDataStore・SymbolOrderbookなど）はその
+    # watchに上限・policyを渡す
+    if isinstance(store, DataStore) and type(store).watch is DataStore.watch:
+        return BackpressureStoreStream(store, maxsize, policy, key)
+    return store.watch(maxsize=maxsize, policy=policy, key=key)
+
+
 class WatchStoreMixin:
     __store: DataStore
     __break: bool
     __watch_task: asyncio.Task
+    __stream: BackpressureStoreStream | None
+    __backpressure: tuple[int | None, TBackpressurePolicy, TConflateKey | None]
 
     _checker = generate_attribute_checker("init_watch_store", "_WatchStoreMixin__store")
 
     def init_watch_store(self, store: DataStore):
         self.__store = store
         self.__break = False
+        self.__stream = None
+        self.__backpressure = (None, "unbounded", None)
         self.__watch_task = asyncio.create_task(self.__run_watch_task())
 
     async def __run_watch_task(self):
@@ -37,7 +58,9 @@ class WatchStoreMixin:
 
         await execute_fn(self._on_watch_before, is_aw_on_before)
 
-        with self.__store.watch() as stream:
+        with _watch(self.__store, *self.__backpressure) as stream:
+            if isinstance(stream, BackpressureStoreStream):
+                self.__stream = stream
             c1: StoreChange = await stream.get()
             await execute_fn(self._on_watch_first, is_aw_on_first, *_unwrap(c1))
             await execute_fn(self._on_watch, is_aw_on_watch, *_unwrap(c1))
@@ -76,6 +99,25 @@ class WatchStoreMixin:
         if self.__watch_task is not None and not self.__watch_task.done():
             self.__watch_task.cancel()
 
+    @_checker
+    def set_watch_backpressure(
+        self,
+        maxsize: int | None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+    ):
+        """watchのキューの上限とpolicy（unbounded・drop_oldest・conflate）を設定する"""
+        BackpressureStoreStream._check(maxsize, policy)
+        self.__backpressure = (maxsize, policy, key)
+        if self.__stream is not None:
+            self.__stream.set_backpressure(maxsize, policy, key)
+        return self
+
+    @_checker
+    def get_watch_stats(self) -> dict | None:
+        """watchのキューの計測値（BackpressureStoreStream.get_stats）。watch開始前はNone"""
+        return None if self.__stream is None else self.__stream.get_stats()
+
     @property
     def watch_store(self):
         return self.__store
@@ -0,0 +1,2 @@
+from .recorder import WebSocketRecorder
+from .replayer import WebSocketReplayer
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pybotters.ws import ClientWebSocketResponse
+
+    from ...core import DataStoreWrapper
+
+import asyncio
+import json
+import threading
+import time
+
+from ..base_plugin import Plugin
+
+
+class WebSocketRecorder(Plugin):
+    """DataStoreWrapperが受信したwebsocket messageをファイルに追記するプラグイン。
+
+    1行1message（JSON Lines）で、各行は``[受信時刻（UNIX秒）, 接続ID, message]``。
+    接続IDは受信したwebsocketごとに出現順に振る連番。WebSocketReplayerで再生できる。
+    受信時はストアが書き換える前のmessageをJSONにしてバッファに溜めるだけで、ファイルへは
+    ``flush_interval``秒ごとにまとめて（executorで）書き込む。closeで残りを書き込む。
+    """
+
+    def __init__(
+        self,
+        store: DataStoreWrapper,
+        path: str,
+        *,
+        flush: bool = False,
+        flush_interval: float = 1.0,
+    ):
+        assert flush_interval > 0
+        self._store = store
+        self._path = path
+        self._flush = flush
+        self._flush_interval = flush_interval
+        self._f = open(path, "a", encoding="utf-8")
+        self._conn_ids: dict[Any, int] = {}
+        self._count = 0
+        # 書き込み待ちの行（executorのスレッドとcloseの書き込みは_lockで直列にする）
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        self._task = asyncio.create_task(self._run())
+        # ストアが書き換える前のmessageを記録する
+        self._store.add_message_handler(self._on_message, before_store=True)
+
+    def _on_message(self, msg: Any, ws: ClientWebSocketResponse) -> None:
+        conn_id = self._conn_ids.get(ws)
+        if conn_id is None:
+            conn_id = self._conn_ids[ws] = len(self._conn_ids)
+        record = [time.time(), conn_id, msg]
+        self._buffer.append(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        )
+        self._count += 1
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            if self._buffer:
+                await loop.run_in_executor(None, self._write)
+
+    def _write(self) -> None:
+        with self._lock:
+            if self._f.closed:
+                return
+            lines, self._buffer = self._buffer, []
+            self._f.write("".join(lines))
+            if self._flush:
+                self._f.flush()
+
+    def close(self) -> None:
+        """記録をやめて、残りを書き込んでファイルを閉じる"""
+        if not self._f.closed:
+            self._store.remove_message_handler(self._on_message)
+            self._task.cancel()
+            self._write()
+            with self._lock:
+                self._f.close()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def count(self) -> int:
+        """記録したmessage数"""
+        return self._count
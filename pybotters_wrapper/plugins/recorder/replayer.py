@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from ...core import DataStoreWrapper
+
+import asyncio
+import time
+
+from ...core import TJsonLoads, default_json_loads
+from ..base_plugin import Plugin
+
+
+class _ReplayWebSocket:
+    """再生時にmessageと一緒に渡すwebsocket（ストアからの送信は捨てる）"""
+
+    def __init__(self, conn_id: int):
+        self.conn_id = conn_id
+        self.closed = False
+
+    async def send_json(self, data: Any, **kwargs) -> None:
+        ...
+
+    async def send_str(self, data: str, **kwargs) -> None:
+        ...
+
+    async def send_bytes(self, data: bytes, **kwargs) -> None:
+        ...
+
+
+class WebSocketReplayer(Plugin):
+    """WebSocketRecorderで記録したmessageをDataStoreWrapper.onmessageに流すプラグイン。
+
+    speedを指定すると記録時の間隔（の1/speed倍）で、Noneの場合は待たずに流す。
+    待たずに流す場合も、正規化ストアのwatchが動けるようにmessageごとにイベントループに
+    制御を返す（受信ループと同じ）。
+    """
+
+    def __init__(
+        self,
+        store: DataStoreWrapper,
+        path: str,
+        *,
+        speed: float | None = None,
+        json_loads: TJsonLoads | None = None,
+    ):
+        assert speed is None or speed > 0
+        self._store = store
+        self._path = path
+        self._speed = speed
+        self._json_loads = json_loads or default_json_loads()
+        self._websockets: dict[int, _ReplayWebSocket] = {}
+
+    async def replay(self) -> dict:
+        """再生して、流したmessage数・経過時間（秒）・1秒あたりのmessage数を返す"""
+        frames = 0
+        first_received_at: float | None = None
+        started_at = time.monotonic()
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                received_at, conn_id, msg = self._json_loads(line)
+                if self._speed is None:
+                    await asyncio.sleep(0)
+                else:
+                    if first_received_at is None:
+                        first_received_at = received_at
+                    offset = (received_at - first_received_at) / self._speed
+                    await asyncio.sleep(
+                        max(0.0, started_at + offset - time.monotonic())
+                    )
+                self._store.onmessage(msg, self._websocket(conn_id))
+                frames += 1
+
+        elapsed = time.monotonic() - started_at
+        return {
+            "frames": frames,
+            "elapsed": elapsed,
+            "frames_per_sec": frames / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _websocket(self, conn_id: int) -> _ReplayWebSocket:
+        ws = self._websockets.get(conn_id)
+        if ws is None:
+            ws = self._websockets[conn_id] = _ReplayWebSocket(conn_id)
+        return ws
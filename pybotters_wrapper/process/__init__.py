@@ -0,0 +1,2 @@
+from .store_wrapper import ProcessDataStoreWrapper
+from .worker import NormalizedChangeBatcher
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Literal, Type, cast
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.context import SpawnProcess
+    from multiprocessing.synchronize import Event
+
+    from ..core import WrapperFactory
+
+import asyncio
+import multiprocessing
+
+import pybotters
+from loguru import logger
+
+from ..core import (
+    DataStoreWrapper,
+    ExecutionStore,
+    OrderbookStore,
+    OrderStore,
+    PositionStore,
+    TDataStoreManager,
+    TickerStore,
+    TradesStore,
+)
+from .worker import TChangeBatch, run_worker
+
+
+class ProcessDataStoreWrapper(DataStoreWrapper[TDataStoreManager]):
+    """websocketの接続・messageのデコード・pybottersのストアの更新・正規化をワーカープロセスで
+    行うDataStoreWrapper。
+
+    ワーカープロセスは通常のDataStoreWrapperを持ち、正規化ストアへの変更をイベントループの
+    1ターン分ずつバッチでこのプロセスに送る。このラッパーの正規化ストアはそれを反映した
+    ワーカープロセスの正規化ストアの写しで、元ストア（``store``）は更新されない。このプロセスで
+    正規化ストアを変更しても（invalidateなど）ワーカープロセスには伝わらず、以降のバッチで
+    上書きされうる。
+
+    subscribe・initialize（ストア名で指定したもののみ）・connectの引数はワーカープロセスに
+    渡すため、pickleできる値のみ使える（コールバックは渡せない）。APIキーはclientではなく
+    ``apis``で渡す。
+    """
+
+    # ワーカープロセスの終了を待つ秒数（超えたらterminateする）
+    _STOP_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        exchange: str,
+        factory: Type[WrapperFactory],
+        *,
+        apis: dict[str, list[str]] | str | None = None,
+    ):
+        self._exchange = exchange
+        self._apis = apis
+        self._subscriptions: list[tuple[Any, str | None, dict]] = []
+        self._initialize_names: list[str | tuple[str, dict]] = []
+        self._process: SpawnProcess | None = None
+        self._conn: Connection | None = None
+        self._stop_event: Event | None = None
+        self._receive_task: asyncio.Task | None = None
+        self._updated: asyncio.Event | None = None
+        normalized_store_builder = factory.create_normalized_store_builder()
+        store = normalized_store_builder._store
+        super(ProcessDataStoreWrapper, self).__init__(
+            store,
+            exchange_property=factory.create_exchange_property(),
+            store_initializer=factory.create_store_initializer(store),
+            normalized_store_builder=normalized_store_builder,
+            websocket_request_builder=factory.create_websocket_request_builder(),
+            websocket_request_customizer=factory.create_websocket_request_customizer(),
+        )
+
+    def _build_normalized_stores(
+        self,
+    ) -> dict[
+        str,
+        TickerStore
+        | TradesStore
+        | OrderbookStore
+        | OrderStore
+        | ExecutionStore
+        | PositionStore,
+    ]:
+        # ワーカープロセスから送られる変更を反映するだけなので、元ストアとは同期しない
+        return cast(
+            dict[
+                str,
+                TickerStore
+                | TradesStore
+                | OrderbookStore
+                | OrderStore
+                | ExecutionStore
+                | PositionStore,
+            ],
+            self._normalized_store_builder.get(),
+        )
+
+    async def initialize(
+        self,
+        aws_or_names: list[Any],
+        client: pybotters.Client | None = None,
+    ) -> ProcessDataStoreWrapper:
+        """ワーカープロセスで接続前に実行する初期化を登録する（ストア名で指定したもののみ）"""
+        for aw_or_name in aws_or_names:
+            if not isinstance(aw_or_name, (str, tuple)):
+                raise TypeError(
+                    f"Only store names can be initialized in worker: {aw_or_name}"
+                )
+            self._initialize_names.append(aw_or_name)
+        return self
+
+    def subscribe(
+        self,
+        channel: str
+        | list[str | tuple[str, dict]]
+        | Literal["all", "public", "private"],
+        symbol: str | None = None,
+        **kwargs,
+    ) -> ProcessDataStoreWrapper:
+        self._subscriptions.append((channel, symbol, kwargs))
+        return self
+
+    async def connect(
+        self, client: pybotters.Client | None = None, **kwargs
+    ) -> ProcessDataStoreWrapper:
+        """ワーカープロセスを起動し、ワーカープロセスでの接続（waitsの待機を含む）を待つ。
+
+        clientは使わない（ワーカープロセスでapisからpybotters.Clientを作る）。kwargsは
+        ワーカープロセスのDataStoreWrapper.connectに渡す。
+        """
+        if self._process is not None:
+            raise RuntimeError("Worker process is already running")
+
+        ctx = multiprocessing.get_context("spawn")
+        recv_conn, send_conn = ctx.Pipe(duplex=False)
+        self._stop_event = ctx.Event()
+        self._process = ctx.Process(
+            target=run_worker,
+            args=(
+                self._exchange,
+                self._subscriptions,
+                self._initialize_names,
+                kwargs,
+                self._apis,
+                send_conn,
+                self._stop_event,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        # ワーカープロセスが終了した時にrecvがEOFErrorになるように、送信側は閉じておく
+        send_conn.close()
+        self._conn = recv_conn
+
+        ready = asyncio.get_running_loop().create_future()
+        self._updated = asyncio.Event()
+        self._receive_task = asyncio.create_task(self._receive(recv_conn, ready))
+        try:
+            await ready
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def _receive(self, conn: Connection, ready: asyncio.Future) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                kind, payload = await loop.run_in_executor(None, conn.recv)
+            except (EOFError, OSError):
+                break
+            if kind == "batch":
+                self._apply(payload)
+            elif kind == "ready":
+                ready.set_result(None)
+            elif kind == "error":
+                logger.error(f"Worker process failed: {payload}")
+                if not ready.done():
+                    ready.set_exception(RuntimeError(payload))
+        if not ready.done():
+            ready.set_exception(RuntimeError("Worker process exited before ready"))
+
+    def _apply(self, batch: TChangeBatch) -> None:
+        applied = {}
+        for name, op, items in batch:
+            store = self._normalized_stores.get(name)
+            if store is None:
+                continue
+            if op == "reset":
+                store._clear()
+                store._insert(items)
+            else:
+                getattr(store, f"_{op}")(items)
+            applied[name] = store
+        for store in applied.values():
+            store._on_changes_applied()
+        if self._updated is not None:
+            self._updated.set()
+            self._updated.clear()
+
+    async def wait(self):
+        """ワーカープロセスからの変更が反映されるまで待つ"""
+        if self._updated is None:
+            raise RuntimeError("Worker process is not running")
+        await self._updated.wait()
+
+    async def close(self):
+        if self._process is not None:
+            assert self._stop_event is not None
+            self._stop_event.set()
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._process.join, self._STOP_TIMEOUT
+            )
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+        if self._receive_task is not None:
+            await self._receive_task
+            self._receive_task = None
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @property
+    def exchange(self) -> str:
+        return self._exchange
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
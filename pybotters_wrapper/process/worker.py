@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.synchronize import Event
+
+    from ..core import NormalizedDataStore
+
+import asyncio
+import traceback
+
+import pybotters
+from pybotters.store import Item
+
+# (正規化ストア名, オペレーション, アイテム)。オペレーションはinsert/update/delete/reset
+TChangeBatch = list[tuple[str, str, list[Item]]]
+
+
+class NormalizedChangeBatcher:
+    """正規化ストアへの変更を記録して、イベントループの1ターン分ずつまとめて送るクラス。
+
+    正規化ストアが内部に持つストア（_normalized_store）の_putをインスタンスごとに差し替えて、
+    watchと同じ経路で変更を記録する（_insertなどを経由しないColumnarTradesStoreの書き込みや
+    _clear・_removeによる削除も含む）。ターンの終わりに連続する同じストア・オペレーションを
+    まとめたバッチをsendに渡す。アイテムは"info"を除いた浅いコピーを送る（info_modeは"none"に
+    する）。キーのないストアはアイテムを特定して更新・削除できないので、そのターンに
+    update・deleteがあった場合は代わりにターンの終わりの全アイテムを"reset"として送る。
+    """
+
+    def __init__(self, send: Callable[[TChangeBatch], Any]):
+        self._send = send
+        self._pending: TChangeBatch = []
+        # resetを送るストア（正規化ストア名 -> 正規化ストア）
+        self._resets: dict[str, NormalizedDataStore] = {}
+
+    def hook(self, name: str, store: NormalizedDataStore) -> None:
+        store.set_info_mode("none")
+        inner = store._normalized_store
+        put = inner._put
+        keyless = not inner._keys
+
+        def _put(operation: str, source: Item | None, item: Item) -> None:
+            put(operation, source, item)
+            if keyless and operation != "insert":
+                self._reset(name, store)
+            else:
+                # 格納したアイテムは後続のupdateで書き換わるのでコピーを送る
+                self._append(name, operation, dict(item))
+
+        inner._put = _put  # type: ignore
+
+    def _schedule(self) -> None:
+        if not self._pending and not self._resets:
+            try:
+                asyncio.get_running_loop().call_soon(self.flush)
+            except RuntimeError:
+                pass
+
+    def _append(self, name: str, op: str, item: Item) -> None:
+        if name in self._resets:
+            # ターンの終わりに全アイテムを送るので記録しない
+            return
+        self._schedule()
+        pending = self._pending
+        if pending and pending[-1][0] == name and pending[-1][1] == op:
+            pending[-1][2].append(item)
+        else:
+            pending.append((name, op, [item]))
+
+    def _reset(self, name: str, store: NormalizedDataStore) -> None:
+        self._schedule()
+        self._resets[name] = store
+
+    def flush(self) -> None:
+        if not self._pending and not self._resets:
+            return
+        batch, self._pending = self._pending, []
+        resets, self._resets = self._resets, {}
+        if resets:
+            batch = [b for b in batch if b[0] not in resets]
+            for name, store in resets.items():
+                batch.append((name, "reset", [dict(item) for item in store]))
+        self._send(batch)
+
+
+def run_worker(
+    exchange: str,
+    subscriptions: list[tuple[Any, str | None, dict]],
+    initialize_names: list[str | tuple[str, dict]],
+    connect_kwargs: dict,
+    apis: dict[str, list[str]] | str | None,
+    conn: Connection,
+    stop_event: Event,
+) -> None:
+    """ワーカープロセスのエントリーポイント。
+
+    DataStoreWrapperを作ってwebsocketに接続し、正規化ストアの変更をバッチでconnに送る。
+    送るメッセージは("ready", None)・("batch", TChangeBatch)・("error", str)のいずれか。
+    """
+    try:
+        asyncio.run(
+            _run(
+                exchange,
+                subscriptions,
+                initialize_names,
+                connect_kwargs,
+                apis,
+                conn,
+                stop_event,
+            )
+        )
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+async def _run(
+    exchange: str,
+    subscriptions: list[tuple[Any, str | None, dict]],
+    initialize_names: list[str | tuple[str, dict]],
+    connect_kwargs: dict,
+    apis: dict[str, list[str]] | str | None,
+    conn: Connection,
+    stop_event: Event,
+) -> None:
+    # 親プロセスでのimport時の循環を避ける
+    from ..factory import create_store
+
+    batcher = NormalizedChangeBatcher(lambda batch: conn.send(("batch", batch)))
+    async with pybotters.Client(apis=apis) as client:
+        # messageの受信から正規化までを1ターンで終わらせて、1ターン分を1バッチで送る
+        store = create_store(exchange).set_inline_normalization(True)
+        for name, normalized_store in store._normalized_stores.items():
+            if normalized_store is not None:
+                batcher.hook(name, normalized_store)
+        for channel, symbol, kwargs in subscriptions:
+            store.subscribe(channel, symbol=symbol, **kwargs)
+
+        if initialize_names:
+            await store.initialize(initialize_names, client)
+        await store.connect(client, **connect_kwargs)
+        batcher.flush()
+        conn.send(("ready", None))
+
+        await asyncio.get_running_loop().run_in_executor(None, stop_event.wait)
+        await store.close()
@@ -73,6 +73,11 @@ class SandboxEngine:
         order_item = order_item[0]
         self._store.order._delete([order_item])
 
+    def _restart_matching_task(self) -> None:
+        """tradesストアが差し替えられた時に、新しいストアをwatchし直す"""
+        self._task.cancel()
+        self._task = asyncio.create_task(self._matching_task())
+
     async def _matching_task(self):
         with self._store.trades.watch() as stream:
             async for change in stream:
@@ -247,11 +252,13 @@ class SandboxEngine:
         self, order_item: SandboxOrderItem
     ) -> float:
         # todo: 注文サイズ・スリッページの考慮
-        asks, bids = self._store.orderbook.sorted().values()
+        orderbook = self._store.orderbook
         if order_item["side"] == "BUY":
-            return asks[0]["price"]
+            best = orderbook.best_ask(order_item["symbol"])
         else:
-            return bids[0]["price"]
+            best = orderbook.best_bid(order_item["symbol"])
+        assert best is not None
+        return best["price"]
 
     @classmethod
     def register(
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Awaitable, Literal, cast
+from typing import TYPE_CHECKING, Any, Awaitable, Hashable, Literal, cast
 
 if TYPE_CHECKING:
     from pybotters.store import Item
@@ -16,8 +16,12 @@ from pybotters_wrapper.core import (
     OrderbookStore,
     OrderStore,
     PositionStore,
+    TBackpressurePolicy,
+    TConflateKey,
     TDataStoreManager,
     TickerStore,
+    TJsonLoads,
+    TMessageHandler,
     TradesStore,
     TWebsocketOnReconnectionCallback,
 )
@@ -111,10 +115,16 @@ class SandboxDataStoreWrapper(DataStoreWrapper[TDataStoreManager]):
         send: Any | None = None,
         hdlr: WsStrHandler | WsBytesHandler = None,
         waits: list[DataStore | str] | None = None,
+        wait_timeout: float | None = None,
         send_type: Literal["json", "str", "byte"] | None = None,
         hdlr_type: Literal["json", "str", "byte"] | None = None,
         auto_reconnect: bool = False,
         on_reconnection: TWebsocketOnReconnectionCallback | None = None,
+        on_disconnection: TWebsocketOnReconnectionCallback | None = None,
+        reconnect_backoff: tuple[float, float] = (0.5, 30.0),
+        invalidate_on_disconnection: bool = False,
+        max_streams_per_connection: int | None = None,
+        shards: int | None = None,
         **kwargs,
     ) -> SandboxDataStoreWrapper:
         await self._simulate_store.connect(
@@ -123,10 +133,16 @@ class SandboxDataStoreWrapper(DataStoreWrapper[TDataStoreManager]):
             send=send,
             hdlr=hdlr,
             waits=waits,
+            wait_timeout=wait_timeout,
             send_type=send_type,
             hdlr_type=hdlr_type,
             auto_reconnect=auto_reconnect,
             on_reconnection=on_reconnection,
+            on_disconnection=on_disconnection,
+            reconnect_backoff=reconnect_backoff,
+            invalidate_on_disconnection=invalidate_on_disconnection,
+            max_streams_per_connection=max_streams_per_connection,
+            shards=shards,
             **kwargs,
         )
 
@@ -138,6 +154,70 @@ class SandboxDataStoreWrapper(DataStoreWrapper[TDataStoreManager]):
     async def close(self):
         await self._simulate_store.close()
 
+    def set_inline_normalization(self, inline: bool) -> SandboxDataStoreWrapper:
+        self._simulate_store.set_inline_normalization(inline)
+        return self
+
+    def set_stats(self, enabled: bool) -> SandboxDataStoreWrapper:
+        self._simulate_store.set_stats(enabled)
+        return self
+
+    def get_stats(self) -> dict[str, dict]:
+        return self._simulate_store.get_stats()
+
+    def set_watch_backpressure(
+        self,
+        maxsize: int | None,
+        policy: TBackpressurePolicy = "unbounded",
+        key: TConflateKey | None = None,
+        names: list[str] | None = None,
+    ) -> SandboxDataStoreWrapper:
+        self._simulate_store.set_watch_backpressure(maxsize, policy, key, names)
+        return self
+
+    def get_watch_stats(self) -> dict[str, dict]:
+        return self._simulate_store.get_watch_stats()
+
+    def set_connection_stats(self, enabled: bool) -> SandboxDataStoreWrapper:
+        self._simulate_store.set_connection_stats(enabled)
+        return self
+
+    def get_connection_stats(self) -> dict[str, dict]:
+        return self._simulate_store.get_connection_stats()
+
+    def set_json_loads(self, json_loads: TJsonLoads) -> SandboxDataStoreWrapper:
+        self._simulate_store.set_json_loads(json_loads)
+        return self
+
+    def use_columnar_trades(self, capacity: int = 100000) -> SandboxDataStoreWrapper:
+        self._simulate_store.use_columnar_trades(capacity)
+        # エンジンの約定のwatchを差し替えたtradesストアに張り直す
+        if self._engine is not None:
+            self._engine._restart_matching_task()
+        return self
+
+    def invalidate(self, names: list[str] | None = None) -> SandboxDataStoreWrapper:
+        self._simulate_store.invalidate(names)
+        return self
+
+    def add_message_handler(
+        self,
+        handler: TMessageHandler,
+        keys: list[Hashable] | None = None,
+        *,
+        before_store: bool = False,
+    ) -> SandboxDataStoreWrapper:
+        self._simulate_store.add_message_handler(
+            handler, keys, before_store=before_store
+        )
+        return self
+
+    def remove_message_handler(
+        self, handler: TMessageHandler
+    ) -> SandboxDataStoreWrapper:
+        self._simulate_store.remove_message_handler(handler)
+        return self
+
     def onmessage(self, msg: Item, ws: ClientWebSocketResponse) -> None:
         self._simulate_store.onmessage(msg, ws)
 
@@ -36,6 +36,17 @@ class BinBucket:
         self._values[index] = new_size
         self._memo[key] = value
 
+    def update_many(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """keyごとの値をまとめて更新する（keyごとにinsertするのと同じ。0は削除）"""
+        keys_list = keys.tolist()
+        memo = self._memo
+        olds = np.fromiter((memo[k] for k in keys_list), np.float64, len(keys_list))
+        indices = ((keys - self._min_key) / self._pips).astype(int)
+        assert ((0 <= indices) & (indices < self._bucket_num)).all(), "Out-of-index"
+        np.add.at(self._values, indices, values - olds)
+        self._values[indices] = np.around(self._values[indices], self._precision)
+        memo.update(zip(keys_list, values.tolist()))
+
     def delete(self, key: int, value: int) -> None:
         index = self.bucketize(key)
         assert isinstance(index, int)
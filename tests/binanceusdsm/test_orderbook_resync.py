@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from aioresponses import aioresponses
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.binance.orderbook_resync import BinanceFuturesOrderbookResync
+from pybotters_wrapper.exceptions import UnsupportedStoreError
+
+URL = "https://fapi.binance.com/fapi/v1/depth?symbol=BTCUSDT"
+
+
+def depth_update(first_id, last_id, prev_id, bids=(), asks=()):
+    return {
+        "e": "depthUpdate",
+        "E": 1681278004853,
+        "T": 1681278004830,
+        "s": "BTCUSDT",
+        "U": first_id,
+        "u": last_id,
+        "pu": prev_id,
+        "b": [list(b) for b in bids],
+        "a": [list(a) for a in asks],
+    }
+
+
+def snapshot(last_update_id, bids, asks):
+    return {
+        "lastUpdateId": last_update_id,
+        "E": 1681278004853,
+        "T": 1681278004830,
+        "bids": [list(b) for b in bids],
+        "asks": [list(a) for a in asks],
+    }
+
+
+def book(store):
+    return {
+        (i["S"], i["p"]): i["q"] for i in store.store.orderbook.find({"s": "BTCUSDT"})
+    }
+
+
+@pytest.mark.asyncio
+async def test_resync_on_gap():
+    store = pbw.create_store("binanceusdsm")
+
+    async with pbw.create_client() as client:
+        store.enable_orderbook_resync(client)
+        resync = store.orderbook_resync
+        assert isinstance(resync, BinanceFuturesOrderbookResync)
+
+        with aioresponses() as m:
+            m.get(
+                URL,
+                payload=snapshot(100, [("99.0", "1.0")], [("101.0", "1.0")]),
+            )
+            await store._initializer.initialize_orderbook(client, symbol="BTCUSDT")
+        assert resync.is_synced("BTCUSDT")
+
+        # snapshotより前の差分は捨て、snapshotをまたぐ差分から適用する
+        store.store._onmessage(depth_update(90, 99, 89, bids=[("99.0", "9.0")]), None)
+        store.store._onmessage(depth_update(95, 105, 94, bids=[("99.0", "2.0")]), None)
+        store.store._onmessage(
+            depth_update(106, 110, 105, asks=[("102.0", "1.0")]), None
+        )
+        assert book(store) == {
+            ("BUY", "99.0"): "2.0",
+            ("SELL", "101.0"): "1.0",
+            ("SELL", "102.0"): "1.0",
+        }
+        assert resync.gaps == 0
+
+        # pu=115は直前のu=110と連続しないので、適用を保留して再同期する
+        normalized = store.orderbook
+        with aioresponses() as m:
+            m.get(
+                URL,
+                payload=snapshot(
+                    118, [("99.0", "3.0"), ("98.0", "1.0")], [("101.0", "1.0")]
+                ),
+            )
+            store.store._onmessage(
+                depth_update(116, 120, 115, asks=[("103.0", "1.0")]), None
+            )
+            assert resync.gaps == 1 and not resync.is_synced("BTCUSDT")
+            store.store._onmessage(
+                depth_update(121, 125, 120, bids=[("98.0", "0.0")]), None
+            )
+            assert ("SELL", "103.0") not in book(store)
+
+            while resync.resyncs == 0:
+                await asyncio.sleep(0)
+
+        # snapshotを差分として適用し、保留していた差分を再生する
+        assert resync.is_synced("BTCUSDT")
+        assert book(store) == {
+            ("BUY", "99.0"): "3.0",
+            ("SELL", "101.0"): "1.0",
+            ("SELL", "103.0"): "1.0",
+        }
+        assert store.orderbook is normalized
+        await asyncio.sleep(0)
+        assert {(i["side"], i["price"]) for i in normalized.find()} == {
+            ("BUY", 99.0),
+            ("SELL", 101.0),
+            ("SELL", 103.0),
+        }
+
+        store.store._onmessage(
+            depth_update(126, 130, 125, bids=[("97.0", "1.0")]), None
+        )
+        assert book(store)[("BUY", "97.0")] == "1.0"
+        assert resync.gaps == 1 and resync.resyncs == 1
+
+    store.orderbook_resync.close()
+    assert "_onmessage" not in store.store.orderbook.__dict__
+
+
+@pytest.mark.asyncio
+async def test_unsupported():
+    store = pbw.create_store("bitflyer")
+    with pytest.raises(UnsupportedStoreError):
+        store.enable_orderbook_resync(None)
@@ -153,3 +153,49 @@ async def test_with_customizer(builder, customizer, mocker: pytest_mock.MockerFi
         )
 
         assert actual == expected
+
+
+@pytest.mark.asyncio
+async def test_shards_with_customizer(
+    builder, customizer, mocker: pytest_mock.MockerFixture
+):
+    mocker.patch("time.monotonic", return_value=1)
+    symbols = ["BTCUSDT", "ETHUSDT", "XRPUSDT"]
+    for symbol in symbols:
+        builder.subscribe("orderbook", symbol=symbol)
+
+    # customizerは接続ごとに適用する（接続ごとに1つのSUBSCRIBEにまとまる）
+    async with create_client() as client:
+        customizer.set_client(client)
+        actual = builder.get_shards(
+            max_streams_per_connection=2, request_customizer=customizer
+        )
+
+    assert actual == [
+        (
+            WebsocketRequest(
+                "wss://fstream.binance.com/ws",
+                [
+                    {
+                        "method": "SUBSCRIBE",
+                        "params": ["btcusdt@depth", "ethusdt@depth"],
+                        "id": 1 * 10**9,
+                    }
+                ],
+            ),
+            {"orderbook"},
+        ),
+        (
+            WebsocketRequest(
+                "wss://fstream.binance.com/ws",
+                [
+                    {
+                        "method": "SUBSCRIBE",
+                        "params": ["xrpusdt@depth"],
+                        "id": 1 * 10**9,
+                    }
+                ],
+            ),
+            {"orderbook"},
+        ),
+    ]
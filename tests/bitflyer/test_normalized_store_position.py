@@ -58,3 +58,77 @@ def test_ignore_non_execution_event(mocker: pytest_mock.MockerFixture):
 
     assert len(store) == 2
     assert store.find() == expected
+
+
+def _lot(price, size, side="BUY"):
+    return {
+        "product_code": "FX_BTC_JPY",
+        "side": side,
+        "price": price,
+        "size": size,
+        "commission": 0,
+        "sfd": 0,
+    }
+
+
+def _execution(side, size):
+    return {
+        "product_code": "FX_BTC_JPY",
+        "event_type": "EXECUTION",
+        "side": side,
+        "price": 3000000,
+        "size": size,
+        "commission": 0,
+        "sfd": 0,
+    }
+
+
+def test_incremental_sync_with_many_lots(mocker: pytest_mock.MockerFixture):
+    store = pbw.create_factory("bitflyer").create_normalized_store_builder().position()
+    base = store._base_store
+    base._insert([_lot(3000000 + i, 0.01) for i in range(500)])
+    store._on_watch(StoreChange(base, "insert", None, {}))
+    assert len(store) == 500
+
+    normalize = mocker.spy(store, "_normalize")
+
+    # 反対売買で先頭の建玉が一つ消え、二つ目の建玉が部分的に減る
+    base._onmessage([_execution("SELL", 0.015)])
+    store._on_watch(StoreChange(base, "delete", None, {}))
+    assert normalize.call_count == 1
+    assert len(store) == 499
+    assert store.find()[0]["price"] == 3000001.0
+    assert store.find()[0]["size"] == 0.005
+
+    # 同じ向きの約定で建玉が一つ増える
+    base._onmessage([_execution("BUY", 0.02)])
+    store._on_watch(StoreChange(base, "insert", None, {}))
+    assert normalize.call_count == 2
+    assert len(store) == 500
+
+    # 変化がなければ正規化しない
+    store._on_watch(StoreChange(base, "insert", None, {}))
+    assert normalize.call_count == 2
+
+    # 一括同期と同じ結果になる
+    items = store.find()
+    store.synchronize()
+    assert store.find() == items
+
+
+def test_sync_goes_through_store_operations(mocker: pytest_mock.MockerFixture):
+    store = pbw.create_factory("bitflyer").create_normalized_store_builder().position()
+    base = store._base_store
+    base._insert([_lot(3000000, 0.01), _lot(3000001, 0.01)])
+    store._on_watch(StoreChange(base, "insert", None, {}))
+
+    put = mocker.spy(store._normalized_store, "_put")
+    remove = mocker.spy(store, "_remove")
+    replace = mocker.spy(store, "_replace")
+    base._onmessage([_execution("SELL", 0.015)])
+    base._onmessage([_execution("BUY", 0.02)])
+    store._on_watch(StoreChange(base, "insert", None, {}))
+
+    assert remove.call_count == 1 and replace.call_count == 1
+    assert [c.args[0] for c in put.call_args_list] == ["delete", "update", "insert"]
+    assert [item["size"] for item in store.find()] == [0.005, 0.02]
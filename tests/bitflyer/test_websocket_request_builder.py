@@ -111,3 +111,46 @@ def test_all(patch_time, public_send, private_expected):
     )
 
     assert expected == actual
+
+
+def test_shards(patch_time, public_send):
+    builder = bitFlyerWrapperFactory.create_websocket_request_builder()
+    builder.subscribe("public", symbol="FX_BTC_JPY")
+    endpoint = "wss://ws.lightstream.bitflyer.com/json-rpc"
+
+    # 板とスナップショットは同じ接続で購読する
+    actual = builder.get_shards(max_streams_per_connection=2)
+    expected = [
+        (WebsocketRequest(endpoint, public_send[:2]), {"ticker", "trades"}),
+        (WebsocketRequest(endpoint, public_send[2:]), {"orderbook"}),
+    ]
+    assert actual == expected
+
+    # 1回の購読は分けないので、接続数はshards以下になることがある
+    assert builder.get_shards(shards=2) == expected
+    actual = builder.get_shards(shards=4)
+    assert [names for _, names in actual] == [{"ticker"}, {"trades"}, {"orderbook"}]
+
+    # 同じ購読は1つにまとめる
+    builder.subscribe("ticker", symbol="FX_BTC_JPY")
+    actual = builder.get_shards(max_streams_per_connection=100)
+    assert actual == [
+        (
+            WebsocketRequest(endpoint, public_send),
+            {"ticker", "trades", "orderbook"},
+        )
+    ]
+
+    with pytest.raises(ValueError):
+        builder.get_shards()
+
+
+def test_shards_unsplittable(patch_time):
+    builder = bitFlyerWrapperFactory.create_websocket_request_builder()
+    for symbol in ["FX_BTC_JPY", "BTC_JPY", "ETH_JPY"]:
+        builder.subscribe("orderbook", symbol=symbol)
+
+    # 板（差分とスナップショットの2つ）は分けられないが、接続数はshardsを超えない
+    actual = builder.get_shards(shards=2)
+    assert len(actual) <= 2
+    assert sorted(len(request.send) for request, _ in actual) == [2, 4]
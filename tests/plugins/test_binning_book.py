@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import pybotters_wrapper as pbw
+
+
+class DummyWebSocket:
+    # bitFlyerDataStoreはsnapshotを受け取るとunsubscribeを送る
+    async def send_json(self, data):
+        ...
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_binning_book():
+    store = pbw.create_store("bitflyer")
+    book = pbw.plugins.binningbook(store, "FX_BTC_JPY", max_bin=200, pips=10)
+    await asyncio.sleep(0)
+
+    store.onmessage(
+        bitflyer_board_message(
+            "lightning_board_snapshot",
+            [(101, 1), (105, 2), (112, 3)],
+            [(99, 1), (95, 2)],
+        ),
+        DummyWebSocket(),
+    )
+    await asyncio.sleep(0.01)
+    prices, sizes = book.asks(lower=100, upper=110)
+    assert prices.tolist() == [100, 110]
+    assert sizes.tolist() == [3.0, 3.0]
+    prices, sizes = book.bids(lower=90, upper=90)
+    assert sizes.tolist() == [3.0]
+
+    store.onmessage(
+        bitflyer_board_message("lightning_board", [(101, 0), (105, 1)], [(95, 0)]),
+        DummyWebSocket(),
+    )
+    await asyncio.sleep(0.01)
+    prices, sizes = book.asks(lower=100, upper=110)
+    assert sizes.tolist() == [1.0, 3.0]
+    prices, sizes = book.bids(lower=90, upper=90)
+    assert sizes.tolist() == [1.0]
+
+    book.stop()
+    await store.close()
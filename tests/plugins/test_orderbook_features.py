@@ -0,0 +1,124 @@
+import asyncio
+import random
+
+import pytest
+
+import pybotters_wrapper as pbw
+
+
+class DummyWebSocket:
+    # bitFlyerDataStoreはsnapshotを受け取るとunsubscribeを送る
+    async def send_json(self, data):
+        ...
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+def recompute(store, bps):
+    asks, bids = store.orderbook.sorted({"symbol": "FX_BTC_JPY"}).values()
+    mid = (asks[0]["price"] + bids[0]["price"]) / 2
+    upper, lower = mid * (1 + bps / 10000), mid * (1 - bps / 10000)
+    return (
+        asks[0]["price"],
+        asks[0]["size"],
+        bids[0]["price"],
+        bids[0]["size"],
+        sum(i["size"] for i in asks if i["price"] <= upper),
+        sum(i["size"] for i in bids if i["price"] >= lower),
+    )
+
+
+@pytest.mark.asyncio
+async def test_orderbook_features():
+    store = pbw.create_store("bitflyer")
+    await asyncio.sleep(0)
+    store.onmessage(
+        bitflyer_board_message(
+            "lightning_board_snapshot",
+            [(100.1, 1), (100.4, 2), (102, 3), (110, 1)],
+            [(99.9, 2), (99.6, 1), (98, 5), (90, 1)],
+        ),
+        DummyWebSocket(),
+    )
+    await asyncio.sleep(0.01)
+
+    # 作成前の板も取り込む（mid=100、±50bps=99.5〜100.5）
+    features = pbw.plugins.orderbook_features(store, "FX_BTC_JPY", bps=50)
+    queue = features.subscribe()
+    await asyncio.sleep(0)
+    assert features.item == (100.1, 1, 99.9, 2, 3, 3)
+    assert features.mid == pytest.approx(100)
+    assert features.spread == pytest.approx(0.2)
+    assert features.microprice == pytest.approx((100.1 * 2 + 99.9 * 1) / 3)
+    assert features.imbalance == pytest.approx(1 / 3)
+    assert features.depth_imbalance == 0
+
+    # 最良気配が動くと範囲もずれる（mid=100.2、99.699〜100.701）
+    store.onmessage(
+        bitflyer_board_message("lightning_board", [(100.1, 0)], [(100, 1)]),
+        DummyWebSocket(),
+    )
+    item = await asyncio.wait_for(queue.get(), 1)
+    assert item == (100.4, 2, 100, 1, 2, 3)
+
+    # ランダムな更新（最良気配も動く）でも全体を並べ直した結果と一致する
+    rng = random.Random(0)
+    for _ in range(200):
+        asks = [(rng.randint(1001, 1030) / 10, rng.choice([0, 1, 2])) for _ in range(3)]
+        bids = [(rng.randint(970, 1000) / 10, rng.choice([0, 1, 2])) for _ in range(3)]
+        store.onmessage(
+            bitflyer_board_message("lightning_board", asks, bids), DummyWebSocket()
+        )
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        expected = recompute(store, 50)
+        assert features.item[:4] == expected[:4]
+        assert features.ask_depth == pytest.approx(expected[4])
+        assert features.bid_depth == pytest.approx(expected[5])
+
+    features.stop()
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_orderbook_features_recompute():
+    store = pbw.create_store("bitflyer")
+    await asyncio.sleep(0)
+    store.onmessage(
+        bitflyer_board_message(
+            "lightning_board_snapshot", [(100.1, 0.1), (100.4, 0.2)], [(99.9, 0.3)]
+        ),
+        DummyWebSocket(),
+    )
+    await asyncio.sleep(0.01)
+    features = pbw.plugins.orderbook_features(
+        store, "FX_BTC_JPY", bps=50, recompute_interval=3
+    )
+    await asyncio.sleep(0)
+
+    # 差分更新で溜まった誤差はrecompute_interval回の差分ごとに計算し直される
+    features._depths["SELL"] += 1e-9
+    for size in (0.7, 0.1, 0.3):
+        store.onmessage(
+            bitflyer_board_message("lightning_board", [(100.4, size)], []),
+            DummyWebSocket(),
+        )
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+    assert features.ask_depth == recompute(store, 50)[4]
+
+    features.stop()
+    await store.close()
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import pybotters_wrapper as pbw
+
+
+class DummyWebSocket:
+    # bitFlyerDataStoreはsnapshotを受け取るとunsubscribeを送る
+    async def send_json(self, data):
+        ...
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+def ticker_message(ltp: float) -> dict:
+    return {
+        "params": {
+            "channel": "lightning_ticker_FX_BTC_JPY",
+            "message": {"product_code": "FX_BTC_JPY", "ltp": ltp},
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "record.jsonl")
+    messages = [
+        bitflyer_board_message(
+            "lightning_board_snapshot", [(101, 1), (102, 2)], [(99, 1), (98, 2)]
+        ),
+        ticker_message(100),
+        bitflyer_board_message("lightning_board", [(101, 0), (103, 1)], [(99, 3)]),
+        ticker_message(101),
+    ]
+
+    # ストアがmessageを書き換えても、受信した時点の内容を記録する
+    expected = json.loads(json.dumps(messages))
+
+    store = pbw.create_store("bitflyer")
+    await asyncio.sleep(0)
+    recorder = pbw.plugins.recorder(store, path)
+    ws1, ws2 = DummyWebSocket(), DummyWebSocket()
+    for msg, ws in zip(messages, [ws1, ws2, ws1, ws2]):
+        store.onmessage(msg, ws)
+    await asyncio.sleep(0.01)
+    recorder.close()
+    store.onmessage(ticker_message(102), ws1)
+    assert recorder.count == 4
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [msg for _, _, msg in records] == expected
+    assert [conn_id for _, conn_id, _ in records] == [0, 1, 0, 1]
+    assert records[0][0] <= records[-1][0] <= time.time()
+
+    replayed = pbw.create_store("bitflyer")
+    await asyncio.sleep(0)
+    result = await pbw.plugins.replayer(replayed, path).replay()
+    await asyncio.sleep(0.01)
+    assert result["frames"] == 4 and result["frames_per_sec"] > 0
+    assert replayed.orderbook.sorted() == store.orderbook.sorted()
+    assert replayed.ticker.find()[0]["price"] == 101
+
+    await store.close()
+    await replayed.close()
+
+
+@pytest.mark.asyncio
+async def test_record_buffered(tmp_path):
+    path = str(tmp_path / "record.jsonl")
+    store = pbw.create_store("bitflyer")
+    await asyncio.sleep(0)
+    recorder = pbw.plugins.recorder(store, path, flush=True, flush_interval=0.05)
+
+    # 受信時はバッファに溜めるだけで、flush_intervalごとにまとめて書き込む
+    store.onmessage(ticker_message(100), DummyWebSocket())
+    store.onmessage(ticker_message(101), DummyWebSocket())
+    with open(path) as f:
+        assert f.read() == ""
+    await asyncio.sleep(0.2)
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+
+    store.onmessage(ticker_message(102), DummyWebSocket())
+    recorder.close()
+    with open(path) as f:
+        assert len(f.readlines()) == 3
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_replay_at_recorded_pace(tmp_path):
+    path = tmp_path / "record.jsonl"
+    with open(path, "w") as f:
+        for t, ltp in [(1000.0, 100), (1000.1, 101)]:
+            f.write(json.dumps([t, 0, ticker_message(ltp)]) + "\n")
+
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    result = await pbw.plugins.replayer(store, str(path), speed=2.0).replay()
+    assert result["frames"] == 2
+    assert 0.05 <= result["elapsed"] < 0.5
+    assert store.ticker.find()[0]["price"] == 101
+    await store.close()
@@ -1,12 +1,15 @@
 # mypy: ignore-errors
+import asyncio
 from typing import AsyncGenerator
 
+import pandas as pd
 import pybotters
 import pytest
 import pytest_asyncio
 import pytest_mock
 
 import pybotters_wrapper as pbw
+from pybotters_wrapper.core import ColumnarTradesStore
 from pybotters_wrapper.sandbox import SandboxEngine
 
 EXCHANGE = "bitflyer"
@@ -441,3 +444,30 @@ def test_engine_handle_trigger_market(
         "price": 10,
     } == store.position.find()[0]
     assert 0 == len(store.order)
+
+
+@pytest.mark.asyncio
+async def test_use_columnar_trades(engine: SandboxEngine):
+    store = engine._store
+    # エンジンが差し替え前のtradesストアをwatchし始めてから差し替える
+    await asyncio.sleep(0)
+    assert store.use_columnar_trades() is store
+    assert isinstance(store.trades, ColumnarTradesStore)
+
+    engine.insert_order(SYMBOL, "BUY", 100, 1, "LIMIT")
+    await asyncio.sleep(0)
+    store.trades._insert(
+        [
+            {
+                "id": 1,
+                "symbol": SYMBOL,
+                "side": "SELL",
+                "price": 99.0,
+                "size": 1.0,
+                "timestamp": pd.Timestamp("2023-10-01", tz="UTC"),
+            }
+        ]
+    )
+    await asyncio.sleep(0.01)
+    assert len(store.order) == 0
+    assert len(store.execution) == 1
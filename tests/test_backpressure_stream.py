@@ -0,0 +1,215 @@
+import asyncio
+
+import pytest
+from pybotters.store import DataStore
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.core import BackpressureStoreStream
+from pybotters_wrapper.plugins.base_plugin import Plugin
+from pybotters_wrapper.plugins.mixins import WatchStoreMixin
+
+
+class DummyWebSocket:
+    # bitFlyerDataStoreはsnapshotを受け取るとunsubscribeを送る
+    async def send_json(self, data):
+        ...
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+def drain(stream):
+    changes = []
+    while not stream._queue.empty():
+        changes.append(stream._queue.get_nowait())
+    return changes
+
+
+def test_drop_oldest():
+    store = DataStore(keys=["id"])
+    with BackpressureStoreStream(store, 3, "drop_oldest") as stream:
+        store._insert([{"id": i} for i in range(5)])
+        stats = stream.get_stats()
+        assert stats["depth"] == 3 and stats["max_depth"] == 3
+        assert stats["dropped"] == 2
+        assert [c.data["id"] for c in drain(stream)] == [2, 3, 4]
+    assert store._queues == []
+
+
+def test_conflate():
+    store = DataStore(keys=["id"])
+    with BackpressureStoreStream(store, policy="conflate") as stream:
+        store._insert([{"id": 1, "v": 0}, {"id": 2, "v": 0}])
+        store._update([{"id": 1, "v": 1}, {"id": 1, "v": 2}])
+        store._delete([{"id": 2}])
+        assert stream.get_stats()["conflated"] == 3
+        # 最初に出現した順に、キーごとの最新のchangeのみ残る
+        assert [(c.operation, c.data) for c in drain(stream)] == [
+            ("update", {"id": 1, "v": 2}),
+            ("delete", {"id": 2, "v": 0}),
+        ]
+
+    # キーのないストアはまとめない
+    store = DataStore()
+    with BackpressureStoreStream(store, 2, "conflate") as stream:
+        store._insert([{"id": 1}, {"id": 1}, {"id": 1}])
+        assert stream.get_stats()["dropped"] == 1
+        assert len(drain(stream)) == 2
+
+
+def test_track_times():
+    store = DataStore(keys=["id"])
+    with BackpressureStoreStream(store, 2, "conflate") as stream:
+        queue = stream._queue
+        store._insert([{"id": 0}])
+        queue.track_times(True)
+        store._insert([{"id": 1}])
+        store._update([{"id": 0, "v": 1}])
+        store._insert([{"id": 2}])
+        # id=0は捨てられ、conflateされたものは最初にキューに入った時刻のまま
+        assert len(queue._times) == 2
+        first = queue._times[0]
+        drain(stream)
+        times = queue.take_times()
+        assert times[0] == first and times[0] <= times[1]
+        assert queue.take_times() == []
+
+        queue.track_times(False)
+        store._insert([{"id": 3}])
+        drain(stream)
+        assert queue.take_times() == []
+
+
+def test_unbounded():
+    store = DataStore(keys=["id"])
+    with BackpressureStoreStream(store, 2) as stream:
+        store._insert([{"id": i} for i in range(4)])
+        stats = stream.get_stats()
+        assert stats["depth"] == 4 and stats["overflows"] == 2
+        assert stats["dropped"] == 0
+
+        # 溜まっているchangeにも新しいpolicyを適用する
+        stream.set_backpressure(2, "drop_oldest")
+        assert [c.data["id"] for c in drain(stream)] == [2, 3]
+
+    with pytest.raises(ValueError):
+        BackpressureStoreStream(store, 0)
+    with pytest.raises(ValueError):
+        BackpressureStoreStream(store, 1, "unknown")  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_normalized_store_conflate():
+    messages = [
+        bitflyer_board_message(
+            "lightning_board_snapshot", [(101, 1), (102, 2)], [(99, 1), (98, 2)]
+        ),
+        *[
+            bitflyer_board_message("lightning_board", [(101, i)], [(99, i)])
+            for i in range(2, 10)
+        ],
+        bitflyer_board_message("lightning_board", [(102, 0)], []),
+    ]
+    expected = pbw.create_store("bitflyer").set_inline_normalization(True)
+    store = pbw.create_store("bitflyer")
+    store.set_watch_backpressure(None, "conflate", names=["orderbook"])
+    await asyncio.sleep(0)
+
+    ws = DummyWebSocket()
+    for msg in messages:
+        expected.onmessage(msg, ws)
+        store.onmessage(msg, ws)
+    stats = store.get_watch_stats()["orderbook"]
+    assert stats["policy"] == "conflate" and stats["conflated"] > 0
+    assert stats["depth"] == 4
+
+    await asyncio.sleep(0.01)
+    assert store.orderbook.sorted() == expected.orderbook.sorted()
+    assert store.get_watch_stats()["orderbook"]["depth"] == 0
+
+    await store.close()
+    await expected.close()
+
+
+@pytest.mark.asyncio
+async def test_watch_store_mixin():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    received = []
+
+    class SlowWriter(WatchStoreMixin, Plugin):
+        def __init__(self):
+            self.init_watch_store(store.ticker)
+
+        async def _on_watch(self, store, operation, source, data):
+            received.append(data["price"])
+            await asyncio.sleep(0.01)
+
+    writer = SlowWriter().set_watch_backpressure(2, "drop_oldest")
+    assert writer.get_watch_stats() is None
+    await asyncio.sleep(0)
+
+    for ltp in range(100, 110):
+        store.onmessage(
+            {
+                "params": {
+                    "channel": "lightning_ticker_FX_BTC_JPY",
+                    "message": {"product_code": "FX_BTC_JPY", "ltp": ltp},
+                }
+            },
+            DummyWebSocket(),
+        )
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.05)
+
+    stats = writer.get_watch_stats()
+    assert stats["max_depth"] == 2 and stats["dropped"] > 0
+    assert received[-1] == 109 and len(received) < 10
+    writer.stop()
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_watch_store_mixin_store_watch():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    received = []
+
+    class Writer(WatchStoreMixin, Plugin):
+        def __init__(self, watched):
+            self.init_watch_store(watched)
+
+        def _on_watch(self, store, operation, source, data):
+            received.append(data["price"])
+
+    # 上書きされたwatch（SymbolOrderbookのsymbolごとのwatch）に上限とpolicyを渡す
+    writer = Writer(store.orderbook["FX_BTC_JPY"])
+    writer.set_watch_backpressure(1, "drop_oldest")
+    await asyncio.sleep(0)
+    store.onmessage(
+        bitflyer_board_message("lightning_board_snapshot", [(101, 1)], [(99, 1)]),
+        DummyWebSocket(),
+    )
+    stats = writer.get_watch_stats()
+    assert stats["maxsize"] == 1 and stats["dropped"] == 1
+    await asyncio.sleep(0)
+    assert len(received) == 1
+    writer.stop()
+
+    # bitFlyerのポジションストアのwatchの警告も通る
+    with pytest.warns(UserWarning):
+        writer = Writer(store.position)
+        await asyncio.sleep(0)
+    assert writer.get_watch_stats()["policy"] == "unbounded"
+    writer.stop()
+    await store.close()
@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+
+from pybotters_wrapper.core import BoundedDataStore, TradesStore
+
+
+def trade(i: int, symbol: str = "BTCUSDT") -> dict:
+    return {"id": str(i), "symbol": symbol, "price": 100.0 + i}
+
+
+def test_unbounded():
+    store = BoundedDataStore(keys=["id"])
+    store._insert([trade(i) for i in range(100)])
+    assert len(store) == 100
+    assert not store.bounded
+
+
+@pytest.mark.parametrize("keys", [["id"], []])
+def test_max_len(keys):
+    store = BoundedDataStore(keys=keys, max_len=10)
+    for i in range(100):
+        store._insert([trade(i)])
+    assert len(store) == 10
+    assert [x["id"] for x in store] == [str(i) for i in range(90, 100)]
+    if keys:
+        assert store.get(trade(89)) is None
+        assert store.get(trade(99)) == trade(99)
+
+
+def test_max_len_per_symbol():
+    store = BoundedDataStore(keys=["id", "symbol"], max_len_per_symbol=3)
+    store._insert([trade(i, "BTCUSDT") for i in range(10)])
+    store._insert([trade(i, "ETHUSDT") for i in range(10, 12)])
+    assert [x["id"] for x in store.find({"symbol": "BTCUSDT"})] == ["7", "8", "9"]
+    assert [x["id"] for x in store.find({"symbol": "ETHUSDT"})] == ["10", "11"]
+
+    store._delete([trade(11, "ETHUSDT")])
+    store._insert([trade(i, "ETHUSDT") for i in range(12, 14)])
+    assert [x["id"] for x in store.find({"symbol": "ETHUSDT"})] == ["10", "12", "13"]
+
+
+def test_replace_keeps_insertion_order():
+    store = BoundedDataStore(keys=["id"], max_len=2)
+    store._insert([trade(0), trade(1)])
+    store._update([{**trade(0), "price": 0.0}])
+    store._insert([trade(2)])
+    assert [x["id"] for x in store] == ["1", "2"]
+
+
+def test_eviction_is_not_notified():
+    store = BoundedDataStore(keys=["id"], max_len=1)
+    with store.watch() as stream:
+        store._insert([trade(0)])
+        store._insert([trade(1)])
+        assert [stream._queue.get_nowait().operation for _ in range(2)] == [
+            "insert",
+            "insert",
+        ]
+        assert stream._queue.empty()
+
+
+def test_normalized_store_max_len():
+    store = TradesStore(None, max_len=5)
+    store._insert([{**trade(i), "side": "BUY", "size": 1.0} for i in range(10)])
+    assert len(store) == 5
+
+    store.set_max_len(None, max_len_per_symbol=2)
+    assert store.max_len is None
+    store._insert([{**trade(i), "side": "BUY", "size": 1.0} for i in range(10, 12)])
+    assert [x["id"] for x in store] == ["10", "11"]
+
+
+def test_replace():
+    store = BoundedDataStore(max_len=3)
+    store._insert([trade(i) for i in range(3)])
+    first, second, _ = list(store._data)
+    with store.watch() as stream:
+        store._replace({second: trade(10), uuid.uuid4(): trade(11)})
+        changes = [stream._queue.get_nowait() for _ in range(stream._queue.qsize())]
+    assert [c.operation for c in changes] == ["update", "insert"]
+    # 置き換えは同じ位置、追加は末尾（上限を超えた分は古いものから取り除く）
+    assert [x["id"] for x in store] == ["10", "2", "11"]
+    assert first not in store._data
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+from pybotters.store import DataStore
+
+from pybotters_wrapper.core import IndexedDataStore, OrderStore
+
+
+def order(i: int, symbol: str, side: str = "BUY") -> dict:
+    return {"id": str(i), "symbol": symbol, "side": side, "price": 100.0 + i}
+
+
+@pytest.fixture
+def store():
+    return IndexedDataStore(keys=["id"], indexes=["symbol", "id"])
+
+
+def test_find_with_index(store):
+    store._insert([order(i, "BTCUSDT" if i % 2 else "ETHUSDT") for i in range(10)])
+    actual = store.find({"symbol": "BTCUSDT"})
+    assert [x["id"] for x in actual] == ["1", "3", "5", "7", "9"]
+    assert store.find({"symbol": "BTCUSDT", "id": "3"}) == [order(3, "BTCUSDT")]
+    assert store.find({"symbol": "XRPUSDT"}) == []
+    assert store.find({"symbol": "BTCUSDT", "side": "SELL"}) == []
+
+
+def test_index_follows_update_and_delete(store):
+    store._insert([order(0, "BTCUSDT")])
+    store._update([{"id": "0", "symbol": "ETHUSDT"}])
+    assert store.find({"symbol": "BTCUSDT"}) == []
+    assert [x["id"] for x in store.find({"symbol": "ETHUSDT"})] == ["0"]
+
+    store._delete([{"id": "0"}])
+    assert store.find({"symbol": "ETHUSDT"}) == []
+    assert store._indexes == {"symbol": {}, "id": {}}
+
+
+def test_index_follows_sweep_and_eviction():
+    store = IndexedDataStore(keys=["id"], indexes=["symbol"])
+    store._MAXLEN = 5
+    store._insert([order(i, "BTCUSDT") for i in range(10)])
+    assert [x["id"] for x in store.find({"symbol": "BTCUSDT"})] == list("56789")
+
+    store = IndexedDataStore(keys=["id"], indexes=["symbol"], max_len=3)
+    store._insert([order(i, "BTCUSDT") for i in range(10)])
+    assert [x["id"] for x in store.find({"symbol": "BTCUSDT"})] == list("789")
+
+
+def test_same_result_as_linear_scan():
+    rng = random.Random(0)
+    indexed = IndexedDataStore(keys=["id"], indexes=["symbol", "side"])
+    plain = DataStore(keys=["id"])
+    symbols = ["BTCUSDT", "ETHUSDT", "XRPUSDT"]
+    for _ in range(2000):
+        op = rng.choice(["_insert", "_update", "_delete"])
+        item = order(
+            rng.randrange(50), rng.choice(symbols), rng.choice(["BUY", "SELL"])
+        )
+        getattr(indexed, op)([dict(item)])
+        getattr(plain, op)([dict(item)])
+
+    for symbol in symbols:
+        for query in ({"symbol": symbol}, {"symbol": symbol, "side": "SELL"}):
+            assert sorted(indexed.find(query), key=lambda x: x["id"]) == sorted(
+                plain.find(query), key=lambda x: x["id"]
+            )
+
+
+def test_normalized_store_indexes():
+    store = OrderStore(None)
+    assert list(store._normalized_store._indexes) == ["symbol", "id"]
+    store._insert([{**order(0, "BTCUSDT"), "size": 1.0, "type": "LIMIT"}])
+    assert len(store.find({"symbol": "BTCUSDT", "id": "0"})) == 1
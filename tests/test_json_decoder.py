@@ -0,0 +1,95 @@
+import json
+
+import pybotters
+import pytest
+from aioresponses import aioresponses
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.core import (
+    APIClient,
+    WebSocketConnection,
+    default_json_loads,
+    get_json_loads,
+    json_decoder,
+    set_default_json_loads,
+)
+
+
+def test_get_json_loads():
+    assert get_json_loads("json") is json.loads
+    assert get_json_loads()('{"a": [1, 2.5]}') == {"a": [1, 2.5]}
+
+
+def test_get_json_loads_fallback(monkeypatch):
+    # 高速なデコーダがインストールされていない場合は標準ライブラリを使う
+    monkeypatch.setattr(
+        json_decoder,
+        "_import_loads",
+        lambda name: json.loads if name == "json" else None,
+    )
+    assert get_json_loads() is json.loads
+    with pytest.raises(ImportError):
+        get_json_loads("orjson")
+
+
+def test_set_default_json_loads():
+    original = default_json_loads()
+    calls = []
+
+    def loads(s):
+        calls.append(s)
+        return json.loads(s)
+
+    try:
+        set_default_json_loads(loads)
+        hdlr = lambda msg, ws: None  # noqa
+        conn = WebSocketConnection("ws://localhost", {}, hdlr, None, None)
+        conn._on_frame('{"a": 1}', None)
+        assert calls == ['{"a": 1}']
+
+        set_default_json_loads("json")
+        assert default_json_loads() is json.loads
+    finally:
+        set_default_json_loads(original)
+
+
+def test_websocket_connection_json_loads():
+    received = []
+    conn = WebSocketConnection(
+        "ws://localhost",
+        {},
+        lambda msg, ws: received.append(msg),
+        None,
+        None,
+        json_loads=json.loads,
+    )
+    conn._on_frame('{"a": 1}', None)
+    # デコードできないフレームは読み捨てる
+    conn._on_frame("not json", None)
+    assert received == [{"a": 1}]
+
+    assert conn.set_json_loads(lambda s: {"decoded": s}) is conn
+    conn._on_frame('{"a": 1}', None)
+    assert received == [{"a": 1}, {"decoded": '{"a": 1}'}]
+
+
+@pytest.mark.asyncio
+async def test_api_client_decode():
+    calls = []
+
+    def loads(s):
+        calls.append(s)
+        return json.loads(s)
+
+    async with pybotters.Client() as client:
+        api_client = APIClient(
+            client,
+            exchange_property=pbw.create_factory("bitflyer").create_exchange_property(),
+            json_loads=loads,
+        )
+        assert api_client.json_loads is loads
+        with aioresponses() as m:
+            m.get("https://api.bitflyer.com/v1/ticker", payload={"ltp": 100})
+            resp = await api_client.get("/v1/ticker")
+            assert await api_client.decode(resp) == {"ltp": 100}
+        assert calls == ['{"ltp": 100}']
@@ -0,0 +1,138 @@
+import pytest
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.binance.binanceusdsm.websocket_channels import (
+    BinanceUSDSMWebsocketChannels,
+)
+from pybotters_wrapper.bitflyer.websocket_channels import bitFlyerWebsocketChannels
+from pybotters_wrapper.core import MessageRouter, WebSocketConnection
+from pybotters_wrapper.kucoin.kucoinspot.websocket_channels import (
+    KuCoinSpotWebSocketChannels,
+)
+from pybotters_wrapper.okx.websocket_channels import OKXWebSocketChannels
+
+
+def bitflyer_message(channel: str, message=None) -> dict:
+    return {"params": {"channel": channel, "message": message or {}}}
+
+
+def test_route_by_key():
+    router = MessageRouter(bitFlyerWebsocketChannels.get_message_key)
+    received = []
+    board = lambda msg, ws: received.append(("board", msg))  # noqa
+    ticker = lambda msg, ws: received.append(("ticker", msg))  # noqa
+    all_ = lambda msg, ws: received.append(("all", msg))  # noqa
+    router.add(board, ["lightning_board_FX_BTC_JPY"])
+    router.add(all_)
+    router.add(ticker, ["lightning_ticker_FX_BTC_JPY"])
+    assert len(router) == 3
+
+    board_msg = bitflyer_message("lightning_board_FX_BTC_JPY")
+    ticker_msg = bitflyer_message("lightning_ticker_FX_BTC_JPY")
+    other_msg = bitflyer_message("child_order_events")
+    for msg in (board_msg, ticker_msg, other_msg, {"jsonrpc": "2.0", "id": 1}):
+        router(msg, None)
+
+    # 登録順に、キーが一致するハンドラと全てを受け取るハンドラに渡す
+    assert received == [
+        ("board", board_msg),
+        ("all", board_msg),
+        ("all", ticker_msg),
+        ("ticker", ticker_msg),
+        ("all", other_msg),
+        ("all", {"jsonrpc": "2.0", "id": 1}),
+    ]
+
+    router.remove(all_)
+    assert router.route(board_msg) == (board,)
+    assert router.route(other_msg) == ()
+
+
+@pytest.mark.parametrize(
+    "channels, msg, expected",
+    [
+        (
+            bitFlyerWebsocketChannels,
+            bitflyer_message("lightning_ticker_FX_BTC_JPY"),
+            "lightning_ticker_FX_BTC_JPY",
+        ),
+        (BinanceUSDSMWebsocketChannels, {"e": "aggTrade"}, "aggTrade"),
+        (OKXWebSocketChannels, {"arg": {"channel": "books"}, "data": []}, "books"),
+        (OKXWebSocketChannels, {"event": "subscribe", "arg": {}}, None),
+        (
+            KuCoinSpotWebSocketChannels,
+            {"type": "message", "topic": "/market/ticker:BTC"},
+            "/market/ticker:BTC",
+        ),
+        (KuCoinSpotWebSocketChannels, {"type": "welcome"}, None),
+    ],
+)
+def test_get_message_key(channels, msg, expected):
+    assert channels.get_message_key(msg) == expected
+
+
+@pytest.mark.asyncio
+async def test_add_message_handler():
+    store = pbw.create_store("bitflyer")
+    received = []
+    hdlr = lambda msg, ws: received.append(msg)  # noqa
+    assert store.add_message_handler(hdlr, ["lightning_ticker_FX_BTC_JPY"]) is store
+
+    ticker_msg = bitflyer_message(
+        "lightning_ticker_FX_BTC_JPY", {"product_code": "FX_BTC_JPY", "ltp": 100}
+    )
+    store.onmessage(bitflyer_message("lightning_executions_FX_BTC_JPY", []), None)
+    store.onmessage(ticker_msg, None)
+    assert received == [ticker_msg]
+
+    # ストアの構成が変わってもハンドラは残る
+    store.use_columnar_trades()
+    store.onmessage(ticker_msg, None)
+    assert received == [ticker_msg, ticker_msg]
+
+    store.remove_message_handler(hdlr)
+    store.onmessage(ticker_msg, None)
+    assert len(received) == 2
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_before_store_handler_error():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+
+    def hdlr(msg, ws):
+        raise RuntimeError("recorder failed")
+
+    # ストアの前に呼ぶハンドラが失敗してもストアは更新される
+    store.add_message_handler(hdlr, before_store=True)
+    store.onmessage(
+        bitflyer_message(
+            "lightning_ticker_FX_BTC_JPY", {"product_code": "FX_BTC_JPY", "ltp": 100}
+        ),
+        None,
+    )
+    assert store.ticker.find()[0]["price"] == 100
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_add_message_handler_without_message_key():
+    # get_message_keyのない取引所ではkeysを指定できない（黙って呼ばれなくなるのを防ぐ）
+    store = pbw.create_store("coincheck")
+    with pytest.raises(NotImplementedError):
+        store.add_message_handler(lambda msg, ws: None, ["trades"])
+    assert store.add_message_handler(lambda msg, ws: None) is store
+    await store.close()
+
+
+def test_chain_handlers():
+    received = []
+    conn = WebSocketConnection(
+        "ws://localhost",
+        {},
+        [lambda msg, ws: received.append(1), lambda msg, ws: received.append(2)],
+        None,
+        None,
+    )
+    conn._hdlr({}, None)
+    assert received == [1, 2]
@@ -0,0 +1,254 @@
+import asyncio
+import time
+
+import pytest
+import pytest_mock
+from pybotters.store import DataStore, StoreChange
+
+from pybotters_wrapper.core import OrderbookStore, TickerStore
+from pybotters_wrapper.core.store.normalized_store import LazyInfo, compile_mapper
+
+
+def test_compile_dict_mapper():
+    fn = compile_mapper(
+        {
+            "symbol": lambda store, o, s, d: d["product_code"],
+            "price": lambda store, o, s, d: float(d["ltp"]),
+            "exchange": "bitflyer",
+        }
+    )
+    actual = fn(None, "insert", {}, {"product_code": "FX_BTC_JPY", "ltp": "100"})
+    assert actual == {"symbol": "FX_BTC_JPY", "price": 100.0, "exchange": "bitflyer"}
+
+
+def test_compile_callable_mapper():
+    def mapper(store, operation, source, data):
+        return {"symbol": data["s"], "price": data["p"]}
+
+    assert compile_mapper(mapper) is mapper
+
+
+def test_unsupported_mapper():
+    with pytest.raises(TypeError):
+        compile_mapper(["symbol"])  # type: ignore
+
+    with pytest.raises(TypeError):
+        TickerStore(None, mapper={"symbol": 1})  # type: ignore
+
+
+@pytest.fixture
+def base_store():
+    store = DataStore(keys=["product_code"])
+    store._insert([{"product_code": "FX_BTC_JPY", "ltp": 100}])
+    return store
+
+
+def make_ticker_store(base_store, info_mode):
+    return TickerStore(
+        base_store,
+        mapper={
+            "symbol": lambda store, o, s, d: d["product_code"],
+            "price": lambda store, o, s, d: float(d["ltp"]),
+        },
+        info_mode=info_mode,
+    )
+
+
+def test_info_mode_full(base_store):
+    store = make_ticker_store(base_store, "full")
+    data = {"product_code": "FX_BTC_JPY", "ltp": 100}
+    store._on_watch(StoreChange(base_store, "insert", {}, data))
+    assert store.find()[0]["info"] == {"data": data, "source": {}}
+
+
+def test_info_mode_none(base_store):
+    store = make_ticker_store(base_store, "none")
+    store._on_watch(
+        StoreChange(
+            base_store, "insert", {}, {"product_code": "FX_BTC_JPY", "ltp": 100}
+        )
+    )
+    assert store.find() == [{"symbol": "FX_BTC_JPY", "price": 100.0}]
+
+    store.synchronize()
+    assert store.find() == [{"symbol": "FX_BTC_JPY", "price": 100.0}]
+
+
+def test_info_mode_lazy(base_store):
+    store = make_ticker_store(base_store, "lazy")
+    store._on_watch(
+        StoreChange(
+            base_store, "insert", {}, {"product_code": "FX_BTC_JPY", "ltp": 100}
+        )
+    )
+    info = store.find()[0]["info"]
+    assert isinstance(info, LazyInfo)
+    # 参照時点の元アイテムを返す
+    assert info["data"] is base_store.get({"product_code": "FX_BTC_JPY"})
+    assert info["source"] is None
+
+    base_store._delete([{"product_code": "FX_BTC_JPY"}])
+    assert info["data"] is None
+
+
+@pytest.mark.asyncio
+async def test_info_mode_lazy_watch(base_store):
+    store = make_ticker_store(base_store, "lazy")
+    with store.watch() as stream:
+        store._on_watch(StoreChange(base_store, "insert", {}, base_store.find()[0]))
+        # watchのchangeはdeep copyされるが、元ストアごとコピーはしない
+        change = await asyncio.wait_for(stream.get(), 1)
+    info = change.data["info"]
+    assert info is store.find()[0]["info"]
+    assert info["data"] is base_store.get({"product_code": "FX_BTC_JPY"})
+
+
+def test_info_mode_lazy_keyless():
+    base_store = DataStore()
+    store = make_ticker_store(base_store, "lazy")
+    store._on_watch(
+        StoreChange(
+            base_store, "insert", {}, {"product_code": "FX_BTC_JPY", "ltp": 100}
+        )
+    )
+    assert store.find()[0]["info"]["data"] is None
+
+
+def test_info_mode_invalid(base_store):
+    with pytest.raises(ValueError):
+        make_ticker_store(base_store, "partial")
+
+
+def make_orderbook_store(base_store):
+    return OrderbookStore(
+        base_store,
+        mapper={
+            "symbol": lambda store, o, s, d: d["product_code"],
+            "side": lambda store, o, s, d: d["side"],
+            "price": lambda store, o, s, d: float(d["price"]),
+            "size": lambda store, o, s, d: float(d["size"]),
+        },
+        batch=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch(mocker: pytest_mock.MockerFixture):
+    base_store = DataStore(keys=["product_code", "side", "price"])
+    store = make_orderbook_store(base_store).start()
+    spy_insert = mocker.spy(store, "_insert")
+    await asyncio.sleep(0)
+
+    wait_task = asyncio.create_task(store.wait())
+    await asyncio.sleep(0)
+
+    base_store._insert(
+        [
+            {"product_code": "FX_BTC_JPY", "side": "BUY", "price": i, "size": 1}
+            for i in range(100)
+        ]
+    )
+    waited = await asyncio.wait_for(wait_task, 1)
+
+    assert len(store) == 100
+    assert spy_insert.call_count == 1
+    assert len(waited) == 100
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_keeps_operation_order():
+    base_store = DataStore(keys=["product_code", "side", "price"])
+    store = make_orderbook_store(base_store).start()
+    await asyncio.sleep(0)
+
+    item = {"product_code": "FX_BTC_JPY", "side": "BUY", "price": 1, "size": 1}
+    base_store._insert([item])
+    base_store._delete([item])
+    base_store._insert([{**item, "size": 2}])
+    await asyncio.sleep(0.01)
+
+    assert store.find() == [
+        {
+            "symbol": "FX_BTC_JPY",
+            "side": "BUY",
+            "price": 1.0,
+            "size": 2.0,
+            "info": {"data": {**item, "size": 2}, "source": None},
+        }
+    ]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_stats():
+    base_store = DataStore(keys=["product_code", "side", "price"])
+    store = make_orderbook_store(base_store)
+    store.set_batch(False)
+    store.start()
+    assert store.get_stats() is None
+
+    store.set_stats(True)
+    await asyncio.sleep(0)
+    item = {"product_code": "FX_BTC_JPY", "side": "BUY", "price": 1, "size": 1}
+    base_store._insert([item, {**item, "price": 2}])
+    base_store._delete([item])
+    await asyncio.sleep(0.01)
+
+    stats = store.get_stats()
+    assert stats["changes"] == 3
+    assert stats["operations"] == {"insert": 2, "delete": 1}
+    assert stats["batches"] == 3
+    assert stats["queue_depth"] == 0
+    assert stats["max_queue_depth"] == 3
+    assert 0 <= stats["lag_p50"] <= stats["lag_p99"] <= stats["lag_max"]
+
+    store.set_stats(False)
+    assert store.get_stats() is None
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_stats_batch():
+    base_store = DataStore(keys=["product_code", "side", "price"])
+    store = make_orderbook_store(base_store).start()
+    store.set_stats(True)
+    await asyncio.sleep(0)
+    base_store._insert(
+        [
+            {"product_code": "FX_BTC_JPY", "side": "BUY", "price": i, "size": 1}
+            for i in range(10)
+        ]
+    )
+    # 処理される前はキューに溜まっている
+    assert store.get_stats()["queue_depth"] == 10
+    await asyncio.sleep(0.01)
+
+    stats = store.get_stats()
+    assert stats["changes"] == 10
+    assert stats["batches"] == 1
+    assert stats["queue_depth"] == 0
+    await store.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("inline", [False, True])
+async def test_stats_lag_includes_queue_wait(inline):
+    base_store = DataStore(keys=["product_code", "side", "price"])
+    store = make_orderbook_store(base_store).start()
+    store.set_inline(inline)
+    store.set_stats(True)
+    await asyncio.sleep(0)
+    base_store._insert(
+        [{"product_code": "FX_BTC_JPY", "side": "BUY", "price": 1, "size": 1}]
+    )
+    # キューで待っている時間もlagに含まれる
+    time.sleep(0.05)
+    if inline:
+        store.flush()
+    await asyncio.sleep(0.01)
+
+    stats = store.get_stats()
+    assert stats["changes"] == 1
+    assert stats["lag_max"] >= 0.05
+    await store.close()
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.core import OrderbookStore
+
+
+class DummyWebSocket:
+    # bitFlyerDataStoreはsnapshotを受け取るとunsubscribeを送る
+    async def send_json(self, data):
+        ...
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("inline", [False, True])
+async def test_watch_delta(inline):
+    store = pbw.create_store("bitflyer").set_inline_normalization(inline)
+    await asyncio.sleep(0)
+
+    with store.orderbook.watch_delta() as stream:
+        store.onmessage(
+            bitflyer_board_message(
+                "lightning_board_snapshot", [(101, 1), (102, 2)], [(99, 3)]
+            ),
+            DummyWebSocket(),
+        )
+        delta = await asyncio.wait_for(stream.get(), 1)
+        assert delta.symbol == "FX_BTC_JPY"
+        assert delta.local_seq == 1
+        assert sorted(zip(delta.side, delta.price, delta.size)) == [
+            (-1, 101.0, 1.0),
+            (-1, 102.0, 2.0),
+            (1, 99.0, 3.0),
+        ]
+
+        # 一つのメッセージにつき一つの差分
+        store.onmessage(
+            bitflyer_board_message("lightning_board", [(101, 0), (103, 4)], []),
+            DummyWebSocket(),
+        )
+        delta = await asyncio.wait_for(stream.get(), 1)
+        assert delta.local_seq == 2
+        assert sorted(zip(delta.side, delta.price, delta.size)) == [
+            (-1, 101.0, 0.0),
+            (-1, 103.0, 4.0),
+        ]
+        assert stream._queue.empty()
+
+    assert store.orderbook._delta_queues == []
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_watch_delta_synchronize():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    await asyncio.sleep(0)
+    store.onmessage(
+        bitflyer_board_message("lightning_board_snapshot", [(101, 1)], [(99, 3)]),
+        DummyWebSocket(),
+    )
+
+    with store.orderbook.watch_delta() as stream:
+        # 元ストアとの強制同期も差分として配信される
+        store.orderbook.synchronize()
+        delta = await asyncio.wait_for(stream.get(), 1)
+        assert sorted(zip(delta.side, delta.price, delta.size)) == [
+            (-1, 101.0, 1.0),
+            (1, 99.0, 3.0),
+        ]
+    await store.close()
+
+
+def level(symbol: str, side: str, price: float, size: float = 1.0) -> dict:
+    return {"symbol": symbol, "side": side, "price": price, "size": size}
+
+
+@pytest.mark.asyncio
+async def test_symbol_orderbook():
+    store = OrderbookStore(None)
+    book = store["BTCUSDT"]
+    assert store["BTCUSDT"] is book
+
+    wait_task = asyncio.create_task(book.wait())
+    await asyncio.sleep(0)
+    with book.watch() as stream, book.watch_delta() as delta_stream:
+        store._insert([level("ETHUSDT", "SELL", 10.0)])
+        assert not wait_task.done()
+        store._insert([level("BTCUSDT", "SELL", 101.0), level("ETHUSDT", "BUY", 9.0)])
+        store._insert([level("BTCUSDT", "BUY", 99.0)])
+        store._on_changes_applied()
+        await asyncio.sleep(0)
+
+        # 他のsymbolの更新は受け取らない
+        assert wait_task.done()
+        assert wait_task.result() == [
+            level("BTCUSDT", "SELL", 101.0),
+            level("BTCUSDT", "BUY", 99.0),
+        ]
+        changes = [stream._queue.get_nowait() for _ in range(stream._queue.qsize())]
+        assert [c.data["price"] for c in changes] == [101.0, 99.0]
+        delta = delta_stream._queue.get_nowait()
+        assert delta.symbol == "BTCUSDT"
+        assert delta.price.tolist() == [101.0, 99.0]
+        assert delta_stream._queue.empty()
+
+    assert store._normalized_store._symbol_queues == {"BTCUSDT": []}
+    assert len(book) == 2
+    assert book.best_ask()["price"] == 101.0
+    assert book.best_bid()["price"] == 99.0
+    assert book.sorted() == store.sorted({"symbol": "BTCUSDT"})
+    assert book.find({"side": "BUY"}) == [level("BTCUSDT", "BUY", 99.0)]
+    assert [x["price"] for x in book] == [101.0, 99.0]
+    assert sorted(store.symbols) == ["BTCUSDT", "ETHUSDT"]
@@ -0,0 +1,105 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.core import ColumnarTradesStore
+
+
+def trade(i: int, symbol: str = "BTCUSDT", side: str = "BUY") -> dict:
+    return {
+        "id": str(i),
+        "symbol": symbol,
+        "side": side,
+        "price": 100.0 + i,
+        "size": 0.1 * i,
+        "timestamp": pd.Timestamp(1686505010000 + i, unit="ms", tz="UTC"),
+    }
+
+
+@pytest.fixture
+def store():
+    return ColumnarTradesStore(None, capacity=5)
+
+
+def test_insert_and_find(store):
+    store._insert([trade(0), trade(1, "ETHUSDT", "SELL"), trade(2)])
+    assert len(store) == 3
+    assert store.find() == [trade(0), trade(1, "ETHUSDT", "SELL"), trade(2)]
+    assert store.find({"symbol": "BTCUSDT"}) == [trade(0), trade(2)]
+    assert store.find({"side": "SELL"}) == [trade(1, "ETHUSDT", "SELL")]
+    assert store.get({"id": "2", "symbol": "BTCUSDT"}) == trade(2)
+
+
+def test_ring_buffer(store):
+    store._insert([trade(i) for i in range(12)])
+    assert len(store) == 5
+    np.testing.assert_array_equal(store.price, [107.0, 108.0, 109.0, 110.0, 111.0])
+    assert [x["id"] for x in store] == ["7", "8", "9", "10", "11"]
+    assert [x["id"] for x in reversed(store)] == ["11", "10", "9", "8", "7"]
+
+
+def test_last_is_zero_copy_view(store):
+    store._insert([trade(i, "BTCUSDT" if i % 2 else "ETHUSDT") for i in range(8)])
+    columns = store.last(3)
+    np.testing.assert_array_equal(columns.price, [105.0, 106.0, 107.0])
+    np.testing.assert_array_equal(columns.side, [1, 1, 1])
+    assert columns.price.base is store._price
+    assert columns.timestamp.dtype == np.int64
+
+    btc = store.last(symbol="BTCUSDT")
+    np.testing.assert_array_equal(btc.price, [103.0, 105.0, 107.0])
+    assert (btc.symbol == store.symbol_code("BTCUSDT")).all()
+
+
+@pytest.mark.asyncio
+async def test_watch():
+    store = ColumnarTradesStore(None, capacity=5)
+    with store.watch() as stream:
+        store._insert([trade(0)])
+        change = await asyncio.wait_for(stream.get(), 1)
+        assert change.operation == "insert"
+        assert change.data == trade(0)
+
+
+@pytest.mark.asyncio
+async def test_use_columnar_trades():
+    store = pbw.create_store("bitflyer").use_columnar_trades(100)
+    assert isinstance(store.trades, ColumnarTradesStore)
+    await asyncio.sleep(0)
+    store.onmessage(
+        {
+            "jsonrpc": "2.0",
+            "method": "channelMessage",
+            "params": {
+                "channel": "lightning_executions_FX_BTC_JPY",
+                "message": [
+                    {
+                        "product_code": "FX_BTC_JPY",
+                        "id": 2463530573,
+                        "side": "BUY",
+                        "price": 3688478.0,
+                        "size": 0.002,
+                        "exec_date": "2023-06-11T17:36:50.6358165Z",
+                        "buy_child_order_acceptance_id": "JRF20230611-173650-139904",
+                        "sell_child_order_acceptance_id": "JRF20230611-173621-142269",
+                    }
+                ],
+            },
+        },
+        None,
+    )
+    await asyncio.sleep(0.01)
+    assert store.trades.find() == [
+        {
+            "id": "2463530573",
+            "symbol": "FX_BTC_JPY",
+            "side": "BUY",
+            "price": 3688478.0,
+            "size": 0.002,
+            "timestamp": pd.to_datetime("2023-06-11T17:36:50.6358165Z"),
+        }
+    ]
+    await store.close()
@@ -0,0 +1,111 @@
+import random
+
+from pybotters_wrapper.core import OrderbookStore, PriceLevelDataStore
+
+
+def level(symbol: str, side: str, price: float, size: float = 1.0) -> dict:
+    return {"symbol": symbol, "side": side, "price": price, "size": size}
+
+
+def linear_sorted(items: list[dict], query: dict) -> dict:
+    # 従来のOrderbookStore.sorted
+    result = {"SELL": [], "BUY": []}
+    for item in items:
+        if all(k in item and query[k] == item[k] for k in query):
+            result[item["side"]].append(item)
+    result["SELL"].sort(key=lambda x: x["price"])
+    result["BUY"].sort(key=lambda x: x["price"], reverse=True)
+    return result
+
+
+def test_levels_follow_insert_update_delete():
+    store = PriceLevelDataStore(keys=["symbol", "side", "price"])
+    store._insert([level("BTCUSDT", "SELL", p) for p in (103.0, 101.0, 102.0)])
+    assert store.levels("BTCUSDT", "SELL").prices == [101.0, 102.0, 103.0]
+
+    store._update([level("BTCUSDT", "SELL", 101.0, 5.0)])
+    assert store.levels("BTCUSDT", "SELL").first()["size"] == 5.0
+
+    store._delete([level("BTCUSDT", "SELL", 101.0)])
+    assert store.levels("BTCUSDT", "SELL").prices == [102.0, 103.0]
+
+    store._clear()
+    assert store.levels("BTCUSDT", "SELL") is None
+
+
+def test_levels_follow_sweep_and_eviction():
+    store = PriceLevelDataStore(keys=["symbol", "side", "price"])
+    store._MAXLEN = 3
+    store._insert([level("BTCUSDT", "BUY", float(p)) for p in range(5)])
+    assert store.levels("BTCUSDT", "BUY").prices == [2.0, 3.0, 4.0]
+
+    store = PriceLevelDataStore(keys=["symbol", "side", "price"], max_len=2)
+    store._insert([level("BTCUSDT", "BUY", float(p)) for p in range(5)])
+    assert store.levels("BTCUSDT", "BUY").prices == [3.0, 4.0]
+
+
+def test_sorted_same_result_as_full_sort():
+    rng = random.Random(0)
+    store = OrderbookStore(None)
+    symbols = ["BTCUSDT", "ETHUSDT"]
+    for _ in range(2000):
+        op = rng.choice(["_insert", "_update", "_delete"])
+        item = level(
+            rng.choice(symbols),
+            rng.choice(["BUY", "SELL"]),
+            float(rng.randrange(100)),
+            float(rng.randrange(1, 10)),
+        )
+        getattr(store, op)([item])
+
+    items = list(store)
+    for query in ({"symbol": "BTCUSDT"}, {"symbol": "ETHUSDT", "side": "BUY"}):
+        assert store.sorted(query) == linear_sorted(items, query)
+
+    # 複数symbolにまたがる場合、同じ価格のアイテム同士の順序は問わない
+    def tie_break(result):
+        return {
+            side: sorted(
+                levels, key=lambda x: (x["price"], x["symbol"]), reverse=side == "BUY"
+            )
+            for side, levels in result.items()
+        }
+
+    for query in ({}, {"size": 3.0}):
+        assert tie_break(store.sorted(query)) == tie_break(linear_sorted(items, query))
+
+    expected = linear_sorted(items, {"symbol": "BTCUSDT"})
+    top = store.sorted({"symbol": "BTCUSDT"}, limit=5)
+    assert top == {"SELL": expected["SELL"][:5], "BUY": expected["BUY"][:5]}
+    assert store.best_ask("BTCUSDT") == expected["SELL"][0]
+    assert store.best_bid("BTCUSDT") == expected["BUY"][0]
+    assert store.best_ask("XRPUSDT") is None
+
+
+def test_depth():
+    store = OrderbookStore(None)
+    store._insert(
+        [
+            level("BTCUSDT", side, float(p), float(p + 1))
+            for side in ("BUY", "SELL")
+            for p in range(5)
+        ]
+    )
+    depth = store.depth("BTCUSDT", 3, cumulative=True)
+    assert depth.asks.price.tolist() == [0.0, 1.0, 2.0]
+    assert depth.asks.size.tolist() == [1.0, 2.0, 3.0]
+    assert depth.asks.cumsize.tolist() == [1.0, 3.0, 6.0]
+    assert depth.bids.price.tolist() == [4.0, 3.0, 2.0]
+    assert depth.bids.cumsize.tolist() == [5.0, 9.0, 12.0]
+
+    # 同じ引数の呼び出しでは同じバッファを再利用する
+    store._delete([level("BTCUSDT", "SELL", 0.0)])
+    depth2 = store.depth("BTCUSDT", 3, cumulative=True)
+    assert depth2.asks is depth.asks
+    assert depth.asks.price.tolist() == [1.0, 2.0, 3.0]
+
+    # 板がn件に満たない場合
+    depth = store.depth("BTCUSDT", 10)
+    assert len(depth.asks.price) == 4
+    assert depth.asks.cumsize is None
+    assert len(store.depth("ETHUSDT", 3).bids.price) == 0
@@ -0,0 +1,227 @@
+import asyncio
+
+import pybotters
+import pytest
+from aiohttp import WSMsgType, web
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.process import NormalizedChangeBatcher, ProcessDataStoreWrapper
+
+
+class DummyWebSocket:
+    # bitFlyerDataStoreはsnapshotを受け取るとunsubscribeを送る
+    async def send_json(self, data):
+        ...
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+def ticker_message(ltp: float) -> dict:
+    return {
+        "params": {
+            "channel": "lightning_ticker_FX_BTC_JPY",
+            "message": {"product_code": "FX_BTC_JPY", "ltp": ltp},
+        }
+    }
+
+
+class DroppingServer:
+    """接続ごとにon_connectで送信し、dropがsetされたら接続を切るwebsocketサーバー"""
+
+    def __init__(self, on_connect):
+        self.on_connect = on_connect
+        self.connections = 0
+        self.drop = asyncio.Event()
+        self._runner: web.AppRunner | None = None
+        self.url: str | None = None
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/ws", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/ws"
+        return self
+
+    async def __aexit__(self, *args):
+        await self._runner.cleanup()
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        await self.on_connect(self.connections, ws)
+
+        # 購読リクエストなどは読み捨てる
+        async def receive():
+            async for msg in ws:
+                if msg.type == WSMsgType.CLOSE:
+                    break
+
+        receiver = asyncio.create_task(receive())
+        drop = asyncio.create_task(self.drop.wait())
+        await asyncio.wait([receiver, drop], return_when=asyncio.FIRST_COMPLETED)
+        if drop.done():
+            self.drop.clear()
+        receiver.cancel()
+        drop.cancel()
+        await ws.close()
+        return ws
+
+
+async def wait_until(predicate, timeout=3.0):
+    async def _wait():
+        while not predicate():
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(_wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_apply_batches():
+    batches = []
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    batcher = NormalizedChangeBatcher(batches.append)
+    for name, normalized_store in store._normalized_stores.items():
+        if normalized_store is not None:
+            batcher.hook(name, normalized_store)
+
+    mirror = ProcessDataStoreWrapper("bitflyer", pbw.create_factory("bitflyer"))
+    ws = DummyWebSocket()
+    store.onmessage(
+        bitflyer_board_message(
+            "lightning_board_snapshot", [(101, 1), (102, 2)], [(99, 1), (98, 2)]
+        ),
+        ws,
+    )
+    store.onmessage(ticker_message(100), ws)
+    store.onmessage(
+        bitflyer_board_message("lightning_board", [(101, 0), (103, 1)], [(99, 3)]),
+        ws,
+    )
+    store.onmessage(ticker_message(101), ws)
+    batcher.flush()
+
+    # 同じストア・オペレーションが続く変更は1つにまとまる
+    assert len(batches) == 1
+    for batch in batches:
+        mirror._apply(batch)
+    assert mirror.orderbook.sorted() == store.orderbook.sorted()
+    assert [item["price"] for item in mirror.ticker.find()] == [101]
+    assert "info" not in mirror.ticker.find()[0]
+
+    store.orderbook.invalidate()
+    batcher.flush()
+    mirror._apply(batches[-1])
+    assert len(mirror.orderbook) == 0
+
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_batches_per_loop_turn():
+    batches = []
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    batcher = NormalizedChangeBatcher(batches.append)
+    batcher.hook("ticker", store.ticker)
+
+    store.onmessage(ticker_message(100), DummyWebSocket())
+    store.onmessage(ticker_message(101), DummyWebSocket())
+    await asyncio.sleep(0)
+    store.onmessage(ticker_message(102), DummyWebSocket())
+    await asyncio.sleep(0)
+
+    prices = [[item["price"] for _, _, items in b for item in items] for b in batches]
+    assert prices == [[100, 101], [102]]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_keyless_store_reset():
+    batches = []
+    store = pbw.create_store("bitflyer")
+    batcher = NormalizedChangeBatcher(batches.append)
+    batcher.hook("position", store.position)
+    mirror = ProcessDataStoreWrapper("bitflyer", pbw.create_factory("bitflyer"))
+
+    base = store.position._base_store
+    lot = {
+        "product_code": "FX_BTC_JPY",
+        "side": "BUY",
+        "size": 0.01,
+        "price": 3000000,
+        "commission": 0,
+        "sfd": 0,
+    }
+    base._insert([lot, {**lot, "price": 3000001}])
+    store.position.synchronize()
+    batcher.flush()
+    # キーのないストアでも挿入だけならそのまま送る
+    assert [op for _, op, _ in batches[-1]] == ["insert"]
+
+    # 建玉の部分的な減算・削除はアイテムを特定できないので全アイテムを送り直す
+    base.find()[0]["size"] = 0.005
+    base._remove([list(base._data)[1]])
+    store.position._sync_positions()
+    batcher.flush()
+    assert [op for _, op, _ in batches[-1]] == ["reset"]
+
+    for batch in batches:
+        mirror._apply(batch)
+    expected = [{k: v for k, v in i.items() if k != "info"} for i in store.position]
+    assert mirror.position.find() == expected
+    assert [item["size"] for item in mirror.position.find()] == [0.005]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_process_store():
+    async def on_connect(n, ws):
+        await ws.send_json(
+            bitflyer_board_message(
+                "lightning_board_snapshot", [(101, 1), (102, 2)], [(99, 1)]
+            )
+        )
+        await ws.send_json(ticker_message(100))
+
+    async with DroppingServer(on_connect) as server:
+        store = pbw.create_process_store("bitflyer")
+        await store.connect(endpoint=server.url, send={"method": "subscribe"})
+        assert store.running
+
+        await wait_until(
+            lambda: len(store.orderbook) == 3 and len(store.ticker) == 1, timeout=10
+        )
+        assert [item["price"] for item in store.ticker.find()] == [100]
+        assert [item["price"] for item in store.orderbook.sorted()["SELL"]] == [
+            101,
+            102,
+        ]
+        # 元ストアはワーカープロセスにしかない
+        assert len(store.store.board) == 0
+
+        await store.close()
+        assert not store.running
+
+
+@pytest.mark.asyncio
+async def test_process_store_rejects_callables():
+    store = pbw.create_process_store("bitflyer")
+    with pytest.raises(TypeError):
+        await store.initialize([pybotters.Client])
@@ -0,0 +1,192 @@
+import asyncio
+
+import pybotters
+import pytest
+from aiohttp import WSMsgType, web
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.core import hook_ready_event, ready_event
+from pybotters_wrapper.exceptions import StoreNotReadyError
+
+
+class DummyWebSocket:
+    # bitFlyerDataStoreはsnapshotを受け取るとunsubscribeを送る
+    async def send_json(self, data):
+        ...
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+def ticker_message(ltp: float) -> dict:
+    return {
+        "params": {
+            "channel": "lightning_ticker_FX_BTC_JPY",
+            "message": {"product_code": "FX_BTC_JPY", "ltp": ltp},
+        }
+    }
+
+
+class DroppingServer:
+    """接続ごとにon_connectで送信し、dropがsetされたら接続を切るwebsocketサーバー"""
+
+    def __init__(self, on_connect):
+        self.on_connect = on_connect
+        self.connections = 0
+        self.drop = asyncio.Event()
+        self._runner: web.AppRunner | None = None
+        self.url: str | None = None
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/ws", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/ws"
+        return self
+
+    async def __aexit__(self, *args):
+        await self._runner.cleanup()
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        await self.on_connect(self.connections, ws)
+
+        # 購読リクエストなどは読み捨てる
+        async def receive():
+            async for msg in ws:
+                if msg.type == WSMsgType.CLOSE:
+                    break
+
+        receiver = asyncio.create_task(receive())
+        drop = asyncio.create_task(self.drop.wait())
+        await asyncio.wait([receiver, drop], return_when=asyncio.FIRST_COMPLETED)
+        if drop.done():
+            self.drop.clear()
+        receiver.cancel()
+        drop.cancel()
+        await ws.close()
+        return ws
+
+
+@pytest.mark.asyncio
+async def test_ready_event():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    normalized = ready_event(store.ticker)
+    base = ready_event(store.store.ticker)
+    assert not normalized.is_set() and not base.is_set()
+
+    store.onmessage(ticker_message(100), DummyWebSocket())
+    assert normalized.is_set() and base.is_set()
+    # setした後はフックを外す
+    assert "_set" not in store.ticker._normalized_store.__dict__
+    assert "_set" not in store.store.ticker.__dict__
+
+    # 既に空でなければset済み
+    assert ready_event(store.ticker).is_set()
+    assert not ready_event(store.orderbook).is_set()
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_hook_ready_event_unhook():
+    store = pbw.create_store("bitflyer")
+    store.store.ticker._set = hooked = lambda data=None: None
+    event, unhook = hook_ready_event(store.store.ticker)
+    assert store.store.ticker._set is not hooked
+    unhook()
+    unhook()
+    # 元のインスタンスごとのフックに戻す
+    assert store.store.ticker._set is hooked
+    assert not event.is_set()
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_ready_event_columnar_trades():
+    store = pbw.create_store("bitflyer").use_columnar_trades()
+    store.set_inline_normalization(True)
+    event = ready_event(store.trades)
+    store.onmessage(
+        {
+            "params": {
+                "channel": "lightning_executions_FX_BTC_JPY",
+                "message": [
+                    {
+                        "id": 1,
+                        "side": "BUY",
+                        "price": 100.0,
+                        "size": 0.01,
+                        "exec_date": "2023-10-01T00:00:00.000000Z",
+                    }
+                ],
+            }
+        },
+        DummyWebSocket(),
+    )
+    assert event.is_set()
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_connect_waits():
+    async def on_connect(n, ws):
+        await ws.send_json(ticker_message(100))
+        await asyncio.sleep(0.05)
+        await ws.send_json(
+            bitflyer_board_message("lightning_board_snapshot", [(101, 1)], [(99, 1)])
+        )
+
+    async with DroppingServer(on_connect) as server:
+        async with pybotters.Client() as client:
+            store = pbw.create_store("bitflyer")
+            await store.connect(
+                client,
+                endpoint=server.url,
+                send={"method": "subscribe"},
+                waits=["ticker", "orderbook"],
+                wait_timeout=3,
+            )
+            assert len(store.ticker) == 1 and len(store.orderbook) == 2
+            await store.close()
+
+
+@pytest.mark.asyncio
+async def test_connect_waits_timeout():
+    async def on_connect(n, ws):
+        await ws.send_json(ticker_message(100))
+
+    async with DroppingServer(on_connect) as server:
+        async with pybotters.Client() as client:
+            store = pbw.create_store("bitflyer")
+            with pytest.raises(StoreNotReadyError) as e:
+                await store.connect(
+                    client,
+                    endpoint=server.url,
+                    send={"method": "subscribe"},
+                    waits=["ticker", "orderbook", store.store.board],
+                    wait_timeout=0.2,
+                )
+            assert e.value.stores == ["orderbook", "Board"]
+            assert isinstance(e.value, TimeoutError)
+            # タイムアウトしてもフックは外す（connectのたびに重ならない）
+            assert "_set" not in store.orderbook._normalized_store.__dict__
+            assert "_set" not in store.store.board.__dict__
+            await store.close()
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import pybotters_wrapper as pbw
+
+
+def bitflyer_executions_message(i: int) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": "lightning_executions_FX_BTC_JPY",
+            "message": [
+                {
+                    "product_code": "FX_BTC_JPY",
+                    "id": i,
+                    "side": "BUY",
+                    "price": 3688478.0,
+                    "size": 0.002,
+                    "exec_date": "2023-06-11T17:36:50.6358165Z",
+                    "buy_child_order_acceptance_id": "JRF20230611-173650-139904",
+                    "sell_child_order_acceptance_id": "JRF20230611-173621-142269",
+                }
+            ],
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_inline_normalization():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+
+    store.onmessage(bitflyer_executions_message(1), None)
+    # 同じターン内で正規化ストアまで反映されている
+    assert len(store.trades) == 1
+    assert store.trades.find()[0]["id"] == "1"
+
+    store.set_inline_normalization(False)
+    await asyncio.sleep(0)
+    store.onmessage(bitflyer_executions_message(2), None)
+    assert len(store.trades) == 1
+    await asyncio.sleep(0.01)
+    assert len(store.trades) == 2
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_inline_normalization_outside_onmessage():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    store.store.ticker._onmessage({"product_code": "FX_BTC_JPY", "ltp": 100})
+    await asyncio.sleep(0)
+    assert store.ticker.find()[0]["price"] == 100
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_stats():
+    store = pbw.create_store("bitflyer")
+    assert store.get_stats() == {}
+
+    store.set_stats(True)
+    await asyncio.sleep(0)
+    store.onmessage(bitflyer_executions_message(1), None)
+    await asyncio.sleep(0.01)
+    stats = store.get_stats()
+    assert set(stats) == set(store._normalized_stores)
+    assert stats["trades"]["changes"] == 1
+    assert stats["ticker"]["changes"] == 0
+    assert stats["ticker"]["lag_p50"] is None
+
+    store.set_stats(False)
+    assert store.get_stats() == {}
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_message_routing_only_to_stores_with_handlers():
+    store = pbw.create_store("binanceusdsm")
+    assert store._msg_stores == [store.execution]
+    for name in ("ticker", "trades", "orderbook", "order", "position"):
+        normalized_store = store._get_normalized_store(name)
+        assert normalized_store._queue is None
+        assert normalized_store._queue_task is None
+        assert normalized_store._wait_task is None
+
+    # messageのキーで振り分けるのでmsg_filterでは絞り込まない
+    assert store.execution._msg_filter is None
+    store.onmessage({"e": "aggTrade", "s": "BTCUSDT"}, None)
+    assert store.execution._queue.qsize() == 0
+    store.onmessage({"e": "ORDER_TRADE_UPDATE", "o": {"X": "NEW"}}, None)
+    assert store.execution._queue.qsize() == 1
+    await store.close()
@@ -0,0 +1,368 @@
+import asyncio
+import json
+import time
+
+import pybotters
+import pytest
+from aiohttp import WSMsgType, web
+from aioresponses import aioresponses
+
+import pybotters_wrapper as pbw
+from pybotters_wrapper.core import WebSocketConnection, WebSocketRequestCustomizer
+
+
+def bitflyer_board_message(channel: str, asks: list, bids: list) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "channelMessage",
+        "params": {
+            "channel": f"{channel}_FX_BTC_JPY",
+            "message": {
+                "mid_price": 100,
+                "asks": [{"price": p, "size": s} for p, s in asks],
+                "bids": [{"price": p, "size": s} for p, s in bids],
+            },
+        },
+    }
+
+
+class DroppingServer:
+    """接続ごとにon_connectで送信し、dropがsetされたら接続を切るwebsocketサーバー"""
+
+    def __init__(self, on_connect):
+        self.on_connect = on_connect
+        self.connections = 0
+        self.drop = asyncio.Event()
+        self._runner: web.AppRunner | None = None
+        self.url: str | None = None
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/ws", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/ws"
+        return self
+
+    async def __aexit__(self, *args):
+        await self._runner.cleanup()
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        await self.on_connect(self.connections, ws)
+
+        # 購読リクエストなどは読み捨てる
+        async def receive():
+            async for msg in ws:
+                if msg.type == WSMsgType.CLOSE:
+                    break
+
+        receiver = asyncio.create_task(receive())
+        drop = asyncio.create_task(self.drop.wait())
+        await asyncio.wait([receiver, drop], return_when=asyncio.FIRST_COMPLETED)
+        if drop.done():
+            self.drop.clear()
+        receiver.cancel()
+        drop.cancel()
+        await ws.close()
+        return ws
+
+
+class LocalRequestCustomizer(WebSocketRequestCustomizer):
+    def __init__(self, url: str):
+        super(LocalRequestCustomizer, self).__init__()
+        self._url = url
+
+    def customize(self, endpoint, request_list):
+        return self._url, request_list
+
+
+async def wait_until(predicate, timeout=3.0):
+    async def _wait():
+        while not predicate():
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(_wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_reconnect_on_disconnection():
+    received = []
+
+    async def on_connect(n, ws):
+        await ws.send_json({"connection": n})
+
+    async with DroppingServer(on_connect) as server:
+        async with pybotters.Client() as client:
+            disconnected_at = []
+            reconnections = []
+
+            def on_disconnection(c, _):
+                disconnected_at.append(time.monotonic())
+
+            conn = WebSocketConnection(
+                server.url,
+                {"op": "subscribe"},
+                lambda msg, ws: received.append(msg),
+                None,
+                None,
+            )
+            await conn.connect(
+                client,
+                auto_reconnect=True,
+                on_reconnection=lambda c, _: reconnections.append(c),
+                on_disconnection=on_disconnection,
+                reconnect_backoff=(0.01, 0.1),
+            )
+            await wait_until(lambda: received == [{"connection": 1}])
+
+            # 切断を即座に検知して再接続する（ポーリング間隔を待たない）
+            server.drop.set()
+            await wait_until(lambda: len(received) == 2)
+            recovery = time.monotonic() - disconnected_at[0]
+            assert received == [{"connection": 1}, {"connection": 2}]
+            assert len(disconnected_at) == 1 and reconnections == [conn]
+            assert recovery < 1.0
+            assert conn.connected
+
+            await conn.close()
+            assert not conn.connected
+            assert server.connections == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("auto_reconnect", [True, False])
+async def test_invalidate_orderbook_on_disconnection(auto_reconnect):
+    release = asyncio.Event()
+
+    async def on_connect(n, ws):
+        if n == 1:
+            asks, bids = [(101, 1)], [(99, 1)]
+        else:
+            # 再接続後のsnapshotはテストが空になったことを確認してから送る
+            await release.wait()
+            asks, bids = [(102, 2)], [(98, 2)]
+        msg = bitflyer_board_message("lightning_board_snapshot", asks, bids)
+        await ws.send_json(msg)
+
+    async with DroppingServer(on_connect) as server:
+        async with pybotters.Client() as client:
+            store = pbw.create_store("bitflyer")
+            store._websocket_request_customizer = LocalRequestCustomizer(server.url)
+            store.subscribe("orderbook", symbol="FX_BTC_JPY")
+
+            sizes_on_disconnection = []
+            await store.connect(
+                client,
+                auto_reconnect=auto_reconnect,
+                reconnect_backoff=(0.01, 0.1),
+                invalidate_on_disconnection=True,
+                on_disconnection=lambda c, _: sizes_on_disconnection.append(
+                    (len(store.orderbook), len(store.store.board))
+                ),
+            )
+            await wait_until(lambda: len(store.orderbook) == 2)
+
+            server.drop.set()
+            await wait_until(lambda: len(sizes_on_disconnection) == 1)
+            assert sizes_on_disconnection == [(0, 0)]
+            assert len(store.orderbook) == 0
+
+            # auto_reconnect=Falseの場合はpybottersがクールダウン後に再接続する
+            if auto_reconnect:
+                release.set()
+                await wait_until(lambda: len(store.orderbook) == 2)
+                assert store.orderbook.best_ask("FX_BTC_JPY")["price"] == 102
+
+            await store.close()
+
+
+def binance_depth_update(first_id, last_id, prev_id, bids=(), asks=()):
+    return {
+        "e": "depthUpdate",
+        "E": 1681278004853,
+        "T": 1681278004830,
+        "s": "BTCUSDT",
+        "U": first_id,
+        "u": last_id,
+        "pu": prev_id,
+        "b": [list(b) for b in bids],
+        "a": [list(a) for a in asks],
+    }
+
+
+def binance_snapshot(last_update_id, bids, asks):
+    return {
+        "lastUpdateId": last_update_id,
+        "E": 1681278004853,
+        "T": 1681278004830,
+        "bids": [list(b) for b in bids],
+        "asks": [list(a) for a in asks],
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("resync", [True, False])
+async def test_invalidate_binance_orderbook_on_disconnection(resync):
+    url = "https://fapi.binance.com/fapi/v1/depth?symbol=BTCUSDT"
+
+    async def on_connect(n, ws):
+        if n == 1:
+            await ws.send_json(binance_depth_update(95, 105, 94, [("99.0", "2.0")]))
+        else:
+            # 切断中の差分は受け取れない（u=105〜150の差分が欠けている）
+            await ws.send_json(binance_depth_update(150, 155, 149, [("97.0", "1.0")]))
+
+    def book():
+        return {(i["S"], i["p"]): i["q"] for i in store.store.orderbook.find()}
+
+    async with DroppingServer(on_connect) as server:
+        async with pybotters.Client() as client:
+            store = pbw.create_store("binanceusdsm")
+            store._websocket_request_customizer = LocalRequestCustomizer(server.url)
+            store.subscribe("orderbook", symbol="BTCUSDT")
+            if resync:
+                store.enable_orderbook_resync(client)
+
+            with aioresponses(passthrough=["ws://127.0.0.1"]) as m:
+                m.get(url, payload=binance_snapshot(100, [("99.0", "1.0")], []))
+                if resync:
+                    m.get(
+                        url,
+                        payload=binance_snapshot(
+                            152, [("98.0", "1.0")], [("101.0", "1.0")]
+                        ),
+                    )
+                await store._initializer.initialize_orderbook(client, symbol="BTCUSDT")
+
+                sizes_on_disconnection = []
+                await store.connect(
+                    client,
+                    auto_reconnect=True,
+                    reconnect_backoff=(0.01, 0.1),
+                    invalidate_on_disconnection=True,
+                    on_disconnection=lambda c, _: sizes_on_disconnection.append(
+                        len(store.store.orderbook)
+                    ),
+                )
+                await wait_until(lambda: book() == {("BUY", "99.0"): "2.0"})
+
+                server.drop.set()
+                await wait_until(lambda: len(sizes_on_disconnection) == 1)
+                if resync:
+                    # 空にして、差分の欠損を待たずにsnapshotを取り直す
+                    assert sizes_on_disconnection == [0]
+                    await wait_until(lambda: ("BUY", "97.0") in book())
+                    resync = store.orderbook_resync
+                    assert resync.resyncs == 1 and resync.gaps == 0
+                    assert store.store.orderbook.initialized
+                    assert book() == {
+                        ("BUY", "98.0"): "1.0",
+                        ("BUY", "97.0"): "1.0",
+                        ("SELL", "101.0"): "1.0",
+                    }
+                else:
+                    # snapshotを取り直す手段がないので、差分だけの板にしないよう空にしない
+                    assert sizes_on_disconnection == [1]
+                    await wait_until(lambda: ("BUY", "97.0") in book())
+                    assert book() == {("BUY", "99.0"): "2.0", ("BUY", "97.0"): "1.0"}
+
+                    # 明示的に空にした場合はsnapshotを取り直すまで未初期化に戻す
+                    store.invalidate()
+                    assert not store.store.orderbook.initialized
+
+            await store.close()
+
+
+@pytest.mark.asyncio
+async def test_invalidate():
+    store = pbw.create_store("bitflyer").set_inline_normalization(True)
+    store.store._snapshots.add("FX_BTC_JPY")
+    store.onmessage(bitflyer_board_message("lightning_board", [(101, 1)], []), None)
+    ticker = {"product_code": "FX_BTC_JPY", "ltp": 100}
+    store.onmessage(
+        {"params": {"channel": "lightning_ticker_FX_BTC_JPY", "message": ticker}},
+        None,
+    )
+    assert len(store.orderbook) == 1 and len(store.ticker) == 1
+
+    store.invalidate()
+    assert len(store.orderbook) == 0 and len(store.store.board) == 0
+    assert len(store.ticker) == 1
+
+    store.invalidate(["ticker"])
+    assert len(store.ticker) == 0
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_stats():
+    # 非ASCIIの文字を含むテキストフレームは文字数ではなくバイト数で数える
+    frames = [json.dumps({"n": i, "side": "買"}, ensure_ascii=False) for i in range(3)]
+
+    async def on_connect(n, ws):
+        for frame in frames:
+            await ws.send_str(frame)
+
+    async with DroppingServer(on_connect) as server:
+        async with pybotters.Client() as client:
+            received = []
+            store = pbw.create_store("bitflyer").set_connection_stats(True)
+            hdlr = lambda msg, ws: received.append(msg)  # noqa
+            # 同じendpointへの2つの接続はまとめて集計する
+            for _ in range(2):
+                await store.connect(client, endpoint=server.url, send={}, hdlr=hdlr)
+            await wait_until(lambda: len(received) == 6)
+
+            stats = store.get_connection_stats()
+            assert list(stats) == [server.url]
+            assert stats[server.url]["frames"] == 6
+            assert stats[server.url]["bytes"] == 2 * sum(
+                len(f.encode()) for f in frames
+            )
+            assert stats[server.url]["bytes"] > 2 * sum(len(f) for f in frames)
+            assert stats[server.url]["frames_per_sec"] > 0
+            assert stats[server.url]["handler_p99"] is not None
+            assert sum(stats[server.url]["handler_histogram"].values()) == 6
+
+            conn = store.ws_connections[0]
+            assert conn.get_stats()["frames"] == 3
+            store.set_connection_stats(False)
+            assert conn.get_stats() is None and store.get_connection_stats() == {}
+
+            await store.close()
+
+
+@pytest.mark.asyncio
+async def test_sharding():
+    symbols = ["FX_BTC_JPY", "BTC_JPY", "ETH_JPY"]
+
+    async def on_connect(n, ws):
+        ticker = {"product_code": symbols[n - 1], "ltp": n}
+        channel = f"lightning_ticker_{symbols[n - 1]}"
+        await ws.send_json({"params": {"channel": channel, "message": ticker}})
+
+    async with DroppingServer(on_connect) as server:
+        async with pybotters.Client() as client:
+            store = pbw.create_store("bitflyer")
+            store._websocket_request_customizer = LocalRequestCustomizer(server.url)
+            for symbol in symbols:
+                store.subscribe("ticker", symbol=symbol)
+            await store.connect(client, max_streams_per_connection=2)
+
+            # 2接続に分かれても、どちらのmessageも同じストアに入る
+            await wait_until(lambda: server.connections == 2)
+            await wait_until(lambda: len(store.ticker) == 2)
+            assert len(store.ws_connections) == 2
+            assert [len(conn._send) for conn in store.ws_connections] == [2, 1]
+            assert {item["symbol"] for item in store.ticker.find()} == {
+                "FX_BTC_JPY",
+                "BTC_JPY",
+            }
+
+            await store.close()